@@ -1,11 +1,16 @@
+import sqlite3
 from flask import Flask
-from sqlalchemy import text
+from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
 from config import Config
 from .extensions import db, login_manager
 import time
 from sqlalchemy.exc import OperationalError
 from .seed_data import populate_seed_data
 from .models import User  
+from .utils.search_helper import create_search_index
+from .utils.user_cache_helper import load_cached_user
 
 def create_app(config_class=None):
     app = Flask(__name__)
@@ -15,6 +20,10 @@ def create_app(config_class=None):
     else:
         app.config.from_object(Config)
 
+    # Behind a reverse proxy, the client's IP address (used to rate limit logins) is read from the X-Forwarded-For header
+    if app.config.get('TRUSTED_PROXIES'):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'], x_proto=app.config['TRUSTED_PROXIES'])
+
     # Initialise extensions
     db.init_app(app)
     login_manager.init_app(app)
@@ -25,23 +34,40 @@ def create_app(config_class=None):
     from .views.auth import auth_bp
     from .views.tickets import tickets_bp
     from .views.users import users_bp
+    from .views.events import events_bp
 
     app.register_blueprint(home_bp, url_prefix='/')
     app.register_blueprint(auth_bp, url_prefix='/')
     app.register_blueprint(tickets_bp, url_prefix='/')
     app.register_blueprint(users_bp, url_prefix='/')
+    app.register_blueprint(events_bp, url_prefix='/')
+
+    # Register Flask CLI commands
+    from .commands import register_commands
+    register_commands(app)
 
     # Create database tables and populate seed data
     create_database(app)
 
+    # The user's identity is cached between requests (see user_cache_helper), and users that are being deleted are logged out
     @login_manager.user_loader
     def load_user(user_id):
-        return db.session.query(User).get(int(user_id))
+        return load_cached_user(int(user_id))
 
     return app
 
+# SQLite does not enforce foreign keys (or their ON DELETE actions) unless they are enabled on each connection.
+# They are needed so that purging deleted tickets also deletes their comments and history.
+@event.listens_for(Engine, 'connect')
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
 def create_database(app):
     with app.app_context():
         db.create_all()
+        create_search_index()
         if not app.config.get("TESTING", False):
             populate_seed_data()
\ No newline at end of file
@@ -0,0 +1,121 @@
+from datetime import timedelta
+import click
+from flask.cli import with_appcontext
+from .utils.status_count_helper import counters_enabled, rebuild_status_counts
+from .utils.search_helper import rebuild_search_index
+from .utils.user_deletion_helper import resume_user_deletions
+from .utils.import_helper import IMPORT_FORMATS, import_format_for, import_tickets
+from .utils.ticket_deletion_helper import purge_deleted_tickets
+from .utils.archive_helper import archive_closed_tickets
+from .utils.job_queue_helper import run_worker
+from .utils.password_helper import benchmark_password_hashing, password_hash_method
+from .utils.schema_upgrade_helper import upgrade_database
+
+# This module registers the maintenance commands that are run with the Flask CLI (e.g. 'flask rebuild-status-counts').
+
+@click.command('rebuild-status-counts')
+@with_appcontext
+def rebuild_status_counts_command():
+    incorrect = rebuild_status_counts()
+    click.echo(f"Status counters rebuilt. {incorrect} counter(s) were inconsistent with the ticket table.")
+    if not counters_enabled():
+        click.echo("Note: USE_STATUS_COUNTERS is disabled, so the home page will only read the archived ticket counters.")
+
+@click.command('upgrade-database')
+@with_appcontext
+def upgrade_database_command():
+    changes = upgrade_database()
+    for change in changes:
+        click.echo(change)
+    click.echo(f"Database upgraded with {len(changes)} change(s). The status counters and search index were rebuilt.")
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    documents = rebuild_search_index()
+    click.echo(f"Search index rebuilt with {documents} document(s).")
+
+@click.command('resume-user-deletions')
+@with_appcontext
+def resume_user_deletions_command():
+    users = resume_user_deletions()
+    click.echo(f"Resumed the deletion of {users} user(s).")
+
+@click.command('import-tickets')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'import_format', type=click.Choice(IMPORT_FORMATS), help='Defaults to the file extension.')
+@with_appcontext
+def import_tickets_command(path, import_format):
+    import_format = import_format or import_format_for(path)
+    if not import_format:
+        raise click.UsageError('Unable to tell the file format from its extension, please use --format.')
+
+    with open(path, encoding='utf-8-sig', newline='') as stream:
+        result = import_tickets(stream, import_format)
+
+    for row_number, error in result.errors:
+        click.echo(f"Row {row_number}: {error}", err=True)
+    click.echo(f"Imported {result.imported} ticket(s). {len(result.errors)} row(s) could not be imported.")
+
+@click.command('purge-deleted-tickets')
+@click.option('--older-than-days', type=click.IntRange(min=0), help='Defaults to PURGE_DELETED_TICKETS_AFTER_DAYS (30).')
+@click.option('--batch-size', type=click.IntRange(min=1), help='Defaults to PURGE_BATCH_SIZE (500).')
+@with_appcontext
+def purge_deleted_tickets_command(older_than_days, batch_size):
+    older_than = timedelta(days=older_than_days) if older_than_days is not None else None
+    purged = purge_deleted_tickets(older_than, batch_size)
+    click.echo(f"Permanently deleted {purged} ticket(s).")
+
+@click.command('archive-closed-tickets')
+@click.option('--older-than-days', type=click.IntRange(min=0), help='Defaults to ARCHIVE_CLOSED_TICKETS_AFTER_DAYS (365).')
+@click.option('--batch-size', type=click.IntRange(min=1), help='Defaults to ARCHIVE_BATCH_SIZE (500).')
+@with_appcontext
+def archive_closed_tickets_command(older_than_days, batch_size):
+    older_than = timedelta(days=older_than_days) if older_than_days is not None else None
+    archived = archive_closed_tickets(older_than, batch_size)
+    click.echo(f"Archived {archived} closed ticket(s).")
+
+@click.command('run-worker')
+@click.option('--once', is_flag=True, help='Deliver the jobs that are due and then exit, rather than polling for new jobs.')
+@click.option('--batch-size', type=click.IntRange(min=1), help='Defaults to JOB_BATCH_SIZE (100).')
+@with_appcontext
+def run_worker_command(once, batch_size):
+    processed = run_worker(once=once, batch_size=batch_size)
+    click.echo(f"Processed {processed} job(s).")
+
+BENCHMARK_HASH_METHODS = [
+    'pbkdf2:sha256:100000',
+    'pbkdf2:sha256:300000',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:1000000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1'
+]
+
+@click.command('benchmark-password-hashing')
+@click.argument('methods', nargs=-1)
+@click.option('--duration', type=click.FloatRange(min=0), default=1.0, show_default=True, help='Seconds to spend timing each method.')
+@with_appcontext
+def benchmark_password_hashing_command(methods, duration):
+    configured = password_hash_method()
+    methods = methods or [configured] + [method for method in BENCHMARK_HASH_METHODS if method != configured]
+    try:
+        results = benchmark_password_hashing(methods, duration)
+    except ValueError as error:
+        raise click.UsageError(str(error))
+
+    click.echo(f"{'Method':<24} {'ms per login':>12} {'logins/s per worker':>20}")
+    for method, seconds in results:
+        marker = ' (configured)' if method == configured else ''
+        click.echo(f"{method:<24} {seconds * 1000:>12.1f} {1 / seconds:>20.1f}{marker}")
+
+def register_commands(app):
+    app.cli.add_command(upgrade_database_command)
+    app.cli.add_command(rebuild_status_counts_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(resume_user_deletions_command)
+    app.cli.add_command(import_tickets_command)
+    app.cli.add_command(purge_deleted_tickets_command)
+    app.cli.add_command(archive_closed_tickets_command)
+    app.cli.add_command(run_worker_command)
+    app.cli.add_command(benchmark_password_hashing_command)
@@ -1,3 +1,13 @@
 from .user import User
 from .comment import Comment
-from .ticket import Ticket
\ No newline at end of file
+from .ticket import Ticket
+from .ticket_status_count import TicketStatusCount
+from .cache_version import CacheVersion
+from .ticket_history import TicketHistory
+from .archived_ticket import ArchivedTicket
+from .archived_comment import ArchivedComment
+from .archived_ticket_history import ArchivedTicketHistory
+from .job import Job
+from .ticket_event import TicketEvent
+from .login_attempt import LoginAttempt
+from .archived_status_count import ArchivedStatusCount
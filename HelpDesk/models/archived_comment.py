@@ -0,0 +1,17 @@
+from ..extensions import db
+
+# This model holds the comments of archived tickets. They are moved with their ticket and keep their comment id.
+
+class ArchivedComment(db.Model):
+    __table_args__ = (
+        db.Index('ix_archived_comment_ticket_date_created_id', 'ticket_id', 'date_created', 'id'),
+        db.Index('ix_archived_comment_user_id', 'user_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    comment_text = db.Column(db.Text(), nullable=False)
+    created_by = db.Column(db.String(100), nullable=False)
+    date_created = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('archived_ticket.id', ondelete='CASCADE'), nullable=True)
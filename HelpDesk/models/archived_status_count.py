@@ -0,0 +1,12 @@
+from ..extensions import db
+
+# This model stores the number of archived tickets per status, so that the dashboard widgets on the home page
+# can include archived tickets without aggregating the archive on every request.
+# A scope_id of 0 holds the system wide counts shown to administrators, any other scope_id is the id of the user that reported the tickets.
+# Rows are updated when tickets are archived and unarchived, whether or not USE_STATUS_COUNTERS is enabled,
+# and can be rebuilt with the 'flask rebuild-status-counts' command.
+
+class ArchivedStatusCount(db.Model):
+    scope_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    status = db.Column(db.String(20), primary_key=True)
+    ticket_count = db.Column(db.Integer, nullable=False, default=0)
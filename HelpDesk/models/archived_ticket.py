@@ -0,0 +1,34 @@
+from ..extensions import db
+from sqlalchemy.orm import relationship, query_expression
+
+# This model holds tickets that have been closed for longer than ARCHIVE_CLOSED_TICKETS_AFTER_DAYS.
+# They are moved here by the 'flask archive-closed-tickets' command so that the ticket table and its indexes only contain
+# the tickets that are still being worked on. Archived tickets keep their ticket id and are read-only until they are unarchived.
+
+class ArchivedTicket(db.Model):
+    __table_args__ = (
+        db.Index('ix_archived_ticket_user_id', 'user_id', 'id'),
+        db.Index('ix_archived_ticket_assignee_id', 'assignee_id', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    ticket_type = db.Column(db.String(20), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    description = db.Column(db.Text(), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    priority = db.Column(db.String(20), nullable=False)
+    estimated_time = db.Column(db.Float, nullable=False)
+    created_by = db.Column(db.String(100), nullable=False)
+    updated_by = db.Column(db.String(100), nullable=True)
+    date_created = db.Column(db.DateTime(timezone=True), nullable=True)
+    date_updated = db.Column(db.DateTime(timezone=True), nullable=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    archived_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    assignee_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+
+    # Populated by the home page listing with the start of the description, as for Ticket
+    description_preview = query_expression()
+
+    assignee = relationship('User', foreign_keys=[assignee_id])
@@ -0,0 +1,16 @@
+from ..extensions import db
+
+# This model holds the edit history of archived tickets. It is moved with the ticket and keeps its ids.
+
+class ArchivedTicketHistory(db.Model):
+    __table_args__ = (
+        db.Index('ix_archived_ticket_history_ticket_id_id', 'ticket_id', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('archived_ticket.id', ondelete='CASCADE'), nullable=False)
+    field = db.Column(db.String(30), nullable=False)
+    old_value = db.Column(db.String(255), nullable=True)
+    new_value = db.Column(db.String(255), nullable=True)
+    changed_by = db.Column(db.String(100), nullable=False)
+    date_changed = db.Column(db.DateTime(timezone=True), nullable=True)
@@ -0,0 +1,8 @@
+from ..extensions import db
+
+# This model stores version counters for data that is cached within each worker process.
+# When the cached data changes the version is incremented, so every worker reloads it on its next request.
+
+class CacheVersion(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
@@ -4,12 +4,18 @@ from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
 class Comment(db.Model):
+    __table_args__ = (
+        db.Index('ix_comment_ticket_date_created_id', 'ticket_id', 'date_created', 'id'),
+        db.Index('ix_comment_user_id', 'user_id'),
+        {'sqlite_autoincrement': True}
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     comment_text = db.Column(db.Text(), nullable=False)
     created_by = db.Column(db.String(100), nullable=False)
     date_created = db.Column(db.DateTime(timezone=True), default=func.current_timestamp())
 
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
-    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id', ondelete='SET NULL'), nullable=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id', ondelete='CASCADE'), nullable=True)
     
     ticket = relationship('Ticket', backref='ticket_comments')
\ No newline at end of file
@@ -0,0 +1,24 @@
+from ..extensions import db
+from sqlalchemy.sql import func
+
+# This model is the durable queue of outbound deliveries (notification emails and webhook calls).
+# Jobs are inserted in the same transaction as the ticket or user change they describe, and are delivered by the
+# 'flask run-worker' process, so SMTP and HTTP latency is never on the request path and no delivery is lost if a web worker restarts.
+# Delivered jobs are deleted. Jobs that fail are retried with an increasing delay and are kept with the 'failed' status
+# once JOB_MAX_ATTEMPTS has been reached. The worker finds due jobs with the (status, run_after, id) index.
+
+class Job(db.Model):
+    __table_args__ = (
+        db.Index('ix_job_status_run_after_id', 'status', 'run_after', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    recipient = db.Column(db.String(2048), nullable=False)
+    payload = db.Column(db.Text(), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    run_after = db.Column(db.DateTime(timezone=True), nullable=False)
+    locked_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    last_error = db.Column(db.Text(), nullable=True)
+    date_created = db.Column(db.DateTime(timezone=True), default=func.current_timestamp())
@@ -0,0 +1,17 @@
+from ..extensions import db
+
+# This model is the shared store for the login rate limiter when RATE_LIMIT_BACKEND is 'database',
+# so that the limits hold across every worker process rather than within each one.
+# Each row is one admitted attempt against a key (e.g. 'ip:203.0.113.7' or 'account:user1@recruitment-software.co.uk').
+# attempted_at is a Unix timestamp, so that both backends measure the sliding window the same way.
+# Attempts older than LOGIN_ATTEMPT_WINDOW are deleted by the limiter.
+
+class LoginAttempt(db.Model):
+    __table_args__ = (
+        db.Index('ix_login_attempt_key_attempted_at', 'key', 'attempted_at'),
+        db.Index('ix_login_attempt_attempted_at', 'attempted_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(320), nullable=False)
+    attempted_at = db.Column(db.Float, nullable=False)
@@ -1,8 +1,33 @@
 from ..extensions import db
+from sqlalchemy import text
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, query_expression
+
+# The indexes below match the access paths of the home page filters, the dashboard counts, the users page counts
+# and the latest update lookups used to validate cached pages.
+# Each one ends in (or is followed by) the primary key so that 'ORDER BY id DESC' can be read straight from the index.
+# The listing indexes are partial indexes that only contain tickets which have not been soft deleted.
+# Queries must use the same predicate ('Ticket.is_deleted == false()') for the database to use them.
+# The user and assignee indexes cover every ticket, as deleting a user also detaches their deleted tickets.
+# Ids are never reused (AUTOINCREMENT on SQLite), as archived tickets keep their id and can be moved back.
+
+NOT_DELETED = {'sqlite_where': text('is_deleted = 0'), 'postgresql_where': text('is_deleted = false')}
+DELETED = {'sqlite_where': text('is_deleted = 1'), 'postgresql_where': text('is_deleted = true')}
 
 class Ticket(db.Model):
+    __table_args__ = (
+        db.Index('ix_ticket_user_status_id', 'user_id', 'status', 'id', **NOT_DELETED),
+        db.Index('ix_ticket_user_id', 'user_id', 'id'),
+        db.Index('ix_ticket_assignee_status', 'assignee_id', 'status', **NOT_DELETED),
+        db.Index('ix_ticket_assignee_id', 'assignee_id', 'id'),
+        db.Index('ix_ticket_status_id', 'status', 'id', **NOT_DELETED),
+        db.Index('ix_ticket_date_created', 'date_created', **NOT_DELETED),
+        db.Index('ix_ticket_date_updated', 'date_updated', **NOT_DELETED),
+        db.Index('ix_ticket_user_date_updated', 'user_id', 'date_updated', **NOT_DELETED),
+        db.Index('ix_ticket_deleted_at', 'deleted_at', 'id', **DELETED),
+        {'sqlite_autoincrement': True}
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     ticket_type = db.Column(db.String(20), nullable=False)
     subject = db.Column(db.String(255), nullable=False)
@@ -15,5 +40,15 @@ class Ticket(db.Model):
     date_created = db.Column(db.DateTime(timezone=True), default=func.current_timestamp())
     date_updated = db.Column(db.DateTime(timezone=True), default=None, nullable=True)
 
+    # Incremented by every edit, so that an edit made from an out of date copy of the ticket can be detected
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    # Deleted tickets are hidden straight away and permanently deleted later by the 'flask purge-deleted-tickets' command
+    is_deleted = db.Column(db.Boolean, nullable=False, default=False)
+    deleted_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
-    assignee_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
\ No newline at end of file
+    assignee_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+
+    # Populated by the home page listing with the start of the description, so the full text does not need to be loaded
+    description_preview = query_expression()
\ No newline at end of file
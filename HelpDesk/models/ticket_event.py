@@ -0,0 +1,21 @@
+from ..extensions import db
+from sqlalchemy.sql import func
+
+# This model is a short-lived log of ticket changes that is pushed to the browsers on the live event stream (/events).
+# Events are inserted in the same transaction as the change, and each worker process reads new events with a single
+# query on the primary key, however many browsers are connected. Ids are never reused, so they can be used as the
+# stream's event ids. Events older than TICKET_EVENT_RETENTION_MINUTES are deleted by the event broadcaster.
+# user_id is the ticket's reporter, which decides which non-administrators are sent the event.
+
+class TicketEvent(db.Model):
+    __table_args__ = (
+        db.Index('ix_ticket_event_date_created', 'date_created'),
+        {'sqlite_autoincrement': True}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(20), nullable=False)
+    ticket_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    data = db.Column(db.Text(), nullable=False)
+    date_created = db.Column(db.DateTime(timezone=True), nullable=False, default=func.current_timestamp())
@@ -0,0 +1,20 @@
+from ..extensions import db
+from sqlalchemy.sql import func
+
+# This model is an append-only log of the fields changed by each ticket edit.
+# Rows are only ever inserted, and are read newest first for a single ticket using the (ticket_id, id) index.
+# Descriptions can be long, so description changes are recorded without their old and new values.
+
+class TicketHistory(db.Model):
+    __table_args__ = (
+        db.Index('ix_ticket_history_ticket_id_id', 'ticket_id', 'id'),
+        {'sqlite_autoincrement': True}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id', ondelete='CASCADE'), nullable=False)
+    field = db.Column(db.String(30), nullable=False)
+    old_value = db.Column(db.String(255), nullable=True)
+    new_value = db.Column(db.String(255), nullable=True)
+    changed_by = db.Column(db.String(100), nullable=False)
+    date_changed = db.Column(db.DateTime(timezone=True), default=func.current_timestamp())
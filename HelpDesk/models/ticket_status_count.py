@@ -0,0 +1,10 @@
+from ..extensions import db
+
+# This model stores maintained ticket counts per status for the dashboard widgets on the home page.
+# A scope_id of 0 holds the system wide counts shown to administrators, any other scope_id is the id of the user that reported the tickets.
+# Rows are kept up to date by the ticket and user write paths and can be rebuilt with the 'flask rebuild-status-counts' command.
+
+class TicketStatusCount(db.Model):
+    scope_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    status = db.Column(db.String(20), primary_key=True)
+    ticket_count = db.Column(db.Integer, nullable=False, default=0)
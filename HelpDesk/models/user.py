@@ -4,6 +4,10 @@ from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
 class User(db.Model, UserMixin):
+    __table_args__ = (
+        db.Index('ix_user_is_admin_id', 'is_admin', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     forename = db.Column(db.String(50))
     surname = db.Column(db.String(50))
@@ -13,6 +17,9 @@ class User(db.Model, UserMixin):
     totp_secret = db.Column(db.String(64))
     is_2fa_enabled = db.Column(db.Boolean, default=False)
     date_created = db.Column(db.DateTime(timezone=True), default=func.current_timestamp())
+    pending_deletion = db.Column(db.Boolean, default=False, nullable=False)
+    deletion_progress = db.Column(db.Integer, default=0, nullable=False)
+    deletion_total = db.Column(db.Integer, default=0, nullable=False)
 
     assigned_tickets = relationship('Ticket', backref='assignee', foreign_keys='Ticket.assignee_id')
     tickets = relationship('Ticket', backref='user', foreign_keys='Ticket.user_id')
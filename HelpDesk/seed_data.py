@@ -1,8 +1,10 @@
 import random
-from werkzeug.security import generate_password_hash
 from datetime import datetime, timezone
 from .extensions import db
 from .models import User, Ticket, Comment
+from .utils.status_count_helper import counters_enabled, rebuild_status_counts
+from .utils.search_helper import rebuild_search_index
+from .utils.password_helper import hash_password
 
 def populate_seed_data():
     if User.query.first():
@@ -24,7 +26,7 @@ def populate_seed_data():
             forename=forenames[i],
             surname=surnames[i],
             email=f"user{i+1}@recruitment-software.co.uk",
-            password=generate_password_hash(f"Password{i+1}!"),
+            password=hash_password(f"Password{i+1}!"),
             is_admin= True if is_admin else False,
             totp_secret=None,
             is_2fa_enabled=False
@@ -126,4 +128,8 @@ def populate_seed_data():
 
     db.session.add_all(comments)
     db.session.commit()
-    print("10 users, 10 tickets, and 10 comments have been created within the database.")
\ No newline at end of file
+    print("10 users, 10 tickets, and 10 comments have been created within the database.")
+
+    rebuild_search_index()
+    if counters_enabled():
+        rebuild_status_counts()
\ No newline at end of file
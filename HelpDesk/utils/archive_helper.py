@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import false, func, insert, literal, select
+from ..extensions import db
+from ..models import Ticket, Comment, TicketHistory, ArchivedTicket, ArchivedComment, ArchivedTicketHistory
+from .reference_cache_helper import bump_reference_version
+from .status_count_helper import adjust_archived_status_counts
+
+# These functions move tickets that have been closed for a long time out of the ticket table and into the archive tables.
+# The 'flask archive-closed-tickets' command (e.g. run nightly by cron) archives them in bounded batches with a commit per batch.
+# Each batch is copied with INSERT ... SELECT and then deleted from the ticket table, which removes its comments and history
+# through the ON DELETE CASCADE foreign keys, so a batch is a handful of statements however many comments the tickets have.
+# Archived tickets keep their ids, so their search documents are left in place and they can be moved back by unarchiving them.
+# They are still counted as Closed tickets by the dashboard counts, which read the archive's counts from the archived_status_count table.
+
+DEFAULT_ARCHIVE_BATCH_SIZE = 500
+DEFAULT_ARCHIVE_AFTER_DAYS = 365
+
+# Each entry is (live model, archive model, column that selects the rows of a ticket). Tickets must be copied first.
+ARCHIVE_TABLES = [
+    (Ticket, ArchivedTicket, 'id'),
+    (Comment, ArchivedComment, 'ticket_id'),
+    (TicketHistory, ArchivedTicketHistory, 'ticket_id')
+]
+
+# This function copies the rows of the tickets from one table to another, using the columns both tables have.
+# Columns that only the target has are given the values in extra_values, or their defaults.
+def _copy_rows(source, target, ticket_column, ticket_ids, extra_values=None):
+    extra_values = extra_values or {}
+    source_columns = source.__table__.columns
+    columns = [column.name for column in target.__table__.columns if column.name in source_columns]
+    rows = (
+        select(*[source_columns[name] for name in columns], *[literal(value) for value in extra_values.values()])
+        .where(source_columns[ticket_column].in_(ticket_ids))
+    )
+    db.session.execute(insert(target).from_select(columns + list(extra_values), rows))
+
+# This function returns the query for the tickets that can be archived: closed tickets whose last update
+# (or creation, if they have never been updated) is older than the cutoff.
+# Closed tickets can still be edited, which moves their last update forward and so delays their archiving.
+def archivable_tickets(cutoff):
+    return (
+        db.session.query(Ticket.id)
+        .filter(
+            Ticket.status == 'Closed',
+            Ticket.is_deleted == false(),
+            func.coalesce(Ticket.date_updated, Ticket.date_created) < cutoff
+        )
+    )
+
+# This function archives the tickets that were closed more than older_than ago and returns the number archived.
+def archive_closed_tickets(older_than=None, batch_size=None):
+    if older_than is None:
+        older_than = timedelta(days=current_app.config.get('ARCHIVE_CLOSED_TICKETS_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS))
+    if batch_size is None:
+        batch_size = current_app.config.get('ARCHIVE_BATCH_SIZE', DEFAULT_ARCHIVE_BATCH_SIZE)
+    cutoff = datetime.now() - older_than
+    archived = 0
+
+    while True:
+        ticket_ids = [row.id for row in archivable_tickets(cutoff).order_by(Ticket.id).limit(batch_size)]
+        if not ticket_ids:
+            break
+
+        archived_at = datetime.now()
+        for live, archive, ticket_column in ARCHIVE_TABLES:
+            _copy_rows(live, archive, ticket_column, ticket_ids, {'archived_at': archived_at} if archive is ArchivedTicket else None)
+        adjust_archived_status_counts(ticket_ids)
+        db.session.query(Ticket).filter(Ticket.id.in_(ticket_ids)).delete(synchronize_session=False)
+        # Cached pages are revalidated, as the tickets have moved from the current list to the archive
+        bump_reference_version()
+        db.session.commit()
+        archived += len(ticket_ids)
+
+    return archived
+
+# This function moves an archived ticket back into the ticket table within the caller's transaction, so that it can be edited.
+def unarchive_ticket(archived_ticket):
+    for live, archive, ticket_column in ARCHIVE_TABLES:
+        _copy_rows(archive, live, ticket_column, [archived_ticket.id])
+    adjust_archived_status_counts([archived_ticket.id], -1)
+    db.session.query(ArchivedTicket).filter(ArchivedTicket.id == archived_ticket.id).delete(synchronize_session=False)
+    bump_reference_version()
+
+# This function returns the archived ticket with the given id, or None if it has not been archived.
+def get_archived_ticket(ticket_id):
+    return db.session.get(ArchivedTicket, ticket_id)
@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+# These functions run long-running work (e.g. deleting a user with a large ticket history) outside of the web request.
+# Jobs run on a small thread pool owned by each worker process, inside their own application context and database session.
+# When BACKGROUND_JOBS_SYNC is enabled (e.g. during testing) jobs run immediately within the request instead.
+
+BACKGROUND_WORKERS = 2
+
+def _executor(app):
+    executor = app.extensions.get('background_executor')
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix='helpdesk-job')
+        app.extensions['background_executor'] = executor
+    return executor
+
+def _run(app, job, args):
+    with app.app_context():
+        try:
+            job(*args)
+        except Exception:
+            app.logger.exception("Background job %s failed.", job.__name__)
+            raise
+
+# This function schedules a job. The job is called with the given arguments inside a new application context.
+def submit_job(job, *args):
+    app = current_app._get_current_object()
+    if app.config.get('BACKGROUND_JOBS_SYNC'):
+        with app.app_context():
+            return job(*args)
+    return _executor(app).submit(_run, app, job, args)
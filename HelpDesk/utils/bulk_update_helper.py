@@ -0,0 +1,77 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import false, tuple_
+from ..extensions import db
+from ..models import Ticket
+from .status_count_helper import adjust_status_count
+from .reference_cache_helper import bump_reference_version
+from .ticket_history_helper import record_ticket_changes
+from .notification_helper import enqueue_ticket_event, ticket_change_events
+from .ticket_event_helper import record_tickets_updated
+
+# These functions apply one status, priority and/or assignee change to many tickets from the home page.
+# The selected tickets are loaded with a single query, and the change is written with a single set-based UPDATE
+# covering the tickets that actually change. The history, dashboard counters and reference data version are updated
+# in the same transaction, and each ticket's version is checked so an edit made in the meantime is never overwritten.
+# Notifications for the changed tickets are queued in the same transaction and delivered by the worker.
+
+BULK_FIELDS = ['status', 'priority', 'assignee_id']
+
+class BulkUpdateConflict(Exception):
+    pass
+
+# This function returns the number of tickets that were changed.
+# values maps each field in BULK_FIELDS that should be changed to its new value (None unassigns the tickets).
+def bulk_update_tickets(ticket_ids, values, actor, administrators):
+    changed_by = f"{actor.forename} {actor.surname}"
+    tickets = (
+        db.session.query(Ticket.id, Ticket.user_id, Ticket.version, Ticket.subject, *[getattr(Ticket, field) for field in BULK_FIELDS])
+        .filter(Ticket.id.in_(ticket_ids), Ticket.is_deleted == false())
+        .all()
+    )
+
+    # Tickets that already have the new values are left untouched
+    changes = {}
+    for ticket in tickets:
+        ticket_changes = {
+            field: (getattr(ticket, field), new_value)
+            for field, new_value in values.items()
+            if getattr(ticket, field) != new_value
+        }
+        if ticket_changes:
+            changes[ticket] = ticket_changes
+    if not changes:
+        return 0
+
+    updated = (
+        db.session.query(Ticket)
+        .filter(tuple_(Ticket.id, Ticket.version).in_([(ticket.id, ticket.version) for ticket in changes]))
+        .update({
+            **values,
+            'updated_by': changed_by,
+            'date_updated': datetime.now(),
+            'version': Ticket.version + 1
+        }, synchronize_session=False)
+    )
+    if updated != len(changes):
+        db.session.rollback()
+        raise BulkUpdateConflict()
+
+    status_deltas = Counter()
+    for ticket, ticket_changes in changes.items():
+        record_ticket_changes(ticket, ticket_changes, changed_by, administrators)
+        for event, recipient_ids, data in ticket_change_events(ticket, ticket_changes):
+            enqueue_ticket_event(event, ticket, actor, recipient_ids, **data)
+        if 'status' in ticket_changes:
+            old_status, new_status = ticket_changes['status']
+            status_deltas[(ticket.user_id, old_status)] -= 1
+            status_deltas[(ticket.user_id, new_status)] += 1
+    for (user_id, status), delta in status_deltas.items():
+        adjust_status_count(user_id, status, delta)
+    record_tickets_updated(changes)
+
+    if 'assignee_id' in values:
+        bump_reference_version()
+
+    db.session.commit()
+    return len(changes)
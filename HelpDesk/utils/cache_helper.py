@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+# This class is a small, thread-safe, bounded least recently used (LRU) cache, held in memory by each worker process.
+# When the cache is full, the entry that was used least recently is discarded to make room for the new entry.
+
+class LRUCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.entries:
+                return default
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    # This function returns the cached value for the key, calling loader to create it if it is not cached.
+    # The loader is called outside of the lock, so a slow loader does not block other lookups.
+    def get_or_set(self, key, loader):
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def __len__(self):
+        return len(self.entries)
+
+# This class is a bounded LRU cache whose entries also expire ttl seconds after they were stored.
+# It is used for data that may be changed by another worker process, where the ttl limits how long a stale entry can be used.
+
+class TTLCache(LRUCache):
+    def __init__(self, max_size, ttl):
+        super().__init__(max_size)
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        entry = super().get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return default
+        return entry[1]
+
+    def set(self, key, value):
+        super().set(key, (time.monotonic() + self.ttl, value))
+
+# This function returns the named cache for the application, creating it with max_size entries the first time it is needed.
+# If ttl is given, the entries expire after ttl seconds.
+# Caches are stored on the application so that each app (and each test) has its own caches.
+def get_cache(name, max_size, ttl=None):
+    caches = current_app.extensions.setdefault('lru_caches', {})
+    cache = caches.get(name)
+    if cache is None:
+        cache = caches.setdefault(name, TTLCache(max_size, ttl) if ttl else LRUCache(max_size))
+    return cache
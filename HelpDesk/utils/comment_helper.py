@@ -0,0 +1,29 @@
+from sqlalchemy import select, tuple_
+from ..extensions import db
+from ..models import Comment
+from .pagination_helper import encode_cursor, decode_cursor
+
+# These functions page through a ticket's comments, newest first, using keyset pagination on (date_created, id).
+# The ticket details page renders the newest page and older pages are fetched from the comments fragment endpoint,
+# so long-running tickets with hundreds of comments do not load every comment on each page view.
+# The cursor only holds the id of the oldest comment shown. Its date is looked up in the same query, so the comparison is made
+# against the stored value rather than a value that has been converted to and from the URL.
+
+COMMENTS_PER_PAGE = 20
+
+# This function returns (comments, older_cursor) where the comments are in the order they are displayed (oldest first)
+# and older_cursor is None when there are no older comments.
+# Archived tickets pass ArchivedComment as the model.
+def comment_page(ticket_id, cursor=None, per_page=COMMENTS_PER_PAGE, model=Comment):
+    query = db.session.query(model).filter(model.ticket_id == ticket_id)
+
+    before = (decode_cursor(cursor) or {}).get('before')
+    if isinstance(before, int):
+        before_date = select(model.date_created).where(model.id == before).scalar_subquery()
+        query = query.filter(tuple_(model.date_created, model.id) < tuple_(before_date, before))
+
+    rows = query.order_by(model.date_created.desc(), model.id.desc()).limit(per_page + 1).all()
+    comments = rows[:per_page]
+    older_cursor = encode_cursor({'before': comments[-1].id}) if len(rows) > per_page else None
+
+    return list(reversed(comments)), older_cursor
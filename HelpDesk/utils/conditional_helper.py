@@ -0,0 +1,57 @@
+import hashlib
+from collections import namedtuple
+from flask import make_response, request, session
+from sqlalchemy import false, func, select
+from ..extensions import db
+from ..models import Comment, Ticket
+
+# These functions implement conditional GET for the home, ticket details and users pages.
+# A validator (ETag) is calculated from a handful of cheap, indexed queries before the page is rendered.
+# If the browser already holds a copy with the same ETag, a '304 Not Modified' response is returned without rendering the page.
+# Pages are never answered with a 304 while flash messages are waiting to be displayed.
+# The Last-Modified header is sent for information only, as it cannot reflect every change (e.g. a ticket being unassigned by a demotion).
+
+Validator = namedtuple('Validator', ['etag', 'last_modified'])
+
+def build_validator(*parts, last_modified=None):
+    etag = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return Validator(etag, last_modified)
+
+# This function returns the parts of the current user that change the rendered page (e.g. the greeting and navigation bar).
+def user_state(user):
+    return (user.id, user.is_admin, user.forename, user.surname)
+
+# This function returns the latest ticket id and latest update time of the tickets the user is able to see.
+# Scalar subqueries are used so that each aggregate can be answered from an index.
+def latest_ticket_changes(user):
+    latest_id = select(func.max(Ticket.id)).where(Ticket.is_deleted == false())
+    latest_update = select(func.max(Ticket.date_updated)).where(Ticket.is_deleted == false())
+    if not user.is_admin:
+        latest_id = latest_id.where(Ticket.user_id == user.id)
+        latest_update = latest_update.where(Ticket.user_id == user.id)
+    return db.session.query(latest_id.scalar_subquery(), latest_update.scalar_subquery()).one()
+
+# This function returns the latest comment id for a ticket, or across all tickets if no ticket id is given.
+def latest_comment_id(ticket_id=None):
+    query = db.session.query(func.max(Comment.id))
+    if ticket_id is not None:
+        query = query.filter(Comment.ticket_id == ticket_id)
+    return query.scalar()
+
+# This function returns a 304 response if the browser's copy of the page is current, otherwise None.
+def not_modified(validator):
+    if request.method != 'GET' or session.get('_flashes'):
+        return None
+    if validator.etag in request.if_none_match:
+        return apply_validator(make_response('', 304), validator)
+    return None
+
+# This function adds the validator headers to a rendered page.
+# 'no-cache' allows the browser to store the page, but it must revalidate it with the server before each use.
+def apply_validator(response, validator):
+    response = make_response(response)
+    response.set_etag(validator.etag)
+    if validator.last_modified:
+        response.last_modified = validator.last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,79 @@
+import dns.resolver
+from email_validator import EmailUndeliverableError
+from email_validator.deliverability import validate_email_deliverability
+from flask import current_app
+from ..extensions import db
+from ..models import User
+from .background_helper import submit_job
+from .cache_helper import get_cache
+
+# These functions check that the domain of a registering user's email address can receive email (i.e. has MX records).
+# This needs DNS lookups, so email addresses are only checked for valid syntax within the registration form, and the
+# result of each domain's lookup is cached for EMAIL_DOMAIN_CACHE_TTL seconds. Domains listed in EMAIL_TRUSTED_DOMAINS
+# (e.g. the company's own domain) are never looked up.
+# EMAIL_DELIVERABILITY_CHECK chooses when the check is made:
+# 'inline' rejects the registration if the domain cannot receive email, 'background' creates the account straight away
+# and checks the domain afterwards (logging a warning for undeliverable addresses), and 'off' disables the check.
+# If the DNS lookup itself fails (e.g. it times out) the domain is allowed and the result is not cached.
+
+DEFAULT_CHECK = 'inline'
+DEFAULT_TRUSTED_DOMAINS = 'recruitment-software.co.uk'
+DEFAULT_TIMEOUT = 5
+DEFAULT_CACHE_TTL = 3600
+DEFAULT_CACHE_SIZE = 1024
+
+# The result cached for a domain that can receive email (None is used by the cache for a missing entry)
+DELIVERABLE = ''
+
+def deliverability_check():
+    return current_app.config.get('EMAIL_DELIVERABILITY_CHECK', DEFAULT_CHECK)
+
+def trusted_domains():
+    domains = current_app.config.get('EMAIL_TRUSTED_DOMAINS', DEFAULT_TRUSTED_DOMAINS)
+    return {domain.strip().lower() for domain in domains.split(',') if domain.strip()}
+
+# This function looks the domain up, returning an error message if it cannot receive email, DELIVERABLE if it can,
+# or None if the lookup failed.
+# A timeout or a failure of every nameserver is not raised by email_validator, which reports it with the 'unknown-deliverability' key.
+def _lookup_domain(domain):
+    try:
+        info = validate_email_deliverability(domain, domain, timeout=current_app.config.get('EMAIL_DELIVERABILITY_TIMEOUT', DEFAULT_TIMEOUT))
+    except EmailUndeliverableError as error:
+        if error.__cause__ is None or isinstance(error.__cause__, (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer)):
+            return str(error)
+        current_app.logger.warning("Unable to check whether %s can receive email: %s", domain, error)
+        return None
+    if 'unknown-deliverability' in info:
+        current_app.logger.warning("Unable to check whether %s can receive email: %s", domain, info['unknown-deliverability'])
+        return None
+    return DELIVERABLE
+
+# This function returns an error message if the domain cannot receive email, otherwise None.
+def check_email_domain(domain):
+    domain = domain.lower()
+    if domain in trusted_domains():
+        return None
+
+    config = current_app.config
+    cache = get_cache('email_domains', config.get('EMAIL_DOMAIN_CACHE_SIZE', DEFAULT_CACHE_SIZE), config.get('EMAIL_DOMAIN_CACHE_TTL', DEFAULT_CACHE_TTL))
+    result = cache.get(domain)
+    if result is None:
+        result = _lookup_domain(domain)
+        if result is None:
+            return None
+        cache.set(domain, result)
+    return result or None
+
+# This function checks a newly registered user's email domain in the background.
+def check_registered_email(user_id):
+    user = db.session.get(User, user_id)
+    if not user:
+        return
+    error = check_email_domain(user.email.rsplit('@', 1)[-1])
+    if error:
+        current_app.logger.warning("User %s registered with an email address that cannot receive email: %s", user.id, error)
+
+# This function schedules the background check of a new user's email domain, if the check is made in the background.
+def schedule_email_check(user):
+    if deliverability_check() == 'background':
+        submit_job(check_registered_email, user.id)
@@ -0,0 +1,208 @@
+import json
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, or_
+from ..extensions import db
+from ..models import TicketEvent, User
+
+# These functions fan the recorded ticket events out to the browsers connected to the live event stream (/events).
+# Each worker process has one broadcaster, which polls the ticket_event table for new events with a single query
+# every TICKET_EVENT_POLL_INTERVAL seconds and puts each event on the queue of every connected browser that may see it,
+# so the number of database queries does not depend on the number of connected browsers.
+# The stream itself never uses the database. A browser that reconnects sends the id of the last event it received,
+# and the events it missed are replayed from the broadcaster's buffer of recent events, in the order they were read.
+# Event ids are allocated when an event is inserted but become visible when its transaction commits, so under concurrent
+# writers (e.g. on Postgres) a lower id can appear after a higher one has been read. Skipped ids are therefore remembered
+# and read again by each poll for MISSING_EVENT_TIMEOUT seconds, after which they are assumed to belong to rolled back transactions.
+# Before new events are sent, the subscribers' roles are read again with one query, and a browser whose user has been
+# demoted, promoted or marked for deletion since it connected is told to reload, so it is never sent events it may no longer see.
+# When EVENT_STREAM_POLLING is disabled (e.g. during testing) no polling thread is started and poll() is called directly.
+
+DEFAULT_POLL_INTERVAL = 1
+DEFAULT_RETENTION_MINUTES = 60
+POLL_BATCH_SIZE = 500
+RECENT_EVENTS = 1000
+SUBSCRIBER_QUEUE_SIZE = 1000
+PRUNE_EVERY = 60
+MISSING_EVENT_TIMEOUT = 60
+MAX_MISSING_EVENTS = 1000
+
+# This sentinel is put on a subscriber's queue when it has missed events, so the browser reloads the page instead
+RELOAD = None
+
+class Subscription:
+    def __init__(self, user_id, is_admin):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    # Administrators see every ticket, other users only see the tickets they have reported
+    def can_see(self, event):
+        return self.is_admin or event['user_id'] == self.user_id
+
+    def put(self, item):
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    # The queued events are discarded and replaced with RELOAD
+    def reset(self):
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.put(RELOAD)
+
+class EventBroadcaster:
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.recent = deque(maxlen=RECENT_EVENTS)
+        self.last_id = None
+        # Skipped event id -> time it was first found to be missing
+        self.missing = {}
+        self.polls = 0
+        self.thread = None
+
+    # This function registers a browser. The buffered events read after the event with last_event_id are replayed to it.
+    # If that event is no longer buffered (or was never read by this process) it is told to reload.
+    def subscribe(self, user_id, is_admin, last_event_id=None):
+        subscription = Subscription(user_id, is_admin)
+        with self.lock:
+            if last_event_id is not None:
+                position = next((index for index, event in enumerate(self.recent) if event['id'] == last_event_id), None)
+                if position is not None:
+                    for event in list(self.recent)[position + 1:]:
+                        if subscription.can_see(event):
+                            subscription.put(event)
+                elif self.recent or last_event_id != self.last_id:
+                    subscription.put(RELOAD)
+            self.subscribers.add(subscription)
+        self._start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def _start(self):
+        if self.thread is not None or not self.app.config.get('EVENT_STREAM_POLLING', True):
+            return
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='helpdesk-events', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        interval = self.app.config.get('TICKET_EVENT_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+        while True:
+            try:
+                self.poll()
+            except Exception:
+                self.app.logger.exception("Polling for ticket events failed.")
+            time.sleep(interval)
+
+    # This function reads the events recorded since the last poll and sends them to the subscribers that may see them.
+    # The first poll starts from the newest event, so events recorded before the process started are not sent.
+    def poll(self):
+        with self.app.app_context():
+            if self.last_id is None:
+                self.last_id = db.session.query(func.max(TicketEvent.id)).scalar() or 0
+            self._expire_missing()
+            condition = TicketEvent.id > self.last_id
+            if self.missing:
+                condition = or_(condition, TicketEvent.id.in_(list(self.missing)))
+            rows = (
+                db.session.query(TicketEvent)
+                .filter(condition)
+                .order_by(TicketEvent.id)
+                .limit(POLL_BATCH_SIZE)
+                .all()
+            )
+            events = [
+                {'id': row.id, 'type': row.event_type, 'ticket_id': row.ticket_id, 'user_id': row.user_id, **json.loads(row.data)}
+                for row in rows
+            ]
+            checked_ids, roles = self._current_roles() if events else (set(), {})
+
+            self.polls += 1
+            if self.polls % PRUNE_EVERY == 0:
+                prune_ticket_events()
+            db.session.remove()
+
+        if not events:
+            return 0
+        self._track_missing([event['id'] for event in events])
+
+        with self.lock:
+            self.recent.extend(events)
+            for subscription in list(self.subscribers):
+                if subscription.user_id in checked_ids and roles.get(subscription.user_id) != subscription.is_admin:
+                    # The user's role has changed (or they are being deleted), so the page they are viewing is out of date
+                    self.subscribers.discard(subscription)
+                    subscription.reset()
+                    continue
+                for event in events:
+                    if subscription.can_see(event) and not subscription.put(event):
+                        # A browser that is not reading its events is told to reload rather than being sent a partial stream
+                        self.subscribers.discard(subscription)
+                        subscription.reset()
+                        break
+        return len(events)
+
+    # This function remembers the ids skipped by the events that were read, and forgets the ids that have now been read.
+    def _track_missing(self, event_ids):
+        now = time.monotonic()
+        expected = self.last_id + 1
+        for event_id in event_ids:
+            if event_id < expected:
+                self.missing.pop(event_id, None)
+                continue
+            for skipped in range(max(expected, event_id - MAX_MISSING_EVENTS), event_id):
+                self.missing[skipped] = now
+            expected = event_id + 1
+        self.last_id = expected - 1
+        while len(self.missing) > MAX_MISSING_EVENTS:
+            self.missing.pop(min(self.missing))
+
+    def _expire_missing(self):
+        cutoff = time.monotonic() - MISSING_EVENT_TIMEOUT
+        for event_id in [event_id for event_id, missed_at in self.missing.items() if missed_at <= cutoff]:
+            del self.missing[event_id]
+
+    # This function returns the ids of the subscribers' users, and user id -> is_admin for those that are not being deleted.
+    # Subscribers that connect after the query are not checked, as they loaded their user after it.
+    def _current_roles(self):
+        with self.lock:
+            user_ids = {subscription.user_id for subscription in self.subscribers}
+        if not user_ids:
+            return user_ids, {}
+        rows = db.session.query(User.id, User.is_admin).filter(User.id.in_(user_ids), User.pending_deletion.is_(False))
+        return user_ids, {row.id: row.is_admin for row in rows}
+
+# This function deletes the events that are older than TICKET_EVENT_RETENTION_MINUTES.
+def prune_ticket_events():
+    retention = timedelta(minutes=current_app.config.get('TICKET_EVENT_RETENTION_MINUTES', DEFAULT_RETENTION_MINUTES))
+    db.session.query(TicketEvent).filter(TicketEvent.date_created < datetime.now() - retention).delete(synchronize_session=False)
+    db.session.commit()
+
+# This function returns the broadcaster for the application, creating it the first time it is needed.
+def get_broadcaster():
+    app = current_app._get_current_object()
+    broadcaster = app.extensions.get('event_broadcaster')
+    if broadcaster is None:
+        broadcaster = app.extensions.setdefault('event_broadcaster', EventBroadcaster(app))
+    return broadcaster
+
+# This function formats an event for the stream. The reporter's user id is only used to choose the subscribers, so it is not sent.
+def format_event(event):
+    data = {key: value for key, value in event.items() if key != 'user_id'}
+    return f"id: {event['id']}\nevent: ticket\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+from ..extensions import db
+from ..models import Ticket, User
+
+# These functions stream the filtered ticket list as CSV or NDJSON (one JSON object per line).
+# Rows are fetched from a server-side cursor in batches with yield_per and written out as they arrive,
+# so the full result set is never held in memory and the first bytes are sent before the query has finished.
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    'id', 'ticket_type', 'subject', 'description', 'status', 'priority', 'estimated_time',
+    'assignee', 'created_by', 'updated_by', 'date_created', 'date_updated'
+]
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+# This function returns a column-only query for the export, with the assignee's name joined in rather than loaded per row.
+def export_query(model=Ticket):
+    assignee_name = (User.forename + ' ' + User.surname).label('assignee')
+    return (
+        db.session.query(
+            model.id, model.ticket_type, model.subject, model.description, model.status, model.priority,
+            model.estimated_time, assignee_name, model.created_by, model.updated_by,
+            model.date_created, model.date_updated
+        )
+        .outerjoin(User, User.id == model.assignee_id)
+    )
+
+def _serialise(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+# Spreadsheet applications treat cells starting with these characters as formulas, so they are prefixed with an apostrophe.
+def _csv_safe(value):
+    value = _serialise(value)
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        return "'" + value
+    return value
+
+def _stream(query):
+    return query.yield_per(EXPORT_BATCH_SIZE)
+
+def generate_csv(query):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return data
+
+    writer.writerow(EXPORT_COLUMNS)
+    yield flush()
+
+    for count, row in enumerate(_stream(query), start=1):
+        writer.writerow([_csv_safe(value) for value in row])
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield flush()
+    yield flush()
+
+def generate_ndjson(query):
+    lines = []
+    for row in _stream(query):
+        lines.append(json.dumps({column: _serialise(value) for column, value in zip(EXPORT_COLUMNS, row)}) + '\n')
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield ''.join(lines)
+            lines = []
+    yield ''.join(lines)
+
+EXPORT_GENERATORS = {
+    'csv': generate_csv,
+    'ndjson': generate_ndjson
+}
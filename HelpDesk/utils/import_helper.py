@@ -0,0 +1,209 @@
+import csv
+import io
+import json
+from collections import Counter, namedtuple
+from datetime import datetime
+from ..extensions import db
+from ..models import Ticket, User
+from .ticket_helper import validate_ticket_form, TICKET_TYPES, TICKET_PRIORITIES
+from .status_count_helper import TICKET_STATUSES, adjust_status_count
+from .reference_cache_helper import bump_reference_version
+from .search_helper import index_tickets_after
+
+# These functions import tickets from a CSV, JSON (an array of objects) or NDJSON file, e.g. when migrating from another help desk.
+# Each row is validated with the same rules as the create ticket page, and rows that fail validation are reported with their row number
+# rather than stopping the import. Valid rows are inserted in batches with a single executemany per batch (or COPY on Postgres)
+# and one commit per batch. The status counters and search index are updated for each batch within the same transaction.
+# Creators and assignees are given by email address and are resolved to user ids with a single lookup map.
+
+IMPORT_BATCH_SIZE = 1000
+
+IMPORT_FORMATS = ['csv', 'json', 'ndjson']
+
+IMPORT_FIELDS = [
+    'ticket_type', 'subject', 'description', 'status', 'priority', 'estimated_time',
+    'creator_email', 'assignee_email', 'date_created'
+]
+
+# The columns written for each imported ticket, in the order used by COPY.
+# COPY does not apply the model's Python side defaults, so every NOT NULL column without a server default must be listed.
+INSERT_COLUMNS = [
+    'ticket_type', 'subject', 'description', 'status', 'priority', 'estimated_time',
+    'created_by', 'updated_by', 'date_created', 'date_updated', 'user_id', 'assignee_id', 'version',
+    'is_deleted', 'deleted_at'
+]
+
+ImportResult = namedtuple('ImportResult', ['imported', 'errors'])
+
+# This function returns the import format for a file name, or None if the extension is not supported.
+def import_format_for(filename):
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    return extension if extension in IMPORT_FORMATS else None
+
+# This function yields (row_number, row, error) for each row of the file. Rows are numbered from 1, excluding the CSV header.
+def _read_rows(stream, import_format):
+    if import_format == 'csv':
+        for row_number, row in enumerate(csv.DictReader(stream), start=1):
+            yield row_number, row, None
+    elif import_format == 'ndjson':
+        row_number = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                yield row_number, json.loads(line), None
+            except ValueError:
+                yield row_number, None, 'Row is not valid JSON.'
+    else:
+        try:
+            rows = json.load(stream)
+        except ValueError:
+            yield 0, None, 'File is not valid JSON.'
+            return
+        if not isinstance(rows, list):
+            yield 0, None, 'File must contain a JSON array of tickets.'
+            return
+        for row_number, row in enumerate(rows, start=1):
+            yield row_number, row, None
+
+# This function loads every active user into a single lookup map of lower case email address -> user.
+def _user_lookup():
+    rows = (
+        db.session.query(User.id, User.email, User.forename, User.surname, User.is_admin)
+        .filter(User.pending_deletion.is_(False))
+        .all()
+    )
+    return {row.email.lower(): row for row in rows if row.email}
+
+def _value(row, field):
+    value = row.get(field)
+    if value is None:
+        return ''
+    return str(value).strip()
+
+# This function validates a row and returns (ticket values, None) or (None, error).
+def _ticket_values(row, users, now):
+    if not isinstance(row, dict):
+        return None, 'Row must be an object.'
+
+    ticket_type, subject, description, status, priority, estimated_time = (
+        _value(row, field) for field in IMPORT_FIELDS[:6]
+    )
+    error = validate_ticket_form(ticket_type, subject, description, status, priority, estimated_time)
+    if error:
+        return None, error
+    if ticket_type not in TICKET_TYPES:
+        return None, f"Unknown ticket type '{ticket_type}'."
+    if status not in TICKET_STATUSES:
+        return None, f"Unknown status '{status}'."
+    if priority not in TICKET_PRIORITIES:
+        return None, f"Unknown priority '{priority}'."
+
+    creator = users.get(_value(row, 'creator_email').lower())
+    if not creator:
+        return None, f"No user found with the creator email '{_value(row, 'creator_email')}'."
+
+    assignee_id = None
+    assignee_email = _value(row, 'assignee_email')
+    if assignee_email:
+        assignee = users.get(assignee_email.lower())
+        if not assignee or not assignee.is_admin:
+            return None, f"No administrator found with the assignee email '{assignee_email}'."
+        assignee_id = assignee.id
+
+    date_created = now
+    if _value(row, 'date_created'):
+        try:
+            date_created = datetime.fromisoformat(_value(row, 'date_created'))
+        except ValueError:
+            return None, 'Date created must be an ISO 8601 date (e.g. 2024-01-31 09:30:00).'
+
+    return {
+        'ticket_type': ticket_type,
+        'subject': subject,
+        'description': description,
+        'status': status,
+        'priority': priority,
+        'estimated_time': float(estimated_time),
+        'created_by': f"{creator.forename} {creator.surname}",
+        'updated_by': None,
+        'date_created': date_created,
+        'date_updated': None,
+        'user_id': creator.id,
+        'assignee_id': assignee_id,
+        'version': 1,
+        'is_deleted': False,
+        'deleted_at': None
+    }, None
+
+# On Postgres the batch is streamed to the server with COPY, which avoids a round trip per row.
+def _copy_batch(batch):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for values in batch:
+        writer.writerow([values[column] for column in INSERT_COLUMNS])
+    buffer.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY ticket ({', '.join(INSERT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+def _insert_batch(batch):
+    if db.session.get_bind().dialect.name == 'postgresql':
+        _copy_batch(batch)
+    else:
+        db.session.execute(Ticket.__table__.insert(), batch)
+
+# This function inserts a batch and updates the status counters, reference data version and search index in the same transaction.
+def _write_batch(batch):
+    latest_id = db.session.query(db.func.max(Ticket.id)).scalar() or 0
+    _insert_batch(batch)
+
+    for (user_id, status), count in Counter((values['user_id'], values['status']) for values in batch).items():
+        adjust_status_count(user_id, status, count)
+    if any(values['assignee_id'] for values in batch):
+        bump_reference_version()
+    index_tickets_after(latest_id)
+    db.session.commit()
+
+# This function imports the tickets from a text stream and returns the number imported and a list of (row_number, error).
+def import_tickets(stream, import_format, batch_size=IMPORT_BATCH_SIZE):
+    users = _user_lookup()
+    now = datetime.now()
+    imported = 0
+    errors = []
+    batch = []
+    batch_rows = []
+
+    def flush():
+        nonlocal imported
+        try:
+            _write_batch(batch)
+            imported += len(batch)
+        except Exception as e:
+            # A batch that the database rejects (e.g. a constraint violation) is reported without stopping the rest of the import
+            db.session.rollback()
+            errors.extend((row_number, f"Batch could not be saved: {e.__class__.__name__}.") for row_number in batch_rows)
+        batch.clear()
+        batch_rows.clear()
+
+    for row_number, row, error in _read_rows(stream, import_format):
+        values = None
+        if not error:
+            values, error = _ticket_values(row, users, now)
+        if error:
+            errors.append((row_number, error))
+            continue
+
+        batch.append(values)
+        batch_rows.append(row_number)
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+
+    return ImportResult(imported, errors)
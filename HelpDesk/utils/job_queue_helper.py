@@ -0,0 +1,124 @@
+import json
+import time
+from datetime import datetime, timedelta
+from itertools import groupby
+from flask import current_app
+from ..extensions import db
+from ..models import Job
+from .notification_helper import DELIVERY_HANDLERS
+from .user_deletion_helper import USER_DELETION, run_user_deletion_job
+
+# These functions are the worker side of the job queue, run by the 'flask run-worker' command.
+# Besides notification emails and webhooks, the worker runs user deletions (see user_deletion_helper).
+# The worker claims a batch of due jobs by marking them as running, delivers the jobs for each recipient together,
+# then deletes the delivered jobs or schedules the failed ones to be retried with exponential backoff.
+# On Postgres the batch is selected with FOR UPDATE SKIP LOCKED, so several workers can run side by side.
+# Jobs left running by a worker that stopped part way through are made due again after JOB_LOCK_TIMEOUT seconds.
+
+DEFAULT_JOB_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_RETRY_DELAY = 30
+DEFAULT_LOCK_TIMEOUT = 300
+DEFAULT_POLL_INTERVAL = 5
+
+# The handler for each kind of job, which is called with the recipient and the payloads of its jobs
+JOB_HANDLERS = {
+    **DELIVERY_HANDLERS,
+    USER_DELETION: run_user_deletion_job
+}
+
+# This function returns the delay before the next attempt, which doubles after each failed attempt.
+def retry_delay(attempts):
+    return timedelta(seconds=current_app.config.get('JOB_RETRY_DELAY', DEFAULT_RETRY_DELAY) * 2 ** (attempts - 1))
+
+# This function marks a batch of due jobs as running and returns them.
+# Without SKIP LOCKED (e.g. on SQLite) another worker may claim some of the selected jobs first, so only the jobs
+# that this call marked as running (identified by its own locked_at time) are returned.
+def claim_jobs(batch_size):
+    now = datetime.now()
+    lock_timeout = timedelta(seconds=current_app.config.get('JOB_LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT))
+    db.session.query(Job).filter(Job.status == 'running', Job.locked_at < now - lock_timeout).update(
+        {'status': 'pending', 'locked_at': None}, synchronize_session=False
+    )
+
+    job_ids = [
+        row.id for row in
+        db.session.query(Job.id)
+        .filter(Job.status == 'pending', Job.run_after <= now)
+        .order_by(Job.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ]
+    if job_ids:
+        db.session.query(Job).filter(Job.id.in_(job_ids), Job.status == 'pending').update(
+            {'status': 'running', 'locked_at': now}, synchronize_session=False
+        )
+    db.session.commit()
+
+    if not job_ids:
+        return []
+    return (
+        db.session.query(Job)
+        .filter(Job.id.in_(job_ids), Job.status == 'running', Job.locked_at == now)
+        .order_by(Job.kind, Job.recipient, Job.id)
+        .all()
+    )
+
+# This function records a failed delivery for the jobs. They are retried until JOB_MAX_ATTEMPTS is reached.
+def _fail_jobs(job_ids, error):
+    max_attempts = current_app.config.get('JOB_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    now = datetime.now()
+    for job in db.session.query(Job).filter(Job.id.in_(job_ids)):
+        job.attempts += 1
+        job.last_error = error[:1000]
+        job.locked_at = None
+        if job.attempts >= max_attempts:
+            job.status = 'failed'
+        else:
+            job.status = 'pending'
+            job.run_after = now + retry_delay(job.attempts)
+
+# This function delivers one batch of due jobs and returns the number of jobs that were processed.
+def run_jobs(batch_size=None):
+    if batch_size is None:
+        batch_size = current_app.config.get('JOB_BATCH_SIZE', DEFAULT_JOB_BATCH_SIZE)
+    jobs = claim_jobs(batch_size)
+
+    for (kind, recipient), group in groupby(jobs, key=lambda job: (job.kind, job.recipient)):
+        group = list(group)
+        job_ids = [job.id for job in group]
+        try:
+            JOB_HANDLERS[kind](recipient, [json.loads(job.payload) for job in group])
+        except Exception as error:
+            # The handler's transaction may have been aborted by a database error, so it is rolled back before the failure is recorded
+            db.session.rollback()
+            current_app.logger.warning("Delivery of %s job(s) to %s failed: %s", len(job_ids), recipient, error)
+            _fail_jobs(job_ids, f"{type(error).__name__}: {error}")
+        else:
+            db.session.query(Job).filter(Job.id.in_(job_ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+    return len(jobs)
+
+# This function runs the worker. With once=True it stops when there are no more due jobs, otherwise it polls for new jobs.
+# A polling worker keeps running if a batch fails (e.g. the database is briefly unavailable). The batch's jobs are left
+# running and are retried once JOB_LOCK_TIMEOUT has passed.
+def run_worker(once=False, poll_interval=None, batch_size=None):
+    if poll_interval is None:
+        poll_interval = current_app.config.get('WORKER_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+    processed = 0
+    while True:
+        try:
+            count = run_jobs(batch_size)
+        except Exception:
+            db.session.rollback()
+            if once:
+                raise
+            current_app.logger.exception("The worker was unable to process a batch of jobs.")
+            time.sleep(poll_interval)
+            continue
+        processed += count
+        if not count:
+            if once:
+                return processed
+            time.sleep(poll_interval)
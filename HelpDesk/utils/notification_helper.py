@@ -0,0 +1,111 @@
+import hashlib
+import hmac
+import json
+import smtplib
+import urllib.request
+from datetime import datetime
+from email.message import EmailMessage
+from flask import current_app
+from sqlalchemy import insert
+from ..extensions import db
+from ..models import Job, User
+
+# These functions describe ticket and user events and deliver them as notification emails and webhook calls.
+# The write paths only enqueue jobs within their own transaction. Delivery is done by the 'flask run-worker' process,
+# which passes every due job for the same recipient to the handler at once, so a recipient is sent one email
+# (and a webhook one request) for all of the events since the last delivery.
+# Emails are only queued when MAIL_SERVER is set and webhooks are only queued when WEBHOOK_URLS is set.
+
+EMAIL = 'email'
+WEBHOOK = 'webhook'
+
+# The events that are sent to users by email. Every event is sent to the webhooks.
+EMAIL_MESSAGES = {
+    'ticket_assigned': "Ticket #{ticket_id} '{subject}' has been assigned to you by {actor}.",
+    'ticket_commented': "{actor} commented on ticket #{ticket_id} '{subject}': {comment}",
+    'ticket_resolved': "Ticket #{ticket_id} '{subject}' has been resolved by {actor}.",
+    'user_role_changed': "{actor} has changed your role to {role}."
+}
+
+# This function queues the event for the given users (by email) and for the webhooks, within the caller's transaction.
+# Users who are being deleted are not emailed.
+def enqueue_event(event, data, recipient_ids=()):
+    payload = json.dumps({'event': event, 'date': datetime.now().isoformat(timespec='seconds'), **data})
+    recipients = []
+
+    recipient_ids = {user_id for user_id in recipient_ids if user_id is not None}
+    if event in EMAIL_MESSAGES and recipient_ids and current_app.config.get('MAIL_SERVER'):
+        emails = (
+            db.session.query(User.email)
+            .filter(User.id.in_(recipient_ids), User.pending_deletion.is_(False), User.email.isnot(None))
+            .order_by(User.id)
+        )
+        recipients += [(EMAIL, row.email) for row in emails]
+    recipients += [(WEBHOOK, url) for url in current_app.config.get('WEBHOOK_URLS') or []]
+
+    if recipients:
+        now = datetime.now()
+        db.session.execute(insert(Job), [
+            {'kind': kind, 'recipient': recipient, 'payload': payload, 'status': 'pending', 'attempts': 0, 'run_after': now}
+            for kind, recipient in recipients
+        ])
+
+# This function queues a ticket event. The user who made the change is never notified of their own change.
+def enqueue_ticket_event(event, ticket, actor, recipient_ids=(), **data):
+    enqueue_event(
+        event,
+        {'ticket_id': ticket.id, 'subject': ticket.subject, 'actor': f"{actor.forename} {actor.surname}", **data},
+        [user_id for user_id in recipient_ids if user_id != actor.id]
+    )
+
+# This function returns the events for the changes made to a ticket by an edit or a bulk update.
+# Each event is (event, recipient ids, extra data).
+def ticket_change_events(ticket, changes):
+    events = [('ticket_updated', [], {'changes': sorted(changes)})]
+    if 'assignee_id' in changes and changes['assignee_id'][1] is not None:
+        events.append(('ticket_assigned', [changes['assignee_id'][1]], {}))
+    if 'status' in changes and changes['status'][1] == 'Resolved':
+        events.append(('ticket_resolved', [ticket.user_id], {}))
+    return events
+
+def _email_body(events):
+    lines = [EMAIL_MESSAGES[event['event']].format(**event) for event in events if event['event'] in EMAIL_MESSAGES]
+    return "\n\n".join(lines) + "\n\nEclipse Software Help Desk\n"
+
+# This function sends one email to the recipient describing all of the events.
+def send_email(recipient, events):
+    config = current_app.config
+    message = EmailMessage()
+    message['From'] = config.get('MAIL_SENDER')
+    message['To'] = recipient
+    message['Subject'] = (
+        "Help Desk: 1 update" if len(events) == 1 else f"Help Desk: {len(events)} updates"
+    )
+    message.set_content(_email_body(events))
+
+    with smtplib.SMTP(config['MAIL_SERVER'], config.get('MAIL_PORT', 25), timeout=config.get('DELIVERY_TIMEOUT', 10)) as smtp:
+        if config.get('MAIL_USE_TLS'):
+            smtp.starttls()
+        if config.get('MAIL_USERNAME'):
+            smtp.login(config['MAIL_USERNAME'], config.get('MAIL_PASSWORD') or '')
+        smtp.send_message(message)
+
+# This function posts all of the events to the webhook URL in a single request.
+# When WEBHOOK_SECRET is set the body is signed with HMAC-SHA256 so the receiver can check it came from the help desk.
+# A response status of 400 or above raises an HTTPError, so the job is retried.
+def post_webhook(url, events):
+    config = current_app.config
+    body = json.dumps({'events': events}).encode()
+    headers = {'Content-Type': 'application/json'}
+    if config.get('WEBHOOK_SECRET'):
+        signature = hmac.new(config['WEBHOOK_SECRET'].encode(), body, hashlib.sha256).hexdigest()
+        headers['X-HelpDesk-Signature'] = f"sha256={signature}"
+
+    request = urllib.request.Request(url, data=body, headers=headers, method='POST')
+    with urllib.request.urlopen(request, timeout=config.get('DELIVERY_TIMEOUT', 10)) as response:
+        response.read()
+
+DELIVERY_HANDLERS = {
+    EMAIL: send_email,
+    WEBHOOK: post_webhook
+}
@@ -0,0 +1,84 @@
+import base64
+import binascii
+import json
+from sqlalchemy import func
+from ..extensions import db
+
+# These functions implement keyset (seek) pagination, which is used by the home page when HOME_PAGINATION is set to 'keyset'.
+# Rather than using OFFSET, each page is fetched by seeking past the key of the last row on the previous page, so deep pages cost the same as the first page.
+# The position is passed between requests as an opaque, URL safe cursor.
+# Instead of an exact COUNT(*), the total is capped so that large result sets are never fully counted.
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+# This function returns the decoded cursor, or None if the cursor is missing or has been tampered with.
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        return None
+    return values if isinstance(values, dict) else None
+
+# This function counts the rows of a query up to cap + 1, returning the count and whether it was capped.
+def capped_count(query, cap):
+    limited = query.order_by(None).limit(cap + 1).subquery()
+    count = db.session.query(func.count()).select_from(limited).scalar()
+    if count > cap:
+        return cap, True
+    return count, False
+
+def _integer_key(value):
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+class KeysetPage:
+    def __init__(self, items, per_page, next_cursor, prev_cursor, total, total_is_capped):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+        self.total_is_capped = total_is_capped
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+# This function returns one page of the query in descending key order.
+# A cursor of {'after': key} moves forward to older rows and {'before': key} moves back to newer rows.
+# Keys that are not integers can only come from a forged cursor, so they are ignored and the first page is returned.
+def keyset_paginate(query, key_column, cursor, per_page, total_cap):
+    position = decode_cursor(cursor) or {}
+    after = _integer_key(position.get('after'))
+    before = _integer_key(position.get('before'))
+
+    if before is not None:
+        rows = query.filter(key_column > before).order_by(key_column.asc()).limit(per_page + 1).all()
+        has_prev = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_next = True
+    else:
+        if after is not None:
+            query_page = query.filter(key_column < after)
+        else:
+            query_page = query
+        rows = query_page.order_by(key_column.desc()).limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        items = rows[:per_page]
+        has_prev = after is not None
+
+    key_name = key_column.key
+    next_cursor = encode_cursor({'after': getattr(items[-1], key_name)}) if items and has_next else None
+    prev_cursor = encode_cursor({'before': getattr(items[0], key_name)}) if items and has_prev else None
+
+    total, total_is_capped = capped_count(query, total_cap)
+
+    return KeysetPage(items, per_page, next_cursor, prev_cursor, total, total_is_capped)
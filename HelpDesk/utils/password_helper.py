@@ -0,0 +1,70 @@
+import time
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+from ..extensions import db
+
+# These functions hash and verify passwords using the algorithm and cost set by PASSWORD_HASH_METHOD,
+# in Werkzeug's method format (e.g. 'pbkdf2:sha256:600000' or 'scrypt:32768:8:1').
+# Verifying a password is the most expensive part of a login, so the cost can be tuned against the login latency budget
+# using the 'benchmark-password-hashing' command. When the method is changed, existing hashes are upgraded
+# the next time each user logs in successfully, as that is the only time the plain text password is available.
+
+DEFAULT_HASH_METHOD = f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}'
+
+# This function expands a method to the form Werkzeug stores with each hash, filling in the default cost where it is omitted.
+def normalise_method(method):
+    name, *args = method.split(':')
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    raise ValueError(f"Invalid password hash method '{method}'.")
+
+def password_hash_method():
+    return normalise_method(current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD))
+
+def hash_password(password, method=None):
+    return generate_password_hash(password, method=method or password_hash_method())
+
+# This function returns True if the stored hash was created with a different algorithm or cost to the configured one.
+def needs_rehash(password_hash):
+    stored_method = password_hash.split('$', 1)[0]
+    try:
+        return normalise_method(stored_method) != password_hash_method()
+    except ValueError:
+        return True
+
+# This function checks the user's password, upgrading the stored hash if it was created with an outdated method.
+# The upgrade is committed on its own, and a failure to save it does not prevent the login.
+def verify_password(user, password):
+    if not check_password_hash(user.password, password):
+        return False
+    if needs_rehash(user.password):
+        try:
+            user.password = hash_password(password)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception("Unable to save the upgraded password hash for user %s.", user.id)
+    return True
+
+# This function times verifying a password hashed with each method, returning (method, seconds per login) pairs.
+# A single worker verifies one password at a time, so 1 / seconds is the number of logins per second it can handle.
+def benchmark_password_hashing(methods, duration=1.0):
+    results = []
+    for method in methods:
+        method = normalise_method(method)
+        password_hash = generate_password_hash('benchmark-password', method=method)
+        rounds = 0
+        started = time.perf_counter()
+        while True:
+            check_password_hash(password_hash, 'benchmark-password')
+            rounds += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= duration:
+                break
+        results.append((method, elapsed / rounds))
+    return results
@@ -0,0 +1,32 @@
+import hashlib
+import io
+import pyotp
+import pyqrcode
+from flask import current_app
+from .cache_helper import get_cache
+
+# These functions render the QR code that is scanned with an authenticator app during 2FA setup.
+# Encoding a QR code in pure Python is slow, so the page itself no longer renders it. Instead the browser requests the image
+# from a separate endpoint, and the rendered SVG is kept in a bounded LRU cache keyed by a hash of the provisioning URI.
+# The URI contains the user's TOTP secret, so it is hashed rather than used as the cache key directly.
+
+ISSUER_NAME = "Eclipse Software Help Desk"
+DEFAULT_CACHE_SIZE = 256
+QR_CODE_SCALE = 4
+
+def provisioning_uri(user):
+    return pyotp.TOTP(user.totp_secret).provisioning_uri(name=user.email, issuer_name=ISSUER_NAME)
+
+def qr_code_key(uri):
+    return hashlib.sha256(uri.encode()).hexdigest()
+
+def render_qr_code(uri):
+    buffer = io.BytesIO()
+    pyqrcode.create(uri).svg(buffer, scale=QR_CODE_SCALE, background="#fff", xmldecl=False, svgns=True, title="QR Code")
+    return buffer.getvalue()
+
+# This function returns the cache key and the SVG image for the provisioning URI, rendering the image only if it is not cached.
+def qr_code_image(uri):
+    key = qr_code_key(uri)
+    cache = get_cache('qr_codes', current_app.config.get('QR_CODE_CACHE_SIZE', DEFAULT_CACHE_SIZE))
+    return key, cache.get_or_set(key, lambda: render_qr_code(uri))
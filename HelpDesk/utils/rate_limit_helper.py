@@ -0,0 +1,153 @@
+import math
+import threading
+import time
+from collections import deque
+from flask import current_app, g, request
+from sqlalchemy import delete, insert, select
+from ..extensions import db
+from ..models import LoginAttempt
+
+# These functions throttle login and 2FA attempts with a sliding window limiter, keyed by the client's IP address and by the account.
+# Attempts are admitted (and counted) before the password hash or 2FA code is checked, so a burst of guesses is rejected
+# without doing the expensive work, and each worker stays free for real users.
+# An attempt is only admitted if every one of its keys has had fewer than its limit of attempts in the last LOGIN_ATTEMPT_WINDOW seconds.
+# A successful login clears the account's attempts and refunds its own attempt against the IP address, so only failed attempts
+# count towards the IP address's limit and many users logging in from behind one office network are not locked out.
+# By default the attempts are held in memory by each worker process. With RATE_LIMIT_BACKEND set to 'database' they are stored
+# in the login_attempt table instead, so the limits hold across all of the workers.
+
+DEFAULT_ATTEMPTS_PER_IP = 20
+DEFAULT_ATTEMPTS_PER_ACCOUNT = 5
+DEFAULT_WINDOW = 300
+MAX_MEMORY_KEYS = 10000
+PRUNE_EVERY = 100
+
+# Attempts are held in a deque of timestamps for each key. When too many keys are held, the expired ones are discarded.
+class MemoryRateLimitBackend:
+    def __init__(self):
+        self.attempts = {}
+        self.lock = threading.Lock()
+
+    def admit(self, limits, window, now):
+        with self.lock:
+            if len(self.attempts) > MAX_MEMORY_KEYS:
+                self._prune(now - window)
+
+            retry_after = 0
+            for key, limit in limits:
+                attempts = self.attempts.get(key)
+                if not attempts:
+                    continue
+                while attempts and attempts[0] <= now - window:
+                    attempts.popleft()
+                if len(attempts) >= limit:
+                    retry_after = max(retry_after, attempts[-limit] + window - now)
+            if retry_after:
+                return retry_after
+
+            for key, _ in limits:
+                self.attempts.setdefault(key, deque()).append(now)
+            return 0
+
+    def reset(self, key):
+        with self.lock:
+            self.attempts.pop(key, None)
+
+    def refund(self, key, attempted_at):
+        with self.lock:
+            attempts = self.attempts.get(key)
+            if attempts and attempted_at in attempts:
+                attempts.remove(attempted_at)
+
+    def _prune(self, cutoff):
+        for key in [key for key, attempts in self.attempts.items() if not attempts or attempts[-1] <= cutoff]:
+            del self.attempts[key]
+
+# Attempts are stored in the login_attempt table. Each key is checked with a single indexed query for its limit-th most recent attempt.
+class DatabaseRateLimitBackend:
+    def __init__(self):
+        self.admitted = 0
+
+    def admit(self, limits, window, now):
+        cutoff = now - window
+        retry_after = 0
+        for key, limit in limits:
+            oldest_counted = db.session.execute(
+                select(LoginAttempt.attempted_at)
+                .where(LoginAttempt.key == key, LoginAttempt.attempted_at > cutoff)
+                .order_by(LoginAttempt.attempted_at.desc())
+                .offset(limit - 1)
+                .limit(1)
+            ).scalar()
+            if oldest_counted is not None:
+                retry_after = max(retry_after, oldest_counted + window - now)
+        if retry_after:
+            db.session.rollback()
+            return retry_after
+
+        db.session.execute(insert(LoginAttempt), [{'key': key, 'attempted_at': now} for key, _ in limits])
+        self.admitted += 1
+        if self.admitted % PRUNE_EVERY == 0:
+            db.session.execute(delete(LoginAttempt).where(LoginAttempt.attempted_at <= cutoff))
+        db.session.commit()
+        return 0
+
+    def reset(self, key):
+        db.session.execute(delete(LoginAttempt).where(LoginAttempt.key == key))
+        db.session.commit()
+
+    def refund(self, key, attempted_at):
+        db.session.execute(delete(LoginAttempt).where(LoginAttempt.key == key, LoginAttempt.attempted_at == attempted_at))
+        db.session.commit()
+
+RATE_LIMIT_BACKENDS = {
+    'memory': MemoryRateLimitBackend,
+    'database': DatabaseRateLimitBackend
+}
+
+# This function returns the rate limiter backend for the application, creating it the first time it is needed.
+def get_rate_limiter():
+    app = current_app._get_current_object()
+    limiter = app.extensions.get('rate_limiter')
+    if limiter is None:
+        backend = RATE_LIMIT_BACKENDS[app.config.get('RATE_LIMIT_BACKEND', 'memory')]
+        limiter = app.extensions.setdefault('rate_limiter', backend())
+    return limiter
+
+def account_key(account):
+    return f'account:{account.strip().lower()}'
+
+def ip_key():
+    return f'ip:{request.remote_addr}'
+
+# This function admits an attempt against the client's IP address and the account (an email address or 2FA user id).
+# Returns 0 if the attempt may go ahead, otherwise the number of seconds until it would be admitted.
+# A limit of 0 disables that key. The time of an admitted attempt is kept for the request, so it can be refunded if it succeeds.
+def admit_attempt(account):
+    config = current_app.config
+    limits = [
+        (ip_key(), config.get('LOGIN_ATTEMPTS_PER_IP', DEFAULT_ATTEMPTS_PER_IP)),
+        (account_key(account), config.get('LOGIN_ATTEMPTS_PER_ACCOUNT', DEFAULT_ATTEMPTS_PER_ACCOUNT))
+    ]
+    limits = [(key, limit) for key, limit in limits if limit]
+    if not limits:
+        return 0
+    window = config.get('LOGIN_ATTEMPT_WINDOW', DEFAULT_WINDOW)
+    now = time.time()
+    retry_after = get_rate_limiter().admit(limits, window, now)
+    if not retry_after:
+        g.login_attempt_at = now
+    return math.ceil(retry_after)
+
+# This function is called after a successful attempt. It clears the account's attempts and refunds this request's attempt
+# against the IP address.
+def reset_attempts(account):
+    limiter = get_rate_limiter()
+    limiter.reset(account_key(account))
+    attempted_at = g.pop('login_attempt_at', None)
+    if attempted_at is not None:
+        limiter.refund(ip_key(), attempted_at)
+
+def too_many_attempts_message(retry_after):
+    minutes = math.ceil(retry_after / 60)
+    return f"Too many attempts. Please try again in {minutes} minute{'s' if minutes != 1 else ''}."
@@ -0,0 +1,81 @@
+from collections import namedtuple
+from sqlalchemy import false
+from flask import current_app, g
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from ..extensions import db
+from ..models import CacheVersion, Ticket, User
+
+# These functions cache the administrator list (used for the assignee drop down on the ticket details page)
+# and the assignee list (used for the assignee filter on the home page) within each worker process.
+# Both lists change rarely, so rather than querying them on every page view, each request reads a single version counter from the database.
+# The lists are only reloaded when the version has been incremented by a promotion, demotion, user deletion or assignment change.
+
+ReferenceUser = namedtuple('ReferenceUser', ['id', 'forename', 'surname'])
+
+REFERENCE_DATA = 'reference_data'
+
+# This function returns the current version of a cached set of data. Every version is read with a single query,
+# at most once per request, so a request that uses several caches only reads the cache_version table once.
+def get_cache_version(name):
+    if 'cache_versions' not in g:
+        g.cache_versions = dict(db.session.query(CacheVersion.name, CacheVersion.version).all())
+    return g.cache_versions.get(name, 0)
+
+# This function increments a version within the caller's transaction, so every worker reloads the data once it is committed.
+def bump_cache_version(name):
+    dialect = db.session.get_bind().dialect.name
+    insert = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+
+    statement = insert(CacheVersion).values(name=name, version=1)
+    statement = statement.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'version': CacheVersion.version + 1}
+    )
+    db.session.execute(statement)
+    g.pop('cache_versions', None)
+
+def get_reference_version():
+    return get_cache_version(REFERENCE_DATA)
+
+def bump_reference_version():
+    bump_cache_version(REFERENCE_DATA)
+
+# The cache is stored on the application so that each app (and each test) has its own cache.
+# The version is read before the data is loaded, so cached data is never older than the version it is stored against.
+def _cached(key, loader):
+    version = get_reference_version()
+    cache = current_app.extensions.setdefault('reference_cache', {})
+    entry = cache.get(key)
+    if entry and entry[0] == version:
+        return entry[1]
+
+    value = loader()
+    cache[key] = (version, value)
+    return value
+
+def _load_administrators():
+    rows = (
+        db.session.query(User.id, User.forename, User.surname)
+        .filter(User.is_admin.is_(True), User.pending_deletion.is_(False))
+        .order_by(User.id)
+        .all()
+    )
+    return [ReferenceUser(*row) for row in rows]
+
+def _load_assignees():
+    rows = (
+        db.session.query(User.id, User.forename, User.surname)
+        .join(Ticket, Ticket.assignee_id == User.id)
+        .filter(User.pending_deletion.is_(False), Ticket.is_deleted == false())
+        .distinct()
+        .order_by(User.id)
+        .all()
+    )
+    return [ReferenceUser(*row) for row in rows]
+
+def get_administrators():
+    return _cached('administrators', _load_administrators)
+
+def get_assignees():
+    return _cached('assignees', _load_assignees)
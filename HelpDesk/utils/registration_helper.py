@@ -1,7 +1,10 @@
 from email_validator import validate_email, EmailNotValidError
 import re
+from .email_domain_helper import check_email_domain, deliverability_check
 
 # This function validates all fields on the registration page (register.html).
+# The email address is only checked for valid syntax here. Whether its domain can receive email is checked last (see email_domain_helper),
+# so the DNS lookup is only made for registrations that are otherwise valid.
 # Regex patterns were adapted from: https://stackoverflow.com/questions/2049502/regex-for-first-and-last-name
 # An upper limit of 50 characters for forename and surname was chosen to accommodate longer names while preventing excessively long inputs. 
 # I was advised to not put an upper limit on these fields by the lead developer at Eclipse Software. 
@@ -26,8 +29,8 @@ def validate_registration_form(forename, surname, email, password, password_conf
     if not email or len(email.strip()) < 1:
         return 'Email cannot be blank.'
     try:
-        valid = validate_email(email)
-        email = valid.email
+        valid = validate_email(email, check_deliverability=False)
+        email = valid.normalized
     except EmailNotValidError as e:
         return str(e)
     if user is not None:
@@ -40,4 +43,6 @@ def validate_registration_form(forename, surname, email, password, password_conf
         return 'Password must include at least one uppercase letter, one lowercase letter, one number, and one special character (@$!%*#?&).'
     if password != password_confirm:
         return 'Your passwords do not match.'
+    if deliverability_check() == 'inline':
+        return check_email_domain(valid.domain)
     return None
\ No newline at end of file
@@ -0,0 +1,151 @@
+from sqlalchemy import MetaData, inspect, literal, text
+from sqlalchemy.schema import AddConstraint, CreateTable
+from ..extensions import db
+from .search_helper import create_search_index, rebuild_search_index
+from .status_count_helper import rebuild_status_counts
+
+# These functions upgrade a database created by an earlier version of the application to the current models.
+# db.create_all() creates any missing tables, but never changes a table that already exists, so the columns, indexes and
+# foreign key actions added to existing tables since (e.g. ticket.version, ticket.is_deleted, user.pending_deletion,
+# the listing indexes and comment.ticket_id ON DELETE CASCADE) are added here. It is run by the 'flask upgrade-database' command.
+# Each step checks the current schema first, so running the upgrade again makes no further changes.
+# Missing columns are added with their model default, so existing rows are filled in (e.g. every ticket starts at version 1).
+# Postgres can change a foreign key in place. SQLite cannot alter a table's foreign keys, or make its ids AUTOINCREMENT
+# so they are never reused, so those tables are rebuilt: a copy of the table is created from the model, the rows are copied
+# across and the copy replaces the original, with foreign key enforcement switched off while the tables are swapped.
+# The status counters and the search index are rebuilt afterwards, as their tables may be new.
+
+UPGRADE_SUFFIX = '_upgrade'
+
+def _quote(connection, name):
+    return connection.dialect.identifier_preparer.quote(name)
+
+# This function returns the column's default as SQL, if it has a constant default.
+def _default_sql(connection, column):
+    default = column.default
+    if default is None or not default.is_scalar:
+        return None
+    return str(literal(default.arg, column.type).compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+
+# This function adds the model's columns that are missing from the table, returning a description of each change.
+def _add_missing_columns(connection, table):
+    existing = {column['name'] for column in inspect(connection).get_columns(table.name)}
+    changes = []
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        definition = f"{_quote(connection, column.name)} {column.type.compile(dialect=connection.dialect)}"
+        default = _default_sql(connection, column)
+        if default is not None:
+            definition += f" DEFAULT {default}"
+            if not column.nullable:
+                definition += " NOT NULL"
+        connection.execute(text(f"ALTER TABLE {_quote(connection, table.name)} ADD COLUMN {definition}"))
+        changes.append(f"Added column {table.name}.{column.name}")
+    return changes
+
+def _ondelete(value):
+    return (value or '').upper()
+
+# This function returns the model's foreign keys whose ON DELETE action differs from the table's, with the table's constraint name.
+def _changed_foreign_keys(connection, table):
+    existing = {
+        tuple(foreign_key['constrained_columns']): foreign_key
+        for foreign_key in inspect(connection).get_foreign_keys(table.name)
+    }
+    changed = []
+    for constraint in table.foreign_key_constraints:
+        current = existing.get(tuple(constraint.column_keys))
+        if current is None or _ondelete(current.get('options', {}).get('ondelete')) != _ondelete(constraint.ondelete):
+            changed.append((constraint, current and current.get('name')))
+    return changed
+
+def _missing_autoincrement(connection, table):
+    if not table.dialect_options['sqlite']['autoincrement']:
+        return False
+    sql = connection.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': table.name}).scalar()
+    return 'AUTOINCREMENT' not in (sql or '').upper()
+
+# This function rebuilds a SQLite table from its model, keeping its rows.
+# The copy is created from a metadata containing the tables it references, so its foreign keys can be compiled.
+# The table's indexes are dropped with the original table and recreated by _create_missing_indexes.
+def _rebuild_sqlite_table(connection, table):
+    metadata = MetaData()
+    for foreign_key in table.foreign_keys:
+        referenced = foreign_key.column.table
+        if referenced.name not in metadata.tables and referenced is not table:
+            referenced.to_metadata(metadata)
+    copy = table.to_metadata(metadata, name=table.name + UPGRADE_SUFFIX)
+
+    table_name = _quote(connection, table.name)
+    copy_name = _quote(connection, copy.name)
+    columns = ', '.join(_quote(connection, column.name) for column in table.columns)
+    connection.execute(text(f"DROP TABLE IF EXISTS {copy_name}"))
+    connection.execute(CreateTable(copy))
+    connection.execute(text(f"INSERT INTO {copy_name} ({columns}) SELECT {columns} FROM {table_name}"))
+    connection.execute(text(f"DROP TABLE {table_name}"))
+    connection.execute(text(f"ALTER TABLE {copy_name} RENAME TO {table_name}"))
+
+# This function brings the table's foreign keys (and on SQLite, its AUTOINCREMENT ids) in line with the model.
+def _upgrade_table_constraints(connection, table):
+    changed = _changed_foreign_keys(connection, table)
+    if connection.dialect.name == 'sqlite':
+        if changed or _missing_autoincrement(connection, table):
+            _rebuild_sqlite_table(connection, table)
+            return [f"Rebuilt table {table.name}"]
+        return []
+
+    changes = []
+    for constraint, name in changed:
+        if name:
+            connection.execute(text(f"ALTER TABLE {_quote(connection, table.name)} DROP CONSTRAINT {_quote(connection, name)}"))
+        connection.execute(AddConstraint(constraint))
+        changes.append(f"Replaced the foreign key on {table.name}.{', '.join(constraint.column_keys)}")
+    return changes
+
+def _create_missing_indexes(connection, table):
+    existing = {index['name'] for index in inspect(connection).get_indexes(table.name)}
+    changes = []
+    for index in sorted(table.indexes, key=lambda index: index.name):
+        if index.name not in existing:
+            index.create(connection)
+            changes.append(f"Created index {index.name}")
+    return changes
+
+# This function checks that no rows were left referencing a missing row while foreign keys were switched off.
+def _check_sqlite_foreign_keys(connection):
+    problems = connection.execute(text("PRAGMA foreign_key_check")).all()
+    if problems:
+        raise RuntimeError(f"The upgrade left {len(problems)} row(s) with an invalid foreign key, e.g. in table {problems[0][0]}.")
+
+# This function upgrades the database schema, returning a description of each change made.
+def upgrade_database():
+    db.session.remove()
+    changes = []
+    with db.engine.connect() as connection:
+        sqlite = connection.dialect.name == 'sqlite'
+        if sqlite:
+            connection.execute(text("PRAGMA foreign_keys=OFF"))
+        try:
+            existing_tables = set(inspect(connection).get_table_names())
+            for table in db.metadata.sorted_tables:
+                if table.name not in existing_tables:
+                    continue
+                changes += _add_missing_columns(connection, table)
+                changes += _upgrade_table_constraints(connection, table)
+                changes += _create_missing_indexes(connection, table)
+            if sqlite:
+                _check_sqlite_foreign_keys(connection)
+            connection.commit()
+        finally:
+            if sqlite:
+                connection.execute(text("PRAGMA foreign_keys=ON"))
+
+    missing_tables = [table.name for table in db.metadata.sorted_tables if table.name not in existing_tables]
+    db.create_all()
+    create_search_index()
+    changes += [f"Created table {name}" for name in missing_tables]
+
+    rebuild_status_counts()
+    rebuild_search_index()
+    return changes
@@ -0,0 +1,124 @@
+import re
+from sqlalchemy import Float, Integer, bindparam, text
+from ..extensions import db
+from ..models import Comment
+
+# These functions maintain and query the full-text search index over ticket subjects, descriptions and comments.
+# SQLite uses an FTS5 virtual table and Postgres uses a table with a weighted tsvector column and a GIN index.
+# Each ticket and each comment is a separate document so that adding a comment only indexes the new comment.
+# Ticket documents use the ticket id as their document id and comment documents use the negated comment id.
+# Subject matches are weighted above description and comment matches when ranking results.
+# Archived tickets and comments keep their ids, so their documents stay in the index and are found by searching the archive.
+
+SQLITE_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS ticket_search USING fts5(ticket_id UNINDEXED, subject, body, tokenize='porter unicode61')",
+    "INSERT INTO ticket_search(ticket_search, rank) VALUES ('rank', 'bm25(0.0, 10.0, 1.0)')"
+]
+
+POSTGRES_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS ticket_search (
+        doc_id BIGINT PRIMARY KEY,
+        ticket_id INTEGER NOT NULL,
+        subject TEXT,
+        body TEXT,
+        document TSVECTOR GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(subject, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(body, '')), 'B')
+        ) STORED
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_ticket_search_document ON ticket_search USING GIN (document)",
+    "CREATE INDEX IF NOT EXISTS ix_ticket_search_ticket_id ON ticket_search (ticket_id)"
+]
+
+def _is_postgres():
+    return db.session.get_bind().dialect.name == 'postgresql'
+
+# This function creates the search index if it does not already exist. It is called when the database tables are created.
+def create_search_index():
+    statements = POSTGRES_SCHEMA if _is_postgres() else SQLITE_SCHEMA
+    for statement in statements:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+def _doc_column():
+    return 'doc_id' if _is_postgres() else 'rowid'
+
+def _delete_documents(doc_ids):
+    if not doc_ids:
+        return
+    statement = text(f"DELETE FROM ticket_search WHERE {_doc_column()} IN :doc_ids")
+    db.session.execute(statement.bindparams(bindparam('doc_ids', expanding=True)), {'doc_ids': list(doc_ids)})
+
+def _insert_document(doc_id, ticket_id, subject, body):
+    _delete_documents([doc_id])
+    db.session.execute(
+        text(f"INSERT INTO ticket_search ({_doc_column()}, ticket_id, subject, body) VALUES (:doc_id, :ticket_id, :subject, :body)"),
+        {'doc_id': doc_id, 'ticket_id': ticket_id, 'subject': subject, 'body': body}
+    )
+
+# The following functions are called from the ticket write paths within the caller's transaction.
+# New tickets and comments must have been flushed so that they have an id.
+def index_ticket(ticket):
+    _insert_document(ticket.id, ticket.id, ticket.subject, ticket.description)
+
+def index_comment(comment):
+    _insert_document(-comment.id, comment.ticket_id, None, comment.comment_text)
+
+# This function indexes the tickets with an id greater than ticket_id that are not already indexed, e.g. after a bulk import.
+def index_tickets_after(ticket_id):
+    doc_column = _doc_column()
+    db.session.execute(text(
+        f"INSERT INTO ticket_search ({doc_column}, ticket_id, subject, body) "
+        "SELECT id, id, subject, description FROM ticket "
+        f"WHERE id > :ticket_id AND NOT EXISTS (SELECT 1 FROM ticket_search WHERE {doc_column} = ticket.id)"
+    ), {'ticket_id': ticket_id})
+
+# This function must be called before the tickets' comments are deleted, as their ids are needed to find their documents.
+def remove_tickets_from_search(ticket_ids):
+    comment_ids = [row.id for row in db.session.query(Comment.id).filter(Comment.ticket_id.in_(ticket_ids))]
+    _delete_documents(list(ticket_ids) + [-comment_id for comment_id in comment_ids])
+
+# This function rebuilds the whole index from the ticket and comment tables and their archive tables.
+# It is used by the 'flask rebuild-search-index' command.
+def rebuild_search_index():
+    doc_column = _doc_column()
+    db.session.execute(text("DELETE FROM ticket_search"))
+    for ticket_table, comment_table in [('ticket', 'comment'), ('archived_ticket', 'archived_comment')]:
+        db.session.execute(text(
+            f"INSERT INTO ticket_search ({doc_column}, ticket_id, subject, body) "
+            f"SELECT id, id, subject, description FROM {ticket_table}"
+        ))
+        db.session.execute(text(
+            f"INSERT INTO ticket_search ({doc_column}, ticket_id, subject, body) "
+            f"SELECT -id, ticket_id, NULL, comment_text FROM {comment_table} WHERE ticket_id IS NOT NULL"
+        ))
+    db.session.commit()
+    return db.session.execute(text("SELECT COUNT(*) FROM ticket_search")).scalar()
+
+# This function converts the search box text into an FTS5 query where every word must match.
+# Each word is quoted so that punctuation typed by the user (e.g. 'PLC-34087') cannot produce an FTS5 syntax error.
+def _sqlite_match_query(search):
+    words = re.findall(r"\w+", search)
+    return " ".join(f'"{word}"' for word in words) or None
+
+# This function returns a subquery of (ticket_id, rank) for the tickets matching the search, where a lower rank is a better match.
+# None is returned when the search does not contain any words.
+def search_results(search):
+    if _is_postgres():
+        if not search or not search.strip():
+            return None
+        statement = text(
+            "SELECT ticket_id, MIN(-ts_rank(document, query)) AS rank "
+            "FROM ticket_search, websearch_to_tsquery('english', :search) AS query "
+            "WHERE document @@ query GROUP BY ticket_id"
+        ).bindparams(search=search)
+    else:
+        match_query = _sqlite_match_query(search or '')
+        if not match_query:
+            return None
+        statement = text(
+            "SELECT ticket_id, MIN(rank) AS rank FROM ticket_search "
+            "WHERE ticket_search MATCH :search GROUP BY ticket_id"
+        ).bindparams(search=match_query)
+
+    return statement.columns(ticket_id=Integer, rank=Float).subquery('search_results')
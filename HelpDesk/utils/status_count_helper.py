@@ -0,0 +1,144 @@
+from flask import current_app
+from sqlalchemy import false, func
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from ..extensions import db
+from ..models import Ticket, TicketStatusCount, ArchivedTicket, ArchivedStatusCount
+
+# These functions provide the ticket counts per status that are displayed on the home page dashboard widgets.
+# When USE_STATUS_COUNTERS is enabled the counts are read from the ticket_status_count table, which the ticket and user write paths keep up to date.
+# Otherwise the counts are calculated with a single GROUP BY query rather than one COUNT query per status.
+# Archived tickets are still counted, so archiving a ticket does not change the counts. They are not aggregated on each request,
+# as the archive only grows: the archive's counts are kept in the archived_status_count table when tickets are archived and unarchived.
+
+TICKET_STATUSES = ['Open', 'In Progress', 'On Hold / Pending', 'Resolved', 'Closed']
+GLOBAL_SCOPE = 0
+
+def counters_enabled():
+    return current_app.config.get('USE_STATUS_COUNTERS', False)
+
+# This function returns a dictionary of status -> ticket count for the tickets the user is able to see.
+# Administrators see counts for all tickets, non-administrators only see counts for the tickets they have reported.
+def get_status_counts(user):
+    counts = dict.fromkeys(TICKET_STATUSES, 0)
+
+    if counters_enabled():
+        scope_id = GLOBAL_SCOPE if user.is_admin else user.id
+        rows = (
+            db.session.query(TicketStatusCount.status, TicketStatusCount.ticket_count)
+            .filter(TicketStatusCount.scope_id == scope_id)
+            .all()
+        )
+    else:
+        query = db.session.query(Ticket.status, func.count(Ticket.id)).filter(Ticket.is_deleted == false())
+        if not user.is_admin:
+            query = query.filter(Ticket.user_id == user.id)
+        archived = (
+            db.session.query(ArchivedStatusCount.status, ArchivedStatusCount.ticket_count)
+            .filter(ArchivedStatusCount.scope_id == (GLOBAL_SCOPE if user.is_admin else user.id))
+        )
+        rows = query.group_by(Ticket.status).union_all(archived).all()
+
+    for status, count in rows:
+        if status in counts:
+            counts[status] += count
+    return counts
+
+# This function adds delta to the global count and the reporting user's count for a status in the given counts table.
+# An upsert is used so that two requests creating the first ticket of a status for a user do not conflict.
+def _upsert_count(model, user_id, status, delta):
+    dialect = db.session.get_bind().dialect.name
+    insert = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+
+    scope_ids = [GLOBAL_SCOPE] if user_id is None else [GLOBAL_SCOPE, user_id]
+    for scope_id in scope_ids:
+        statement = insert(model).values(scope_id=scope_id, status=status, ticket_count=delta)
+        statement = statement.on_conflict_do_update(
+            index_elements=['scope_id', 'status'],
+            set_={'ticket_count': model.ticket_count + delta}
+        )
+        db.session.execute(statement)
+
+# This function adds delta to the global count and the reporting user's count for a status.
+# It is executed within the caller's transaction so the counters are committed alongside the ticket change.
+def adjust_status_count(user_id, status, delta):
+    if not counters_enabled() or not delta:
+        return
+    _upsert_count(TicketStatusCount, user_id, status, delta)
+
+# This function adds the tickets to (or with a sign of -1, removes them from) the archive's counts, within the caller's transaction.
+# The archive's counts are always maintained, as they are read by the GROUP BY fallback as well.
+def adjust_archived_status_counts(ticket_ids, sign=1):
+    if not ticket_ids:
+        return
+    rows = (
+        db.session.query(Ticket.user_id, Ticket.status, func.count(Ticket.id))
+        .filter(Ticket.id.in_(ticket_ids))
+        .group_by(Ticket.user_id, Ticket.status)
+        .all()
+    )
+    for user_id, status, count in rows:
+        _upsert_count(ArchivedStatusCount, user_id, status, sign * count)
+
+# This function moves a ticket from one status to another within the counters.
+def move_status_count(user_id, old_status, new_status):
+    if old_status == new_status:
+        return
+    adjust_status_count(user_id, old_status, -1)
+    adjust_status_count(user_id, new_status, 1)
+
+# This function removes the per-user counters of a deleted user.
+# The global counters are unchanged because the user's tickets are kept with their user_id set to NULL.
+# Soft deleted tickets are not counted, so deleting and restoring a ticket adjusts the counters.
+def remove_user_status_counts(user_id):
+    db.session.query(ArchivedStatusCount).filter(ArchivedStatusCount.scope_id == user_id).delete(synchronize_session=False)
+    if not counters_enabled():
+        return
+    db.session.query(TicketStatusCount).filter(TicketStatusCount.scope_id == user_id).delete(synchronize_session=False)
+
+def _expected_counts(rows):
+    expected = {}
+    for user_id, status, count in rows:
+        expected[(GLOBAL_SCOPE, status)] = expected.get((GLOBAL_SCOPE, status), 0) + count
+        if user_id is not None:
+            expected[(user_id, status)] = expected.get((user_id, status), 0) + count
+    return expected
+
+# This function replaces the rows of a counts table with the expected counts and returns the number of counters that were incorrect.
+def _replace_counts(model, expected):
+    current = {
+        (row.scope_id, row.status): row.ticket_count
+        for row in db.session.query(model).all()
+    }
+    incorrect = sum(
+        1 for key in set(expected) | set(current)
+        if expected.get(key, 0) != current.get(key, 0)
+    )
+
+    db.session.query(model).delete(synchronize_session=False)
+    db.session.add_all([
+        model(scope_id=scope_id, status=status, ticket_count=count)
+        for (scope_id, status), count in expected.items()
+    ])
+    return incorrect
+
+# This function rebuilds every counter (including the archive's counts) from the ticket and archive tables
+# and returns the number of counters that were incorrect.
+# It is used by the 'flask rebuild-status-counts' command as a consistency check.
+def rebuild_status_counts():
+    live_rows = (
+        db.session.query(Ticket.user_id, Ticket.status, func.count(Ticket.id))
+        .filter(Ticket.is_deleted == false())
+        .group_by(Ticket.user_id, Ticket.status)
+        .all()
+    )
+    archived_rows = (
+        db.session.query(ArchivedTicket.user_id, ArchivedTicket.status, func.count(ArchivedTicket.id))
+        .group_by(ArchivedTicket.user_id, ArchivedTicket.status)
+        .all()
+    )
+
+    incorrect = _replace_counts(TicketStatusCount, _expected_counts(live_rows + archived_rows))
+    incorrect += _replace_counts(ArchivedStatusCount, _expected_counts(archived_rows))
+    db.session.commit()
+    return incorrect
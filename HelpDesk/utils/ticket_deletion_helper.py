@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import false, true
+from ..extensions import db
+from ..models import Ticket
+from .status_count_helper import adjust_status_count
+from .reference_cache_helper import bump_reference_version
+from .search_helper import remove_tickets_from_search
+
+# These functions soft delete, restore and purge tickets.
+# Deleting a ticket is a single UPDATE that flags it as deleted, which hides it everywhere and allows it to be restored.
+# Deleted tickets are permanently removed later by the 'flask purge-deleted-tickets' command (e.g. run nightly by cron),
+# which deletes them in bounded batches with a commit per batch. Their comments and history are removed by the
+# ON DELETE CASCADE foreign keys rather than by separate deletes.
+
+DEFAULT_PURGE_BATCH_SIZE = 500
+DEFAULT_PURGE_AFTER_DAYS = 30
+
+# This function flags the ticket as deleted within the caller's transaction.
+def soft_delete_ticket(ticket):
+    db.session.query(Ticket).filter(Ticket.id == ticket.id).update({
+        'is_deleted': True,
+        'deleted_at': datetime.now(),
+        'version': Ticket.version + 1
+    }, synchronize_session=False)
+    adjust_status_count(ticket.user_id, ticket.status, -1)
+    if ticket.assignee_id is not None:
+        bump_reference_version()
+
+# This function restores a soft deleted ticket within the caller's transaction.
+def restore_ticket(ticket):
+    db.session.query(Ticket).filter(Ticket.id == ticket.id).update({
+        'is_deleted': False,
+        'deleted_at': None,
+        'version': Ticket.version + 1
+    }, synchronize_session=False)
+    adjust_status_count(ticket.user_id, ticket.status, 1)
+    if ticket.assignee_id is not None:
+        bump_reference_version()
+
+# This function permanently deletes the tickets that were deleted more than older_than ago and returns the number deleted.
+def purge_deleted_tickets(older_than=None, batch_size=None):
+    if older_than is None:
+        older_than = timedelta(days=current_app.config.get('PURGE_DELETED_TICKETS_AFTER_DAYS', DEFAULT_PURGE_AFTER_DAYS))
+    if batch_size is None:
+        batch_size = current_app.config.get('PURGE_BATCH_SIZE', DEFAULT_PURGE_BATCH_SIZE)
+    cutoff = datetime.now() - older_than
+    purged = 0
+
+    while True:
+        ticket_ids = [
+            row.id for row in
+            db.session.query(Ticket.id)
+            .filter(Ticket.is_deleted == true(), Ticket.deleted_at < cutoff)
+            .order_by(Ticket.deleted_at, Ticket.id)
+            .limit(batch_size)
+        ]
+        if not ticket_ids:
+            break
+
+        remove_tickets_from_search(ticket_ids)
+        db.session.query(Ticket).filter(Ticket.id.in_(ticket_ids)).delete(synchronize_session=False)
+        db.session.commit()
+        purged += len(ticket_ids)
+
+    return purged
+
+# This function returns the ticket if it exists and has not been deleted.
+def get_live_ticket(ticket_id):
+    return db.session.query(Ticket).filter(Ticket.id == ticket_id, Ticket.is_deleted == false()).first()
@@ -0,0 +1,69 @@
+import json
+from datetime import datetime
+from sqlalchemy import insert
+from ..extensions import db
+from ..models import TicketEvent
+from .reference_cache_helper import get_administrators
+
+# These functions record the ticket changes that are pushed to the home page over the live event stream.
+# Events are compact: they only carry the ticket id, the reporter (used to decide who may see the event) and the
+# fields the home page needs to patch the ticket's row and the dashboard counts in place.
+# They are recorded within the caller's transaction, so an event is only published if the change is committed.
+
+EVENT_TYPES = ['created', 'updated', 'commented', 'deleted']
+
+# The ticket fields shown in the home page table, which are sent with 'updated' events when they change
+ROW_FIELDS = ['ticket_type', 'subject', 'status', 'priority', 'estimated_time', 'assignee_id']
+
+def _assignee_name(assignee_id):
+    if assignee_id is None:
+        return None
+    for administrator in get_administrators():
+        if administrator.id == assignee_id:
+            return f"{administrator.forename} {administrator.surname}"
+    return f"User #{assignee_id}"
+
+# This function returns the data for an 'updated' event from the ticket's changes ({field: (old value, new value)}).
+def _changed_fields(changes):
+    data = {}
+    for field, (old_value, new_value) in changes.items():
+        if field == 'assignee_id':
+            data['assignee'] = _assignee_name(new_value)
+        elif field in ROW_FIELDS:
+            data[field] = new_value
+    if 'status' in changes:
+        data['old_status'] = changes['status'][0]
+    return data
+
+# This function records events for several tickets with a single INSERT.
+# Each event is (event type, ticket, data), where the ticket has id and user_id attributes.
+def record_ticket_events(events):
+    if not events:
+        return
+    now = datetime.now()
+    db.session.execute(insert(TicketEvent), [
+        {
+            'event_type': event_type,
+            'ticket_id': ticket.id,
+            'user_id': ticket.user_id,
+            'data': json.dumps(data),
+            'date_created': now
+        }
+        for event_type, ticket, data in events
+    ])
+
+def record_ticket_created(ticket):
+    record_ticket_events([('created', ticket, {'status': ticket.status})])
+
+def record_ticket_updated(ticket, changes):
+    record_ticket_events([('updated', ticket, _changed_fields(changes))])
+
+def record_ticket_commented(ticket):
+    record_ticket_events([('commented', ticket, {})])
+
+def record_ticket_deleted(ticket):
+    record_ticket_events([('deleted', ticket, {'status': ticket.status})])
+
+# This function records the 'updated' events of a bulk update, where changes maps each ticket to its changes.
+def record_tickets_updated(changes):
+    record_ticket_events([('updated', ticket, _changed_fields(ticket_changes)) for ticket, ticket_changes in changes.items()])
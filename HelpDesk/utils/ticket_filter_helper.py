@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+from sqlalchemy import false
+from ..models import Ticket, ArchivedTicket
+
+# These functions build the filtered ticket query used by the home page.
+# Non-administrators are restricted to the tickets they have reported.
+# Date filters are applied as half-open ranges on Ticket.date_created (start <= date_created < end) so that they can be served by an index,
+# rather than wrapping the column in a DATE() function.
+
+# 'q' is the full-text search, which is applied separately by the search helper as it also determines the order of the results.
+# 'archived' lists the archived tickets instead of the current tickets. The same filters apply to both.
+FILTER_FIELDS = ['q', 'ticket_type', 'status', 'priority', 'assignee', 'date_created', 'archived']
+
+# This function returns the model that the filters list, which is ArchivedTicket when the archive has been requested.
+def ticket_model(filters):
+    return ArchivedTicket if filters.get('archived') else Ticket
+
+# This function returns the filters that have been provided in the request arguments.
+def get_ticket_filters(args):
+    return {field: args.get(field) for field in FILTER_FIELDS if args.get(field)}
+
+# This function returns the (start, end) range for a date created filter, or None if the filter is not recognised.
+def date_created_range(date_filter, now=None):
+    now = now or datetime.now()
+    start_of_today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    start_of_tomorrow = start_of_today + timedelta(days=1)
+
+    if date_filter == 'Today':
+        return start_of_today, start_of_tomorrow
+    if date_filter == 'Last 7 Days':
+        return now - timedelta(days=7), start_of_tomorrow
+    if date_filter == 'This Month':
+        start_of_month = start_of_today.replace(day=1)
+        start_of_next_month = (start_of_month + timedelta(days=32)).replace(day=1)
+        return start_of_month, start_of_next_month
+    return None
+
+# This function restricts the query to the tickets the user is able to see. Soft deleted tickets are never shown.
+def scope_tickets(query, user, model=Ticket):
+    if model is Ticket:
+        query = query.filter(Ticket.is_deleted == false())
+    if not user.is_admin:
+        query = query.filter(model.user_id == user.id)
+    return query
+
+# This function applies the home page filters to a ticket (or archived ticket) query.
+def filter_tickets(query, filters, model=Ticket):
+    if filters.get('ticket_type'):
+        query = query.filter(model.ticket_type == filters['ticket_type'])
+    if filters.get('status'):
+        query = query.filter(model.status == filters['status'])
+    if filters.get('priority'):
+        query = query.filter(model.priority == filters['priority'])
+    if filters.get('assignee'):
+        if filters['assignee'].lower() == 'unassigned':
+            query = query.filter(model.assignee_id.is_(None))
+        else:
+            try:
+                query = query.filter(model.assignee_id == int(filters['assignee']))
+            except ValueError:
+                pass
+    if filters.get('date_created'):
+        date_range = date_created_range(filters['date_created'])
+        if date_range:
+            start, end = date_range
+            query = query.filter(model.date_created >= start, model.date_created < end)
+    return query
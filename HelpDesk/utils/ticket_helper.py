@@ -1,3 +1,7 @@
+# The options offered by the ticket type and priority drop downs
+TICKET_TYPES = ['Support Request', 'Feature Request', 'Bug Report']
+TICKET_PRIORITIES = ['Low', 'Normal', 'High']
+
 # This function validates all fields on the ticket details page and the create ticket page (create_ticket.html and ticket_details.html).
 
 def validate_ticket_form(ticket_type, subject, description, status, priority, estimated_time):
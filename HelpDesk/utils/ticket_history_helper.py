@@ -0,0 +1,74 @@
+from ..extensions import db
+from ..models import TicketHistory
+
+# These functions compare a submitted ticket form with the loaded ticket and record the fields that have changed.
+# Saving an unchanged form therefore makes no writes at all, and each edit appends one history row per changed field.
+
+HISTORY_LIMIT = 50
+
+# The fields that can be edited on the ticket details page, with the labels shown in the ticket history
+TRACKED_FIELDS = {
+    'ticket_type': 'Ticket Type',
+    'subject': 'Subject',
+    'description': 'Description',
+    'status': 'Status',
+    'priority': 'Priority',
+    'estimated_time': 'Estimated Time',
+    'assignee_id': 'Assignee'
+}
+
+# Fields whose old and new values are not stored in the history
+UNRECORDED_VALUE_FIELDS = {'description'}
+
+# This function converts the submitted form values to the types stored on the ticket.
+# The form must already have been validated by validate_ticket_form.
+def normalise_ticket_form(ticket_type, subject, description, status, priority, estimated_time, assignee_id):
+    return {
+        'ticket_type': ticket_type,
+        'subject': subject,
+        'description': description,
+        'status': status,
+        'priority': priority,
+        'estimated_time': float(estimated_time),
+        'assignee_id': int(assignee_id) if assignee_id and assignee_id.isdigit() else None
+    }
+
+# This function returns {field: (old_value, new_value)} for the fields that differ from the ticket.
+def ticket_changes(ticket, values):
+    changes = {}
+    for field in TRACKED_FIELDS:
+        old_value = getattr(ticket, field)
+        if old_value != values[field]:
+            changes[field] = (old_value, values[field])
+    return changes
+
+def _display_value(field, value, assignee_names):
+    if field == 'assignee_id':
+        return assignee_names.get(value, f"User #{value}") if value is not None else 'Unassigned'
+    if field == 'estimated_time':
+        return f"{value:.2f}"
+    return value
+
+# This function adds a history row for each change within the caller's transaction.
+# Assignees are recorded by name, using the cached administrator list, so the history does not need to join to the user table.
+def record_ticket_changes(ticket, changes, changed_by, administrators):
+    assignee_names = {user.id: f"{user.forename} {user.surname}" for user in administrators}
+    for field, (old_value, new_value) in changes.items():
+        record_values = field not in UNRECORDED_VALUE_FIELDS
+        db.session.add(TicketHistory(
+            ticket_id=ticket.id,
+            field=field,
+            old_value=_display_value(field, old_value, assignee_names) if record_values else None,
+            new_value=_display_value(field, new_value, assignee_names) if record_values else None,
+            changed_by=changed_by
+        ))
+
+# This function returns the newest history rows for the ticket in a single indexed query.
+def ticket_history(ticket_id, limit=HISTORY_LIMIT, model=TicketHistory):
+    return (
+        db.session.query(model)
+        .filter(model.ticket_id == ticket_id)
+        .order_by(model.id.desc())
+        .limit(limit)
+        .all()
+    )
@@ -0,0 +1,67 @@
+from flask import current_app
+from flask_login import UserMixin
+from ..extensions import db
+from ..models import User
+from .cache_helper import get_cache
+from .reference_cache_helper import bump_cache_version, get_cache_version
+
+# These functions load the logged in user for Flask-Login without a database query on most requests.
+# Only the fields needed for authorisation and the navigation bar are cached, in a bounded cache held by each worker process,
+# and entries expire after USER_CACHE_TTL seconds. Flask-Login already keeps the loaded user for the rest of the request.
+# Each entry is stored with the version of the cached users (read with the other cache versions, once per request).
+# The version is incremented when a user's role changes, they are marked for deletion or they set up 2FA, so every worker
+# stops using its entries as soon as the change is committed. Setting USER_CACHE_TTL to 0 disables the cache.
+
+DEFAULT_TTL = 30
+DEFAULT_CACHE_SIZE = 1024
+
+USER_DATA = 'users'
+
+IDENTITY_COLUMNS = (User.id, User.forename, User.surname, User.email, User.is_admin)
+
+# This class stands in for the User model as current_user. Any field that is not cached is read from the full User,
+# which is only loaded from the database the first time such a field is used.
+class CachedUser(UserMixin):
+    def __init__(self, identity):
+        self.id, self.forename, self.surname, self.email, self.is_admin = identity
+        self._user = None
+
+    @property
+    def user(self):
+        if self._user is None:
+            self._user = db.session.get(User, self.id)
+        return self._user
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+def _user_cache():
+    config = current_app.config
+    return get_cache('users', config.get('USER_CACHE_SIZE', DEFAULT_CACHE_SIZE), config.get('USER_CACHE_TTL', DEFAULT_TTL))
+
+# Users that are being deleted are not loaded, so they are logged out
+def _load_identity(user_id):
+    row = db.session.query(*IDENTITY_COLUMNS).filter(User.id == user_id, User.pending_deletion.is_(False)).first()
+    return tuple(row) if row else None
+
+# The version is read before the user is loaded, so an entry is never older than the version it is stored against.
+def load_cached_user(user_id):
+    if not current_app.config.get('USER_CACHE_TTL', DEFAULT_TTL):
+        identity = _load_identity(user_id)
+        return CachedUser(identity) if identity else None
+
+    version = get_cache_version(USER_DATA)
+    cache = _user_cache()
+    entry = cache.get(user_id)
+    if entry is None or entry[0] != version:
+        entry = (version, _load_identity(user_id))
+        cache.set(user_id, entry)
+    return CachedUser(entry[1]) if entry[1] else None
+
+# This function invalidates the cached users in every worker. It must be called within the transaction that changes the users,
+# so the new version is committed with the change.
+def invalidate_users(user_ids):
+    if user_ids:
+        bump_cache_version(USER_DATA)
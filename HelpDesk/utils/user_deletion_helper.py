@@ -0,0 +1,132 @@
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import String, cast, func, insert, select, update
+from ..extensions import db
+from ..models import Comment, Ticket, User, ArchivedTicket, ArchivedComment, Job
+from .reference_cache_helper import bump_reference_version
+from .status_count_helper import remove_user_status_counts
+from .user_cache_helper import invalidate_users
+
+# These functions delete a user in the background.
+# The user is marked as pending deletion straight away, which logs them out and hides them from the assignee lists.
+# Their tickets and comments are then detached in bounded batches with a commit per batch, so locks on the ticket
+# and comment tables are only held briefly and the web request does not wait for the deletion to finish.
+# Progress is recorded on the user so that it can be shown on the users page.
+# The deletion is queued as a job (see job_queue_helper) in the same transaction that marks the user, and is run by the
+# 'flask run-worker' process, so a deletion that is interrupted by a restart is picked up again rather than left pending.
+# When BACKGROUND_JOBS_SYNC is enabled (e.g. during testing) the deletion runs immediately within the request instead.
+
+DEFAULT_BATCH_SIZE = 1000
+
+# The job kind of a user deletion. The job's recipient is the id of the user being deleted.
+USER_DELETION = 'user_deletion'
+
+# The columns that reference the user and are set to NULL before the user is deleted
+DETACH_COLUMNS = [
+    (Ticket, Ticket.user_id),
+    (Ticket, Ticket.assignee_id),
+    (Comment, Comment.user_id),
+    (ArchivedTicket, ArchivedTicket.user_id),
+    (ArchivedTicket, ArchivedTicket.assignee_id),
+    (ArchivedComment, ArchivedComment.user_id)
+]
+
+def _batch_size():
+    return current_app.config.get('USER_DELETION_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+def _rows_to_detach(user_id):
+    return sum(
+        db.session.query(func.count()).filter(column == user_id).scalar()
+        for model, column in DETACH_COLUMNS
+    )
+
+def _run_jobs_inline():
+    return current_app.config.get('BACKGROUND_JOBS_SYNC', False)
+
+# This function queues the deletion jobs for the users within the caller's transaction.
+def _enqueue_user_deletions(user_ids):
+    now = datetime.now()
+    db.session.execute(insert(Job), [
+        {'kind': USER_DELETION, 'recipient': str(user_id), 'payload': '{}', 'status': 'pending', 'attempts': 0, 'run_after': now}
+        for user_id in user_ids
+    ])
+
+# This function marks the user as pending deletion and queues the deletion job.
+def start_user_deletion(user):
+    user.pending_deletion = True
+    user.deletion_progress = 0
+    user.deletion_total = _rows_to_detach(user.id)
+    bump_reference_version()
+    invalidate_users([user.id])
+    if not _run_jobs_inline():
+        _enqueue_user_deletions([user.id])
+    db.session.commit()
+    if _run_jobs_inline():
+        run_user_deletion(user.id)
+
+# This function detaches one batch of rows and returns the number of rows detached.
+# The batch is selected by primary key so that each UPDATE only touches (and locks) the rows in the batch.
+def _detach_batch(model, column, user_id, batch_size):
+    batch = select(model.id).where(column == user_id).limit(batch_size).scalar_subquery()
+    values = {column.key: None}
+    if column is Ticket.assignee_id:
+        # Unassigning a ticket is an edit, so editors holding an older copy of the ticket are told about it
+        values['version'] = Ticket.version + 1
+    result = db.session.execute(
+        update(model).where(model.id.in_(batch)).values(values),
+        execution_options={'synchronize_session': False}
+    )
+    return result.rowcount
+
+# This function is the deletion job. It is safe to run again for a user whose deletion was interrupted.
+def run_user_deletion(user_id):
+    user = db.session.get(User, user_id)
+    if not user or not user.pending_deletion:
+        return
+
+    batch_size = _batch_size()
+    for model, column in DETACH_COLUMNS:
+        while True:
+            detached = _detach_batch(model, column, user_id, batch_size)
+            if not detached:
+                break
+            db.session.query(User).filter(User.id == user_id).update(
+                {'deletion_progress': User.deletion_progress + detached}, synchronize_session=False
+            )
+            # The job's lock is renewed with each batch, so a long deletion is not handed to another worker part way through
+            db.session.query(Job).filter(
+                Job.kind == USER_DELETION, Job.recipient == str(user_id), Job.status == 'running'
+            ).update({'locked_at': datetime.now()}, synchronize_session=False)
+            db.session.commit()
+
+    remove_user_status_counts(user_id)
+    db.session.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+    bump_reference_version()
+    db.session.commit()
+
+# This function is the job handler used by the worker. Each job's recipient is the id of a user to delete.
+def run_user_deletion_job(recipient, payloads):
+    run_user_deletion(int(recipient))
+
+# This function queues the deletion of any users who are pending deletion but have no deletion job
+# (e.g. their job failed JOB_MAX_ATTEMPTS times, or they were marked before deletions were queued).
+# It is used by the 'flask resume-user-deletions' command.
+def resume_user_deletions():
+    queued = select(Job.recipient).where(Job.kind == USER_DELETION, Job.status.in_(['pending', 'running']))
+    user_ids = [
+        row.id for row in
+        db.session.query(User.id).filter(User.pending_deletion.is_(True), cast(User.id, String).notin_(queued))
+    ]
+    if _run_jobs_inline():
+        for user_id in user_ids:
+            run_user_deletion(user_id)
+    elif user_ids:
+        _enqueue_user_deletions(user_ids)
+        db.session.commit()
+    return len(user_ids)
+
+# This function returns the percentage of the user's rows that have been detached.
+def deletion_percentage(user):
+    if not user.deletion_total:
+        return 0
+    return min(100, int(100 * (user.deletion_progress or 0) / user.deletion_total))
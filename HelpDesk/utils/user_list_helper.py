@@ -0,0 +1,74 @@
+from sqlalchemy import false, func, or_, select, union_all
+from ..extensions import db
+from ..models import ArchivedTicket, Ticket, User
+from .user_deletion_helper import deletion_percentage
+
+# These functions build the paginated user lists on the users page.
+# Ticket counts are only calculated for the users on the current page, so the cost of the page depends on the page size
+# rather than the total number of users.
+
+USERS_PER_PAGE = 25
+
+# This function returns one page of administrators or non-administrators, optionally filtered by name or email address.
+def paginate_users(is_admin, search, page):
+    query = db.session.query(User).filter(User.is_admin.is_(is_admin))
+    if search:
+        pattern = f"%{search.strip()}%"
+        query = query.filter(or_(
+            User.forename.ilike(pattern),
+            User.surname.ilike(pattern),
+            (User.forename + ' ' + User.surname).ilike(pattern),
+            User.email.ilike(pattern)
+        ))
+    return query.order_by(User.id).paginate(page=page, per_page=USERS_PER_PAGE, error_out=False)
+
+# This function returns a subquery of (user_id, ticket_count) for the live and archived tickets whose column is one of the users.
+def _ticket_count_subquery(user_ids, column):
+    tickets = union_all(
+        select(getattr(Ticket, column).label('user_id')).where(getattr(Ticket, column).in_(user_ids), Ticket.is_deleted == false()),
+        select(getattr(ArchivedTicket, column).label('user_id')).where(getattr(ArchivedTicket, column).in_(user_ids))
+    ).subquery()
+    return (
+        select(tickets.c.user_id, func.count().label('ticket_count'))
+        .group_by(tickets.c.user_id)
+        .subquery()
+    )
+
+# This function returns {user_id: (reported_count, assigned_count)} for the given users in a single query.
+# Archived tickets are counted, as they are on the dashboard, so archiving tickets does not change a user's counts.
+# The live and archived tickets are combined with UNION ALL, aggregated with GROUP BY and outer joined to the users.
+def ticket_counts(user_ids):
+    if not user_ids:
+        return {}
+
+    reported = _ticket_count_subquery(user_ids, 'user_id')
+    assigned = _ticket_count_subquery(user_ids, 'assignee_id')
+    rows = (
+        db.session.query(
+            User.id,
+            func.coalesce(reported.c.ticket_count, 0),
+            func.coalesce(assigned.c.ticket_count, 0)
+        )
+        .outerjoin(reported, reported.c.user_id == User.id)
+        .outerjoin(assigned, assigned.c.user_id == User.id)
+        .filter(User.id.in_(user_ids))
+        .all()
+    )
+    return {user_id: (reported_count, assigned_count) for user_id, reported_count, assigned_count in rows}
+
+# This function converts a page of users into the rows displayed on the users page.
+# Administrators show the number of tickets assigned to them, non-administrators show the number of tickets they have reported.
+def user_rows(users, counts):
+    return [
+        {
+            'id': u.id,
+            'forename': u.forename,
+            'surname': u.surname,
+            'email': u.email,
+            'ticket_count': counts.get(u.id, (0, 0))[1 if u.is_admin else 0],
+            'is_admin': u.is_admin,
+            'pending_deletion': u.pending_deletion,
+            'deletion_percentage': deletion_percentage(u) if u.pending_deletion else None
+        }
+        for u in users
+    ]
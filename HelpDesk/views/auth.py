@@ -1,12 +1,15 @@
 import pyotp
-import pyqrcode
-import base64
-from flask import Blueprint, render_template, request, flash, redirect, url_for, session, current_app
+from flask import Blueprint, render_template, request, flash, redirect, url_for, session, current_app, abort
 from flask_login import login_user, login_required, logout_user, current_user
 from ..models import User
 from ..extensions import db
 from ..utils.registration_helper import validate_registration_form
-from werkzeug.security import generate_password_hash, check_password_hash
+from ..utils.email_domain_helper import schedule_email_check
+from ..utils.rate_limit_helper import admit_attempt, reset_attempts, too_many_attempts_message
+from ..utils.user_cache_helper import invalidate_users
+from ..utils.password_helper import hash_password, verify_password
+from ..utils.qr_code_helper import provisioning_uri, qr_code_image
+from ..utils.conditional_helper import build_validator, not_modified, apply_validator
 
 # Route logic was informed by a tutorial by Tech With Tim (Tech With Tim, 2021).
 # PyOTP usage was informed by a tutorial from NeuralNine (NeuralNine, 2022).
@@ -15,7 +18,7 @@ from werkzeug.security import generate_password_hash, check_password_hash
 # Form validation is used to ensure data integrity before database operations are performed, and appropriate user feedback is provided via flash messages.
 # 2FA setup and verification is implemented using TOTP via the PyOTP library.
 # User authentication state is managed using Flask-Login.
-# Password hashing is implemented using Werkzeug security utilities. 
+# Password hashing is implemented using Werkzeug security utilities, with the method set by PASSWORD_HASH_METHOD (see password_helper).
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -34,8 +37,15 @@ def login():
         elif not password:
             flash('Please enter your password.', 'error')
         else:
+            # Attempts over the limit are rejected before the password hash is checked
+            retry_after = admit_attempt(email)
+            if retry_after:
+                flash(too_many_attempts_message(retry_after), 'error')
+                return render_template('login.html', user=current_user, email=''), 429, {'Retry-After': str(retry_after)}
+
             user = db.session.query(User).filter_by(email=email).first()
-            if user and check_password_hash(user.password, password):
+            if user and not user.pending_deletion and verify_password(user, password):
+                reset_attempts(email)
                 if current_app.config.get("DISABLE_2FA"):
                     login_user(user, remember=True)
                     flash("Logged in successfully (2FA bypassed for testing)", "success")
@@ -68,8 +78,14 @@ def login_2fa():
     totp = pyotp.TOTP(user.totp_secret)
 
     if request.method == 'POST':
+        retry_after = admit_attempt(f'2fa:{user.id}')
+        if retry_after:
+            flash(too_many_attempts_message(retry_after), 'error')
+            return render_template('login_2fa.html', user=user), 429, {'Retry-After': str(retry_after)}
+
         token = request.form.get('token')
         if totp.verify(token):
+            reset_attempts(f'2fa:{user.id}')
             login_user(user, remember=True)
             session.pop('pending_login_2fa_user_id', None)
             flash('Logged in successfully.', 'success')
@@ -77,10 +93,7 @@ def login_2fa():
         else:
             flash('Invalid authentication code. Please try again.', 'error')
 
-    qr_uri = totp.provisioning_uri(user.email, issuer_name="Eclipse Software Help Desk")
-    qr_b64 = base64.b64encode(pyqrcode.create(qr_uri).png_as_base64_str(scale=5).encode()).decode()
-
-    return render_template('login_2fa.html', user=user, qr_b64=qr_b64)
+    return render_template('login_2fa.html', user=user)
 
 @auth_bp.route('/logout', methods=['GET', 'POST'])
 @login_required
@@ -115,11 +128,12 @@ def register():
             forename=forename,
             surname=surname,
             is_admin=False,
-            password=generate_password_hash(password, method='pbkdf2:sha256'),
+            password=hash_password(password),
             is_2fa_enabled=False
         )
         db.session.add(new_user)
         db.session.commit()
+        schedule_email_check(new_user)
 
         flash('Account created successfully. Please log in to continue.', 'success')
         return redirect(url_for('auth.login'))
@@ -142,19 +156,24 @@ def setup_2fa():
         flash('User not found.', 'error')
         return redirect(url_for('auth.login'))
 
-    # Generate TOTP and QR code
+    # Generate TOTP secret. The QR code is requested separately by the page (see setup_2fa_qr_code).
     if not user.totp_secret:
         user.totp_secret = pyotp.random_base32()
         db.session.commit()
 
     totp = pyotp.TOTP(user.totp_secret)
-    totp_uri = totp.provisioning_uri(name=user.email, issuer_name="Eclipse Software Help Desk")
-    qr_code = pyqrcode.create(totp_uri).png_as_base64_str(scale=4)
 
     if request.method == 'POST':
+        retry_after = admit_attempt(f'2fa:{user.id}')
+        if retry_after:
+            flash(too_many_attempts_message(retry_after), 'error')
+            return render_template('setup_2fa.html', user=user), 429, {'Retry-After': str(retry_after)}
+
         token = request.form.get('token')
         if totp.verify(token):
+            reset_attempts(f'2fa:{user.id}')
             user.is_2fa_enabled = True
+            invalidate_users([user.id])
             db.session.commit()
             login_user(user)
             session.pop('pending_2fa_user_id', None)
@@ -163,4 +182,20 @@ def setup_2fa():
         else:
             flash('Invalid authentication code.', 'error')
 
-    return render_template('setup_2fa.html', qr_code=qr_code, user=user)
\ No newline at end of file
+    return render_template('setup_2fa.html', user=user)
+
+# This route returns the QR code image for the pending 2FA setup.
+# The image is cached by the server and by the browser, which revalidates it with its ETag, so it is only rendered once per secret.
+@auth_bp.route('/setup_2fa/qr_code.svg')
+def setup_2fa_qr_code():
+    user_id = session.get('pending_2fa_user_id')
+    user = db.session.get(User, user_id) if user_id else None
+    if not user or not user.totp_secret or user.is_2fa_enabled:
+        abort(404)
+
+    key, image = qr_code_image(provisioning_uri(user))
+    validator = build_validator(key)
+    response = not_modified(validator)
+    if response:
+        return response
+    return apply_validator(current_app.response_class(image, mimetype='image/svg+xml'), validator)
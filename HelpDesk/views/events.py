@@ -0,0 +1,58 @@
+import queue
+import time
+from flask import Blueprint, Response, abort, current_app, request
+from flask_login import login_required, current_user
+from ..extensions import db
+from ..utils.event_stream_helper import RELOAD, get_broadcaster, format_event
+
+# This Blueprint provides the live event stream (Server-Sent Events) that the home page uses to update tickets in place.
+# It enforces user authentication, and each user is only sent the events for the tickets they are able to see.
+# Each stream is closed after TICKET_EVENT_STREAM_TIMEOUT seconds, and the browser reconnects with the id of the last event it received,
+# so a worker thread is never held by one browser indefinitely.
+
+events_bp = Blueprint('events', __name__)
+
+DEFAULT_KEEPALIVE_INTERVAL = 15
+DEFAULT_STREAM_TIMEOUT = 300
+
+@events_bp.route('/events')
+@login_required
+def events():
+    if not current_app.config.get('LIVE_UPDATES', True):
+        abort(404)
+
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    broadcaster = get_broadcaster()
+    subscription = broadcaster.subscribe(current_user.id, current_user.is_admin, last_event_id)
+    keepalive_interval = current_app.config.get('TICKET_EVENT_KEEPALIVE_INTERVAL', DEFAULT_KEEPALIVE_INTERVAL)
+    closes_at = time.monotonic() + current_app.config.get('TICKET_EVENT_STREAM_TIMEOUT', DEFAULT_STREAM_TIMEOUT)
+
+    # The stream does not use the database, so the connection used to load the user is returned to the pool straight away
+    db.session.close()
+
+    def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                remaining = closes_at - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    event = subscription.queue.get(timeout=min(keepalive_interval, remaining))
+                except queue.Empty:
+                    if time.monotonic() >= closes_at:
+                        return
+                    # A comment is sent periodically so that proxies do not close an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                if event is RELOAD:
+                    yield "event: reload\ndata: {}\n\n"
+                    return
+                yield format_event(event)
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
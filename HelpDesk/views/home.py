@@ -1,8 +1,16 @@
-from datetime import datetime, timedelta
-from flask import Blueprint, render_template, request
+from datetime import datetime
+from flask import Blueprint, render_template, request, current_app
 from flask_login import login_required, current_user
-from ..models import Ticket, User
+from sqlalchemy.orm import joinedload, load_only, with_expression
+from ..models import User
 from ..extensions import db
+from ..utils.status_count_helper import get_status_counts, TICKET_STATUSES
+from ..utils.ticket_helper import TICKET_PRIORITIES
+from ..utils.pagination_helper import keyset_paginate
+from ..utils.reference_cache_helper import get_administrators, get_assignees, get_reference_version
+from ..utils.conditional_helper import build_validator, user_state, latest_ticket_changes, latest_comment_id, not_modified, apply_validator
+from ..utils.search_helper import search_results
+from ..utils.ticket_filter_helper import get_ticket_filters, ticket_model, scope_tickets, filter_tickets
 
 # Route logic was informed by a tutorial by Tech With Tim (Tech With Tim, 2021).
 
@@ -11,84 +19,112 @@ from ..extensions import db
 
 home_bp = Blueprint('home', __name__)
 
+PER_PAGE_OPTIONS = [10, 25, 50, 100]
+DESCRIPTION_PREVIEW_LENGTH = 100
+
 @home_bp.route('/')
 @login_required
 def home():
     page = request.args.get('page', 1, type=int)
-    per_page = 10
+    per_page = request.args.get('per_page', PER_PAGE_OPTIONS[0], type=int)
+    if per_page not in PER_PAGE_OPTIONS:
+        per_page = PER_PAGE_OPTIONS[0]
 
-    # Base query
-    base_query = Ticket.query
+    # Counts for dashboard widgets
+    status_counts = get_status_counts(current_user)
 
-    # If non-admin, only show their own tickets
-    if not current_user.is_admin:
-        base_query = base_query.filter(Ticket.user_id == current_user.id)
+    # If nothing the page displays has changed since the browser's copy, a 304 is returned without rendering the page.
+    # The current hour is included as the greeting and the date created filters depend on the time of day.
+    # Search results also depend on comments, so the latest comment id is included when searching.
+    latest_id, latest_update = latest_ticket_changes(current_user)
+    validator = build_validator(
+        'home',
+        user_state(current_user),
+        sorted(request.args.items(multi=True)),
+        datetime.now().strftime('%Y-%m-%d %H'),
+        sorted(status_counts.items()),
+        latest_id, latest_update,
+        latest_comment_id() if request.args.get('q') else None,
+        get_reference_version(),
+        last_modified=latest_update
+    )
+    response = not_modified(validator)
+    if response:
+        return response
 
-    query = base_query
+    # Non-admin users only see their own tickets, then the filters from the request args are applied.
+    # The archive is only queried when it has been requested, otherwise the current tickets are listed.
+    filters = get_ticket_filters(request.args)
+    model = ticket_model(filters)
+    query = filter_tickets(scope_tickets(model.query, current_user, model), filters, model)
 
-    # Apply filters from request args
-    ticket_type_filter = request.args.get('ticket_type')
-    status_filter = request.args.get('status')
-    priority_filter = request.args.get('priority')
-    assignee_filter = request.args.get('assignee')
-    date_filter = request.args.get('date_created')
+    # Only the columns shown in the table are loaded, with a preview of the description, and the assignee is loaded in the same query.
+    # One extra character of the description is loaded so the template knows whether the preview has been truncated.
+    query = query.options(
+        load_only(
+            model.id, model.ticket_type, model.subject, model.status, model.priority,
+            model.estimated_time, model.date_created, model.assignee_id
+        ),
+        with_expression(model.description_preview, db.func.substr(model.description, 1, DESCRIPTION_PREVIEW_LENGTH + 1)),
+        joinedload(model.assignee).load_only(User.id, User.forename, User.surname)
+    )
 
-    if ticket_type_filter:
-        query = query.filter(Ticket.ticket_type == ticket_type_filter)
-    if status_filter:
-        query = query.filter(Ticket.status == status_filter)
-    if priority_filter:
-        query = query.filter(Ticket.priority == priority_filter)
-    if assignee_filter:
-        if assignee_filter.lower() == 'unassigned':
-            query = query.filter(Ticket.assignee_id.is_(None))
-        else:
-            try:
-                assignee_id = int(assignee_filter)
-                query = query.filter(Ticket.assignee_id == assignee_id)
-            except ValueError:
-                pass
-    if date_filter:
-        now = datetime.now()
-        if date_filter == 'Today':
-            query = query.filter(db.func.date(Ticket.date_created) == now.date())
-        elif date_filter == 'Last 7 Days':
-            query = query.filter(Ticket.date_created >= now - timedelta(days=7))
-        elif date_filter == 'This Month':
-            query = query.filter(Ticket.date_created >= now.replace(day=1))
+    # Full-text search results are joined to the filtered tickets and ordered by relevance
+    results = search_results(filters['q']) if filters.get('q') else None
+    if results is not None:
+        query = query.join(results, results.c.ticket_id == model.id)
 
-    tickets = query.order_by(Ticket.id.desc()).paginate(page=page, per_page=per_page)
+    # Keyset pagination seeks on the ticket id using the cursor in the URL, offset pagination uses the page number.
+    # Search results are ordered by relevance rather than the ticket id, so they always use offset pagination.
+    cursor_mode = current_app.config.get('HOME_PAGINATION') == 'keyset' and results is None
+    if results is not None:
+        tickets = query.order_by(results.c.rank, model.id.desc()).paginate(page=page, per_page=per_page)
+    elif cursor_mode:
+        tickets = keyset_paginate(
+            query,
+            model.id,
+            request.args.get('cursor'),
+            per_page,
+            current_app.config.get('HOME_TOTAL_CAP', 1000)
+        )
+    else:
+        tickets = query.order_by(model.id.desc()).paginate(page=page, per_page=per_page)
 
-    # Counts for dashboard widgets
-    open_tickets = base_query.filter(Ticket.status == 'Open').count()
-    in_progress_tickets = base_query.filter(Ticket.status == 'In Progress').count()
-    on_hold_pending_tickets = base_query.filter(Ticket.status == 'On Hold / Pending').count()
-    resolved_tickets = base_query.filter(Ticket.status == 'Resolved').count()
-    closed_tickets = base_query.filter(Ticket.status == 'Closed').count()
-    
-    assignees = (
-        db.session.query(User)
-        .join(Ticket, Ticket.assignee_id == User.id)
-        .filter(Ticket.assignee_id.isnot(None))
-        .distinct()
-        .all()
-    )
+    # Filters and page size are carried over to the pagination links
+    link_args = dict(filters)
+    if per_page != PER_PAGE_OPTIONS[0]:
+        link_args['per_page'] = per_page
+
+    assignees = get_assignees()
+    # Administrators can reassign the selected tickets from the bulk actions form
+    administrators = get_administrators() if current_user.is_admin else []
 
-    return render_template(
+    return apply_validator(render_template(
         "home.html",
         user=current_user,
         tickets=tickets,
+        cursor_mode=cursor_mode,
+        link_args=link_args,
+        filter_args=filters,
+        per_page=per_page,
+        per_page_options=PER_PAGE_OPTIONS,
+        description_preview_length=DESCRIPTION_PREVIEW_LENGTH,
         assignees=assignees,
-        open_tickets=open_tickets,
-        in_progress_tickets=in_progress_tickets,
-        on_hold_pending_tickets=on_hold_pending_tickets,
-        resolved_tickets=resolved_tickets,
-        closed_tickets=closed_tickets,
-        filter_assignee=assignee_filter,
-        filter_ticket_type=ticket_type_filter,
-        filter_status=status_filter,
-        filter_priority=priority_filter,
-        filter_date=date_filter,
-        filters_applied=any([ticket_type_filter, status_filter, priority_filter, assignee_filter, date_filter]),
+        administrators=administrators,
+        ticket_statuses=TICKET_STATUSES,
+        ticket_priorities=TICKET_PRIORITIES,
+        open_tickets=status_counts['Open'],
+        in_progress_tickets=status_counts['In Progress'],
+        on_hold_pending_tickets=status_counts['On Hold / Pending'],
+        resolved_tickets=status_counts['Resolved'],
+        closed_tickets=status_counts['Closed'],
+        filter_assignee=filters.get('assignee'),
+        filter_ticket_type=filters.get('ticket_type'),
+        filter_status=filters.get('status'),
+        filter_priority=filters.get('priority'),
+        filter_date=filters.get('date_created'),
+        filter_search=filters.get('q'),
+        filter_archived=bool(filters.get('archived')),
+        filters_applied=bool(filters),
         datetime=datetime
-    )
\ No newline at end of file
+    ), validator)
\ No newline at end of file
@@ -1,8 +1,26 @@
+import io
 from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, Response, stream_with_context
 from flask_login import login_required, current_user
-from ..models import Comment, Ticket, User
-from ..utils.ticket_helper import validate_ticket_form, render_ticket_form
+from markupsafe import escape
+from ..models import Comment, Ticket, ArchivedComment, ArchivedTicketHistory
+from ..utils.ticket_helper import validate_ticket_form, render_ticket_form, TICKET_PRIORITIES
+from ..utils.status_count_helper import adjust_status_count, move_status_count, TICKET_STATUSES
+from ..utils.reference_cache_helper import get_administrators, get_reference_version, bump_reference_version
+from ..utils.conditional_helper import build_validator, user_state, latest_comment_id, not_modified, apply_validator
+from ..utils.search_helper import index_ticket, index_comment, search_results
+from ..utils.ticket_filter_helper import get_ticket_filters, ticket_model, scope_tickets, filter_tickets
+from ..utils.export_helper import export_query, EXPORT_GENERATORS, EXPORT_MIMETYPES
+from ..utils.comment_helper import comment_page
+from ..utils.import_helper import import_tickets as import_ticket_rows, import_format_for
+from ..utils.ticket_deletion_helper import get_live_ticket, soft_delete_ticket, restore_ticket as restore_deleted_ticket
+from ..utils.archive_helper import get_archived_ticket, unarchive_ticket as unarchive_archived_ticket
+from ..utils.notification_helper import enqueue_ticket_event, ticket_change_events
+from ..utils.ticket_event_helper import record_ticket_created, record_ticket_updated, record_ticket_commented, record_ticket_deleted
+from ..utils.bulk_update_helper import BulkUpdateConflict, bulk_update_tickets as apply_bulk_update
+from ..utils.ticket_history_helper import (
+    TRACKED_FIELDS, normalise_ticket_form, ticket_changes, record_ticket_changes, ticket_history
+)
 from ..extensions import db
 
 # Route logic was informed by a tutorial by Tech With Tim (Tech With Tim, 2021).
@@ -53,20 +71,49 @@ def create_ticket():
             user_id=current_user.id
         )
         db.session.add(new_ticket)
+        db.session.flush()
+        adjust_status_count(new_ticket.user_id, new_ticket.status, 1)
+        index_ticket(new_ticket)
+        enqueue_ticket_event('ticket_created', new_ticket, current_user)
+        record_ticket_created(new_ticket)
         db.session.commit()
         flash('Ticket created successfully!', category='success')
         return redirect(url_for('home.home'))
 
     return render_template('create_ticket.html', user=current_user)
 
+# Archived tickets are shown read-only, with their archived comments and history.
+def render_archived_ticket(ticket):
+    if ticket.user_id != current_user.id and not current_user.is_admin:
+        flash('You do not have permission to view this ticket.', category='error')
+        return redirect(url_for('home.home'))
+
+    if request.method == 'POST':
+        flash('This ticket has been archived and cannot be changed.', category='error')
+        return redirect(url_for('tickets.ticket_details', ticket_id=ticket.id))
+
+    comments, older_comments_cursor = comment_page(ticket.id, model=ArchivedComment)
+    return render_template(
+        'ticket_details.html',
+        ticket=ticket,
+        comments=comments,
+        older_comments_cursor=older_comments_cursor,
+        history=ticket_history(ticket.id, model=ArchivedTicketHistory),
+        history_labels=TRACKED_FIELDS,
+        administrator=[],
+        archived=True
+    )
+
 @tickets_bp.route('/ticket_details/<int:ticket_id>', methods=['GET', 'POST'])
 @login_required
 def ticket_details(ticket_id):
-    ticket = db.session.query(Ticket).filter_by(id=ticket_id).first()
-    administrator = db.session.query(User).filter_by(is_admin=True).all()
-    comments = db.session.query(Comment).filter_by(ticket_id=ticket.id).order_by(Comment.date_created.asc()).all()
+    ticket = get_live_ticket(ticket_id)
 
     if not ticket:
+        # The archive is only checked for tickets that are not in the ticket table
+        archived_ticket = get_archived_ticket(ticket_id)
+        if archived_ticket:
+            return render_archived_ticket(archived_ticket)
         flash('Ticket not found.', category='error')
         return redirect(url_for('home.home'))
 
@@ -74,6 +121,22 @@ def ticket_details(ticket_id):
         flash('You do not have permission to view this ticket.', category='error')
         return redirect(url_for('home.home'))
 
+    # If the ticket, its comments and the administrator list are unchanged since the browser's copy, a 304 is returned.
+    # The version is included as the page's edit form holds it, and deleting and restoring a ticket changes it without changing date_updated.
+    validator = build_validator(
+        'ticket_details',
+        user_state(current_user),
+        ticket.id, ticket.version, ticket.date_updated, ticket.assignee_id,
+        latest_comment_id(ticket.id),
+        get_reference_version(),
+        last_modified=ticket.date_updated or ticket.date_created
+    )
+    response = not_modified(validator)
+    if response:
+        return response
+
+    administrator = get_administrators()
+
     if request.method == 'POST' and 'subject' in request.form:
         ticket_type = request.form.get('ticket_type')
         subject = request.form.get('subject')
@@ -83,13 +146,19 @@ def ticket_details(ticket_id):
         estimated_time = request.form.get('estimated_time')
         assignee_id = request.form.get('assignee_id')
 
-        error = validate_ticket_form(ticket_type, subject, description, status, priority, estimated_time)
-        if error:
+        # The version the editor loaded is submitted with the form. Forms without a version are treated as current.
+        version = request.form.get('version', ticket.version, type=int)
+
+        def render_edit_form(error, status_code=200):
             flash(error, 'error')
+            comments, older_comments_cursor = comment_page(ticket.id)
             return render_template(
                 'ticket_details.html',
                 ticket=ticket,
                 comments=comments,
+                older_comments_cursor=older_comments_cursor,
+                history=ticket_history(ticket.id),
+                history_labels=TRACKED_FIELDS,
                 administrator=administrator,
                 ticket_type=ticket_type,
                 subject=subject,
@@ -99,17 +168,56 @@ def ticket_details(ticket_id):
                 estimated_time=estimated_time,
                 assignee_id=assignee_id,
                 edit_mode=True
+            ), status_code
+
+        def conflict():
+            return render_edit_form(
+                f"This ticket was updated by {ticket.updated_by or 'another user'} after you opened it, so your changes have not been saved. "
+                "The latest version is shown below with your changes in the form. Save again to overwrite it.",
+                409
             )
+
+        error = validate_ticket_form(ticket_type, subject, description, status, priority, estimated_time)
+        if error:
+            return render_edit_form(error)
+        elif version != ticket.version:
+            return conflict()
         else:
-            ticket.ticket_type = ticket_type
-            ticket.subject = subject
-            ticket.description = description
-            ticket.status = status
-            ticket.priority = priority
-            ticket.estimated_time = float(estimated_time)
-            ticket.updated_by = f"{current_user.forename} {current_user.surname}"
-            ticket.date_updated = datetime.now()
-            ticket.assignee_id = assignee_id
+            # Only the fields that differ from the saved ticket are written, and nothing is written if the form is unchanged
+            values = normalise_ticket_form(ticket_type, subject, description, status, priority, estimated_time, assignee_id)
+            changes = ticket_changes(ticket, values)
+            if not changes:
+                flash('No changes have been made.', category='info')
+                return redirect(url_for('tickets.ticket_details', ticket_id=ticket.id))
+
+            # The update only matches the ticket if its version is still the version the editor loaded (optimistic concurrency).
+            # If another editor has saved the ticket in the meantime no row is updated and the conflict is reported instead.
+            changed_by = f"{current_user.forename} {current_user.surname}"
+            updated = (
+                db.session.query(Ticket)
+                .filter(Ticket.id == ticket.id, Ticket.version == version)
+                .update({
+                    **{field: new_value for field, (old_value, new_value) in changes.items()},
+                    'updated_by': changed_by,
+                    'date_updated': datetime.now(),
+                    'version': Ticket.version + 1
+                })
+            )
+            if not updated:
+                db.session.rollback()
+                return conflict()
+
+            if 'status' in changes:
+                move_status_count(ticket.user_id, *changes['status'])
+            if 'assignee_id' in changes:
+                bump_reference_version()
+            record_ticket_changes(ticket, changes, changed_by, administrator)
+            if 'subject' in changes or 'description' in changes:
+                index_ticket(ticket)
+            # The reporter and assignee are notified by the worker rather than during the request
+            for event, recipient_ids, data in ticket_change_events(ticket, changes):
+                enqueue_ticket_event(event, ticket, current_user, recipient_ids, **data)
+            record_ticket_updated(ticket, changes)
 
             db.session.commit()
             flash('Ticket updated successfully.', category='success')
@@ -130,16 +238,60 @@ def ticket_details(ticket_id):
                 ticket_id=ticket.id
             )
             db.session.add(new_comment)
+            db.session.flush()
+            index_comment(new_comment)
+            enqueue_ticket_event('ticket_commented', ticket, current_user, [ticket.user_id, ticket.assignee_id], comment=comment_text)
+            record_ticket_commented(ticket)
             db.session.commit()
             flash('Comment added successfully.', 'success')
             return redirect(url_for('tickets.ticket_details', ticket_id=ticket.id))
 
-    return render_template('ticket_details.html', ticket=ticket, comments=comments, administrator=administrator)
+    # Only the newest comments are rendered, older comments are fetched from the comments fragment endpoint
+    comments, older_comments_cursor = comment_page(ticket.id)
+
+    return apply_validator(
+        render_template(
+            'ticket_details.html',
+            ticket=ticket,
+            comments=comments,
+            older_comments_cursor=older_comments_cursor,
+            history=ticket_history(ticket.id),
+            history_labels=TRACKED_FIELDS,
+            administrator=administrator
+        ),
+        validator
+    )
+
+# Returns a page of older comments as an HTML fragment, which the ticket details page inserts above the comments already shown.
+@tickets_bp.route('/ticket_details/<int:ticket_id>/comments')
+@login_required
+def ticket_comments(ticket_id):
+    ticket = get_live_ticket(ticket_id)
+    model = Comment
+
+    if not ticket:
+        ticket = get_archived_ticket(ticket_id)
+        model = ArchivedComment
+
+    if not ticket:
+        abort(404)
+
+    if ticket.user_id != current_user.id and not current_user.is_admin:
+        abort(403)
+
+    comments, older_comments_cursor = comment_page(ticket.id, request.args.get('before'), model=model)
+
+    return render_template(
+        'comment_list.html',
+        ticket=ticket,
+        comments=comments,
+        older_comments_cursor=older_comments_cursor
+    )
 
 @tickets_bp.route('/delete_ticket/<int:ticket_id>', methods=['POST'])
 @login_required
 def delete_ticket(ticket_id):
-    ticket = db.session.query(Ticket).filter_by(id=ticket_id).first()
+    ticket = get_live_ticket(ticket_id)
 
     if not ticket:
         flash('Ticket not found.', category='error')
@@ -149,8 +301,161 @@ def delete_ticket(ticket_id):
         flash('You do not have permission to delete this ticket.', category='error')
         return redirect(url_for('tickets.ticket_details', ticket_id=ticket.id))
     
-    db.session.query(Comment).filter_by(ticket_id=ticket.id).delete()
-    db.session.delete(ticket)
+    # The ticket is hidden with a single update and can be restored until it is purged
+    soft_delete_ticket(ticket)
+    enqueue_ticket_event('ticket_deleted', ticket, current_user)
+    record_ticket_deleted(ticket)
     db.session.commit()
-    flash('Ticket deleted successfully.', category='success')
-    return redirect(url_for('home.home'))
\ No newline at end of file
+    undo = (
+        f'<form method="POST" action="{url_for("tickets.restore_ticket", ticket_id=ticket.id)}" class="d-inline">'
+        '<button type="submit" class="btn btn-link p-0 align-baseline">Undo</button></form>'
+    )
+    flash(f'Ticket deleted successfully. {undo}', category='success')
+    return redirect(url_for('home.home'))
+
+@tickets_bp.route('/restore_ticket/<int:ticket_id>', methods=['POST'])
+@login_required
+def restore_ticket(ticket_id):
+    if not current_user.is_admin:
+        flash('You do not have permission to restore tickets.', category='error')
+        return redirect(url_for('home.home'))
+
+    ticket = db.session.query(Ticket).filter_by(id=ticket_id).first()
+    if not ticket or not ticket.is_deleted:
+        flash('Ticket not found.', category='error')
+        return redirect(url_for('home.home'))
+
+    restore_deleted_ticket(ticket)
+    record_ticket_created(ticket)
+    db.session.commit()
+    flash('Ticket restored successfully.', category='success')
+    return redirect(url_for('tickets.ticket_details', ticket_id=ticket.id))
+
+# Moves an archived ticket back into the current tickets so that it can be edited again.
+@tickets_bp.route('/unarchive_ticket/<int:ticket_id>', methods=['POST'])
+@login_required
+def unarchive_ticket(ticket_id):
+    if not current_user.is_admin:
+        flash('You do not have permission to unarchive tickets.', category='error')
+        return redirect(url_for('home.home'))
+
+    archived_ticket = get_archived_ticket(ticket_id)
+    if not archived_ticket:
+        flash('Ticket not found.', category='error')
+        return redirect(url_for('home.home'))
+
+    unarchive_archived_ticket(archived_ticket)
+    db.session.commit()
+    flash('Ticket unarchived successfully.', category='success')
+    return redirect(url_for('tickets.ticket_details', ticket_id=ticket_id))
+
+# Exports the ticket list with the same filters and search as the home page.
+# The response is streamed from a generator, so the export starts immediately regardless of how many tickets match.
+@tickets_bp.route('/export_tickets')
+@login_required
+def export_tickets():
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_GENERATORS:
+        flash('Tickets can only be exported as CSV or NDJSON.', category='error')
+        return redirect(url_for('home.home'))
+
+    filters = get_ticket_filters(request.args)
+    model = ticket_model(filters)
+    query = filter_tickets(scope_tickets(export_query(model), current_user, model), filters, model)
+
+    results = search_results(filters['q']) if filters.get('q') else None
+    if results is not None:
+        query = query.join(results, results.c.ticket_id == model.id).order_by(results.c.rank, model.id.desc())
+    else:
+        query = query.order_by(model.id.desc())
+
+    filename = f"tickets_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    return Response(
+        stream_with_context(EXPORT_GENERATORS[export_format](query)),
+        mimetype=EXPORT_MIMETYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+# Imports tickets from an uploaded CSV, JSON or NDJSON file. Rows that fail validation are reported without stopping the import.
+@tickets_bp.route('/import_tickets', methods=['POST'])
+@login_required
+def import_tickets():
+    if not current_user.is_admin:
+        flash('You do not have permission to import tickets.', category='error')
+        return redirect(url_for('home.home'))
+
+    upload = request.files.get('file')
+    import_format = import_format_for(upload.filename if upload else None)
+    if not import_format:
+        flash('Please choose a CSV, JSON or NDJSON file to import.', category='error')
+        return redirect(url_for('home.home'))
+
+    stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    result = import_ticket_rows(stream, import_format)
+
+    flash(f"Imported {result.imported} ticket(s).", category='success' if result.imported else 'info')
+    if result.errors:
+        # Flash messages are rendered as HTML, and the errors can include values from the file, so they are escaped
+        shown = [f"Row {row_number}: {escape(error)}" for row_number, error in result.errors[:10]]
+        if len(result.errors) > len(shown):
+            shown.append(f"...and {len(result.errors) - len(shown)} more.")
+        flash(f"{len(result.errors)} row(s) could not be imported.<br>" + "<br>".join(shown), category='error')
+    return redirect(url_for('home.home'))
+
+# Applies one status, priority and/or assignee change to the tickets selected on the home page.
+# A blank field is left unchanged, and an assignee of 'none' unassigns the tickets.
+@tickets_bp.route('/bulk_update_tickets', methods=['POST'])
+@login_required
+def bulk_update_tickets():
+    # The home page filters are submitted with the form so that the same list is shown afterwards
+    home_url = url_for('home.home', **get_ticket_filters(request.form))
+
+    if not current_user.is_admin:
+        flash('You do not have permission to update tickets.', category='error')
+        return redirect(home_url)
+
+    ticket_ids = request.form.getlist('ticket_ids', type=int)
+    if not ticket_ids:
+        flash('You have not selected any tickets to update.', category='error')
+        return redirect(home_url)
+
+    administrator = get_administrators()
+    values = {}
+    status = request.form.get('status')
+    priority = request.form.get('priority')
+    assignee_id = request.form.get('assignee_id')
+
+    if status:
+        if status not in TICKET_STATUSES:
+            flash('Please select a valid status.', category='error')
+            return redirect(home_url)
+        values['status'] = status
+    if priority:
+        if priority not in TICKET_PRIORITIES:
+            flash('Please select a valid priority.', category='error')
+            return redirect(home_url)
+        values['priority'] = priority
+    if assignee_id:
+        if assignee_id == 'none':
+            values['assignee_id'] = None
+        elif assignee_id.isdigit() and int(assignee_id) in {user.id for user in administrator}:
+            values['assignee_id'] = int(assignee_id)
+        else:
+            flash('Please select a valid assignee.', category='error')
+            return redirect(home_url)
+
+    if not values:
+        flash('Please select a status, priority or assignee to apply.', category='error')
+        return redirect(home_url)
+
+    try:
+        updated = apply_bulk_update(ticket_ids, values, current_user, administrator)
+    except BulkUpdateConflict:
+        flash('Some of the selected tickets were changed by someone else while you were updating them. No tickets have been updated, please try again.', category='error')
+        return redirect(home_url)
+
+    if updated:
+        flash(f"{updated} ticket(s) updated successfully.", category='success')
+    else:
+        flash('No changes have been made.', category='info')
+    return redirect(home_url)
@@ -1,6 +1,15 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
-from ..models import User, Ticket, Comment
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
+from ..models import User, Ticket
 from ..extensions import db
+from ..utils.status_count_helper import get_status_counts
+from ..utils.reference_cache_helper import get_reference_version, bump_reference_version
+from ..utils.user_list_helper import paginate_users, ticket_counts, user_rows
+from ..utils.user_deletion_helper import start_user_deletion
+from ..utils.user_cache_helper import invalidate_users
+from ..utils.notification_helper import enqueue_event
+from ..utils.conditional_helper import build_validator, user_state, latest_ticket_changes, not_modified, apply_validator
 from flask_login import login_required, current_user
 
 # Route logic was informed by a tutorial by Tech With Tim (Tech With Tim, 2021).
@@ -17,32 +26,40 @@ def users():
         flash("You do not have permission to view this page.", "error")
         return redirect(url_for('home.home'))
 
-    non_administrator_data = []
-    administrator_data = []
-
-    users = db.session.query(User).all()
-    for u in users:
-        reported_tickets = db.session.query(Ticket).filter(Ticket.user_id == u.id).count()
-        assigned_tickets = db.session.query(Ticket).filter(Ticket.assignee_id == u.id).count()
+    # If no users, roles or tickets have changed since the browser's copy, a 304 is returned without rendering the page
+    # The progress of any deletions in the background is included so that the page updates as they progress
+    user_count, latest_user_id, deletion_progress = db.session.query(
+        func.count(User.id), func.max(User.id), func.sum(User.deletion_progress)
+    ).one()
+    latest_ticket_id, latest_ticket_update = latest_ticket_changes(current_user)
+    validator = build_validator(
+        'users',
+        user_state(current_user),
+        sorted(request.args.items(multi=True)),
+        user_count, latest_user_id, deletion_progress,
+        sorted(get_status_counts(current_user).items()),
+        latest_ticket_id, latest_ticket_update,
+        get_reference_version()
+    )
+    response = not_modified(validator)
+    if response:
+        return response
 
-        data = {
-            'id': u.id,
-            'forename': u.forename,
-            'surname': u.surname,
-            'ticket_count': reported_tickets if not u.is_admin else assigned_tickets,
-            'is_admin': u.is_admin
-        }
+    search = request.args.get('q', '').strip()
+    non_administrators = paginate_users(False, search, request.args.get('page', 1, type=int))
+    administrators = paginate_users(True, search, request.args.get('staff_page', 1, type=int))
 
-        if u.is_admin:
-            administrator_data.append(data)
-        else:
-            non_administrator_data.append(data)
+    # Ticket counts for both tables are calculated in a single query
+    counts = ticket_counts([u.id for u in non_administrators.items + administrators.items])
 
-    return render_template(
+    return apply_validator(render_template(
         'users.html',
-        non_administrator_data=non_administrator_data,
-        administrator_data=administrator_data
-    )
+        non_administrator_data=user_rows(non_administrators.items, counts),
+        administrator_data=user_rows(administrators.items, counts),
+        non_administrators=non_administrators,
+        administrators=administrators,
+        search=search
+    ), validator)
 
 @users_bp.route('/update_admin', methods=['POST'])
 @login_required
@@ -52,34 +69,64 @@ def update_admin():
         return redirect(url_for('users.users'))
 
     # Get all user Ids
-    user_ids = request.form.getlist('user_ids')  
+    user_ids = request.form.getlist('user_ids', type=int)
 
     if not user_ids:
         flash("You have not selected any users to update.", "error")
         return redirect(url_for('users.users'))
 
+    # All of the selected users are loaded with a single query
+    users = (
+        db.session.query(User)
+        .options(load_only(User.id, User.forename, User.surname, User.is_admin))
+        .filter(User.id.in_(user_ids), User.id != current_user.id, User.pending_deletion.is_(False))
+        .order_by(User.id)
+        .all()
+    )
+
     promoted_users = []
     demoted_users = []
 
-    for uid in user_ids:
-        user = db.session.query(User).get(uid)
-        if not user or user.id == current_user.id:
-            continue  
-
+    for user in users:
         # This will check the checkbox value for the user
-        new_is_admin = True if request.form.get(f'is_admin_{uid}') == 'on' else False
-
-        if user.is_admin != new_is_admin:
-            if user.is_admin and not new_is_admin:
-                # Demotion
-                db.session.query(Ticket).filter_by(assignee_id=user.id).update({'assignee_id': None})
-                demoted_users.append(f"{user.forename} {user.surname}")
-            elif not user.is_admin and new_is_admin:
-                # Promotion
-                promoted_users.append(f"{user.forename} {user.surname}")
-
-            user.is_admin = new_is_admin
-
+        new_is_admin = True if request.form.get(f'is_admin_{user.id}') == 'on' else False
+
+        if user.is_admin and not new_is_admin:
+            # Demotion
+            demoted_users.append(user)
+        elif not user.is_admin and new_is_admin:
+            # Promotion
+            promoted_users.append(user)
+
+    # Role changes and unassigning the demoted users' tickets are applied as set-based updates, so the number of
+    # statements does not depend on the number of users selected and the rows are only locked briefly.
+    promoted_ids = [u.id for u in promoted_users]
+    demoted_ids = [u.id for u in demoted_users]
+    if demoted_ids:
+        db.session.query(Ticket).filter(Ticket.assignee_id.in_(demoted_ids)).update(
+            {'assignee_id': None, 'version': Ticket.version + 1}, synchronize_session=False
+        )
+        db.session.query(User).filter(User.id.in_(demoted_ids)).update(
+            {'is_admin': False}, synchronize_session=False
+        )
+    if promoted_ids:
+        db.session.query(User).filter(User.id.in_(promoted_ids)).update(
+            {'is_admin': True}, synchronize_session=False
+        )
+
+    # The users are told about their new role by the worker, in the same transaction as the change
+    actor = f"{current_user.forename} {current_user.surname}"
+    for role, changed_users in [('Administrator', promoted_users), ('User', demoted_users)]:
+        for user in changed_users:
+            enqueue_event('user_role_changed', {'user_id': user.id, 'name': f"{user.forename} {user.surname}", 'role': role, 'actor': actor}, [user.id])
+
+    # Names are read before the commit expires the loaded users
+    promoted_users = [f"{u.forename} {u.surname}" for u in promoted_users]
+    demoted_users = [f"{u.forename} {u.surname}" for u in demoted_users]
+
+    if promoted_users or demoted_users:
+        bump_reference_version()
+    invalidate_users(promoted_ids + demoted_ids)
     db.session.commit()
 
     # Prepare flash messages
@@ -105,11 +152,13 @@ def delete_user(user_id):
 
     user = db.session.query(User).get_or_404(user_id)
 
-    db.session.query(Ticket).filter_by(user_id=user.id).update({'user_id': None})
-    db.session.query(Ticket).filter_by(assignee_id=user.id).update({'assignee_id': None})
-    db.session.query(Comment).filter_by(user_id=user.id).update({'user_id': None})
+    if user.pending_deletion:
+        flash(f"{user.forename} {user.surname} is already being deleted.", "info")
+        return redirect(url_for('users.users'))
 
-    db.session.delete(user)
-    db.session.commit()
-    flash(f"{user.forename} {user.surname} has been deleted.", "success")
-    return redirect(url_for('users.users'))
\ No newline at end of file
+    # The user is marked as pending deletion and their tickets and comments are detached in the background
+    name = f"{user.forename} {user.surname}"
+    enqueue_event('user_deleted', {'user_id': user.id, 'name': name, 'actor': f"{current_user.forename} {current_user.surname}"})
+    start_user_deletion(user)
+    flash(f"{name} has been marked for deletion. Their tickets and comments are being detached in the background.", "success")
+    return redirect(url_for('users.users'))
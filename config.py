@@ -6,4 +6,47 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    USE_STATUS_COUNTERS = os.getenv('USE_STATUS_COUNTERS', 'False').lower() == 'true'
+    HOME_PAGINATION = os.getenv('HOME_PAGINATION', 'offset')
+    HOME_TOTAL_CAP = int(os.getenv('HOME_TOTAL_CAP', 1000))
+    BACKGROUND_JOBS_SYNC = os.getenv('BACKGROUND_JOBS_SYNC', 'False').lower() == 'true'
+    USER_DELETION_BATCH_SIZE = int(os.getenv('USER_DELETION_BATCH_SIZE', 1000))
+    PURGE_DELETED_TICKETS_AFTER_DAYS = int(os.getenv('PURGE_DELETED_TICKETS_AFTER_DAYS', 30))
+    PURGE_BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', 500))
+    ARCHIVE_CLOSED_TICKETS_AFTER_DAYS = int(os.getenv('ARCHIVE_CLOSED_TICKETS_AFTER_DAYS', 365))
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', 500))
+    MAIL_SERVER = os.getenv('MAIL_SERVER')
+    MAIL_PORT = int(os.getenv('MAIL_PORT', 25))
+    MAIL_USE_TLS = os.getenv('MAIL_USE_TLS', 'False').lower() == 'true'
+    MAIL_USERNAME = os.getenv('MAIL_USERNAME')
+    MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
+    MAIL_SENDER = os.getenv('MAIL_SENDER', 'helpdesk@localhost')
+    WEBHOOK_URLS = [url.strip() for url in os.getenv('WEBHOOK_URLS', '').split(',') if url.strip()]
+    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+    DELIVERY_TIMEOUT = int(os.getenv('DELIVERY_TIMEOUT', 10))
+    JOB_BATCH_SIZE = int(os.getenv('JOB_BATCH_SIZE', 100))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 6))
+    JOB_RETRY_DELAY = int(os.getenv('JOB_RETRY_DELAY', 30))
+    JOB_LOCK_TIMEOUT = int(os.getenv('JOB_LOCK_TIMEOUT', 300))
+    WORKER_POLL_INTERVAL = int(os.getenv('WORKER_POLL_INTERVAL', 5))
+    EVENT_STREAM_POLLING = os.getenv('EVENT_STREAM_POLLING', 'True').lower() == 'true'
+    TICKET_EVENT_POLL_INTERVAL = float(os.getenv('TICKET_EVENT_POLL_INTERVAL', 1))
+    TICKET_EVENT_KEEPALIVE_INTERVAL = int(os.getenv('TICKET_EVENT_KEEPALIVE_INTERVAL', 15))
+    TICKET_EVENT_RETENTION_MINUTES = int(os.getenv('TICKET_EVENT_RETENTION_MINUTES', 60))
+    QR_CODE_CACHE_SIZE = int(os.getenv('QR_CODE_CACHE_SIZE', 256))
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000000')
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+    LOGIN_ATTEMPTS_PER_IP = int(os.getenv('LOGIN_ATTEMPTS_PER_IP', 20))
+    LOGIN_ATTEMPTS_PER_ACCOUNT = int(os.getenv('LOGIN_ATTEMPTS_PER_ACCOUNT', 5))
+    LOGIN_ATTEMPT_WINDOW = int(os.getenv('LOGIN_ATTEMPT_WINDOW', 300))
+    TRUSTED_PROXIES = int(os.getenv('TRUSTED_PROXIES', 0))
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 30))
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 1024))
+    EMAIL_DELIVERABILITY_CHECK = os.getenv('EMAIL_DELIVERABILITY_CHECK', 'inline')
+    EMAIL_TRUSTED_DOMAINS = os.getenv('EMAIL_TRUSTED_DOMAINS', 'recruitment-software.co.uk')
+    EMAIL_DELIVERABILITY_TIMEOUT = int(os.getenv('EMAIL_DELIVERABILITY_TIMEOUT', 5))
+    EMAIL_DOMAIN_CACHE_TTL = int(os.getenv('EMAIL_DOMAIN_CACHE_TTL', 3600))
+    EMAIL_DOMAIN_CACHE_SIZE = int(os.getenv('EMAIL_DOMAIN_CACHE_SIZE', 1024))
+    LIVE_UPDATES = os.getenv('LIVE_UPDATES', 'True').lower() == 'true'
+    TICKET_EVENT_STREAM_TIMEOUT = int(os.getenv('TICKET_EVENT_STREAM_TIMEOUT', 300))
\ No newline at end of file
@@ -12,6 +12,9 @@ class TestConfig:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     WTF_CSRF_ENABLED = False
     DISABLE_2FA = True  # disabled for testing purposes
+    BACKGROUND_JOBS_SYNC = True  # background jobs run within the request for testing purposes
+    EVENT_STREAM_POLLING = False  # the live event stream is polled by the tests rather than a background thread
+    PASSWORD_HASH_METHOD = "scrypt:32768:8:1"  # matches the hashes created by the fixtures, so logging in does not rehash them
 
 @pytest.fixture
 def app():
@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from HelpDesk import db
+from HelpDesk.models import ArchivedStatusCount, ArchivedComment, ArchivedTicket, ArchivedTicketHistory, Comment, Ticket, TicketHistory
+from HelpDesk.utils.archive_helper import archive_closed_tickets
+from HelpDesk.utils.search_helper import rebuild_search_index
+from HelpDesk.utils.status_count_helper import get_status_counts, rebuild_status_counts
+from HelpDesk.utils.user_list_helper import ticket_counts
+
+def add_closed_tickets(user, count, closed_days_ago, status="Closed"):
+    tickets = [
+        Ticket(
+            ticket_type="Bug Report",
+            subject=f"Archive Ticket {i}",
+            description="Archive Description",
+            status=status,
+            priority="Low",
+            estimated_time=1.00,
+            created_by="Admin User",
+            user_id=user.id,
+            date_created=datetime.now() - timedelta(days=closed_days_ago + 1),
+            date_updated=datetime.now() - timedelta(days=closed_days_ago)
+        )
+        for i in range(count)
+    ]
+    db.session.add_all(tickets)
+    db.session.flush()
+    for ticket in tickets:
+        db.session.add(Comment(comment_text=f"Archived comment {ticket.id}", created_by="Admin User", ticket_id=ticket.id))
+        db.session.add(TicketHistory(ticket_id=ticket.id, field="status", old_value="Open", new_value="Closed", changed_by="Admin User"))
+    db.session.commit()
+    return [ticket.id for ticket in tickets]
+
+# Tests that the archive command moves old closed tickets with their comments and history, and leaves the dashboard counts unchanged
+def test_archive_closed_tickets_command(app, admin_user):
+    with app.app_context():
+        old_ids = add_closed_tickets(admin_user, 5, 400)
+        recent_ids = add_closed_tickets(admin_user, 2, 10)
+        open_ids = add_closed_tickets(admin_user, 1, 400, status="Open")
+        counts = get_status_counts(admin_user)
+
+    result = app.test_cli_runner().invoke(args=["archive-closed-tickets", "--batch-size", "2"])
+
+    assert "Archived 5 closed ticket(s)." in result.output
+    with app.app_context():
+        assert sorted(row.id for row in db.session.query(Ticket.id)) == sorted(recent_ids + open_ids)
+        assert sorted(row.id for row in db.session.query(ArchivedTicket.id)) == old_ids
+        assert ArchivedComment.query.count() == 5 and Comment.query.count() == 3
+        assert ArchivedTicketHistory.query.count() == 5 and TicketHistory.query.count() == 3
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            assert get_status_counts(admin_user) == counts
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+        # The archive's counts are read from archived_status_count rather than aggregated from the archive
+        assert not any("FROM archived_ticket" in statement for statement in statements)
+        assert db.session.get(ArchivedStatusCount, (0, "Closed")).ticket_count == 5
+
+        app.config["USE_STATUS_COUNTERS"] = True
+        rebuild_status_counts()
+        assert get_status_counts(admin_user) == counts
+
+# Tests that the users page counts archived tickets, so archiving does not change a user's reported and assigned counts
+def test_user_ticket_counts_include_archive(app, admin_user, non_admin_user):
+    ticket_ids = add_closed_tickets(non_admin_user, 3, 400) + add_closed_tickets(non_admin_user, 1, 1)
+    db.session.query(Ticket).filter(Ticket.id.in_(ticket_ids[:2])).update({"assignee_id": admin_user.id}, synchronize_session=False)
+    db.session.commit()
+    counts = ticket_counts([admin_user.id, non_admin_user.id])
+    assert counts == {admin_user.id: (0, 2), non_admin_user.id: (4, 0)}
+
+    assert archive_closed_tickets() == 3
+    assert ticket_counts([admin_user.id, non_admin_user.id]) == counts
+
+# Tests that archived tickets are only listed when the archive is requested, and can be found by searching it
+def test_home_lists_archived_tickets_on_demand(app, logged_in_admin, admin_user, parse_ticket_table_rows):
+    with app.app_context():
+        add_closed_tickets(admin_user, 1, 400)
+        rebuild_search_index()
+    app.test_cli_runner().invoke(args=["archive-closed-tickets"])
+
+    response = logged_in_admin.get("/")
+    assert parse_ticket_table_rows(response) == []
+
+    response = logged_in_admin.get("/?archived=1")
+    assert b"Archived Tickets" in response.data
+    assert [row[1] for row in parse_ticket_table_rows(response)] == ["Archive Ticket 0"]
+    assert b'name="ticket_ids"' not in response.data
+
+    response = logged_in_admin.get("/?archived=1&q=archived+comment")
+    assert [row[1] for row in parse_ticket_table_rows(response)] == ["Archive Ticket 0"]
+    response = logged_in_admin.get("/?q=archived+comment")
+    assert parse_ticket_table_rows(response) == []
+
+    response = logged_in_admin.get("/export_tickets?format=ndjson&archived=1")
+    assert "Archive Ticket 0" in response.get_data(as_text=True)
+
+# Tests that an archived ticket is shown read-only on the ticket details page, with its comments and history
+def test_archived_ticket_details_are_read_only(app, logged_in_admin, admin_user):
+    with app.app_context():
+        ticket_id = add_closed_tickets(admin_user, 1, 400)[0]
+    app.test_cli_runner().invoke(args=["archive-closed-tickets"])
+
+    response = logged_in_admin.get(f"/ticket_details/{ticket_id}")
+    assert response.status_code == 200
+    assert b"is read-only" in response.data
+    assert f"Archived comment {ticket_id}".encode() in response.data
+    assert b"History" in response.data
+    assert b'id="editBtn"' not in response.data
+    assert b'name="comment_text"' not in response.data
+
+    response = logged_in_admin.post(f"/ticket_details/{ticket_id}", data={"comment_text": "Reopened?"}, follow_redirects=True)
+    assert b"This ticket has been archived and cannot be changed." in response.data
+    with app.app_context():
+        assert ArchivedComment.query.count() == 1 and Comment.query.count() == 0
+
+    response = logged_in_admin.get(f"/ticket_details/{ticket_id}/comments")
+    assert response.status_code == 200
+
+# Tests that non-admin users cannot view other users' archived tickets or unarchive their own
+def test_archived_ticket_permissions(app, logged_in_non_admin, admin_user, non_admin_user):
+    with app.app_context():
+        admin_ticket_id = add_closed_tickets(admin_user, 1, 400)[0]
+        own_ticket_id = add_closed_tickets(non_admin_user, 1, 400)[0]
+    app.test_cli_runner().invoke(args=["archive-closed-tickets"])
+
+    response = logged_in_non_admin.get(f"/ticket_details/{admin_ticket_id}", follow_redirects=True)
+    assert b"You do not have permission to view this ticket." in response.data
+    assert logged_in_non_admin.get(f"/ticket_details/{admin_ticket_id}/comments").status_code == 403
+
+    response = logged_in_non_admin.post(f"/unarchive_ticket/{own_ticket_id}", follow_redirects=True)
+    assert b"You do not have permission to unarchive tickets." in response.data
+
+# Tests that unarchiving moves the ticket back with its comments and history, and that archived ticket ids are never reused
+def test_unarchive_ticket(app, logged_in_admin, admin_user):
+    with app.app_context():
+        ticket_id = add_closed_tickets(admin_user, 1, 400)[0]
+    app.test_cli_runner().invoke(args=["archive-closed-tickets"])
+
+    with app.app_context():
+        new_ticket_id = add_closed_tickets(admin_user, 1, 0)[0]
+        assert new_ticket_id > ticket_id
+
+    with app.app_context():
+        counts = get_status_counts(admin_user)
+    response = logged_in_admin.post(f"/unarchive_ticket/{ticket_id}", follow_redirects=True)
+
+    assert b"Ticket unarchived successfully." in response.data
+    assert b'id="editBtn"' in response.data
+    with app.app_context():
+        assert db.session.get(Ticket, ticket_id) is not None
+        assert Comment.query.filter_by(ticket_id=ticket_id).count() == 1
+        assert TicketHistory.query.filter_by(ticket_id=ticket_id).count() == 1
+        assert ArchivedTicket.query.count() == 0 and ArchivedComment.query.count() == 0
+        assert get_status_counts(admin_user) == counts
+        assert {row.ticket_count for row in ArchivedStatusCount.query} == {0}
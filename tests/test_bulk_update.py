@@ -0,0 +1,97 @@
+from sqlalchemy import event
+from HelpDesk import db
+from HelpDesk.models import Ticket, TicketHistory
+from HelpDesk.utils.status_count_helper import rebuild_status_counts
+
+def create_tickets(user, count, status="Open"):
+    tickets = [
+        Ticket(
+            ticket_type="Support Request",
+            subject=f"Queue Ticket {i}",
+            description="Morning queue",
+            status=status,
+            priority="Low",
+            estimated_time=1.00,
+            created_by="NonAdmin User",
+            user_id=user.id
+        )
+        for i in range(count)
+    ]
+    db.session.add_all(tickets)
+    db.session.commit()
+    return [ticket.id for ticket in tickets]
+
+# Tests that a bulk change is applied to every selected ticket with a single UPDATE and recorded in each ticket's history
+def test_bulk_update_selected_tickets(app, logged_in_admin, admin_user, non_admin_user):
+    app.config["USE_STATUS_COUNTERS"] = True
+    ticket_ids = create_tickets(non_admin_user, 30)
+    rebuild_status_counts()
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = logged_in_admin.post("/bulk_update_tickets", data={
+            "ticket_ids": [str(ticket_id) for ticket_id in ticket_ids[:20]],
+            "status": "In Progress",
+            "assignee_id": str(admin_user.id),
+            "priority": ""
+        })
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert response.status_code == 302
+    assert len([s for s in statements if s.lstrip().upper().startswith("UPDATE TICKET ")]) == 1
+
+    response = logged_in_admin.get("/")
+    assert b"20 ticket(s) updated successfully." in response.data
+    assert b'<h3 class="fw-bold text-warning">20</h3>' in response.data
+    assert rebuild_status_counts() == 0
+
+    updated = Ticket.query.filter(Ticket.id.in_(ticket_ids[:20])).all()
+    assert {(t.status, t.priority, t.assignee_id, t.updated_by, t.version) for t in updated} == {
+        ("In Progress", "Low", admin_user.id, "Admin User", 2)
+    }
+    assert len({t.date_updated for t in updated}) == 1
+    assert Ticket.query.filter(Ticket.id.in_(ticket_ids[20:]), Ticket.status == "Open").count() == 10
+    assert TicketHistory.query.filter_by(field="status").count() == 20
+    assert TicketHistory.query.filter_by(field="priority").count() == 0
+
+# Tests that tickets which already have the new values are not changed
+def test_bulk_update_skips_unchanged_tickets(app, logged_in_admin, non_admin_user):
+    ticket_ids = create_tickets(non_admin_user, 2, status="Closed")
+
+    response = logged_in_admin.post("/bulk_update_tickets", data={
+        "ticket_ids": [str(ticket_id) for ticket_id in ticket_ids],
+        "status": "Closed"
+    }, follow_redirects=True)
+
+    assert b"No changes have been made." in response.data
+    assert Ticket.query.filter(Ticket.date_updated.isnot(None)).count() == 0
+
+# Tests that invalid values and non-admin users are rejected
+def test_bulk_update_validation(app, logged_in_admin, non_admin_user):
+    ticket_ids = create_tickets(non_admin_user, 1)
+
+    response = logged_in_admin.post("/bulk_update_tickets", data={"ticket_ids": [str(ticket_ids[0])], "status": "Deleted"}, follow_redirects=True)
+    assert b"Please select a valid status." in response.data
+
+    response = logged_in_admin.post("/bulk_update_tickets", data={"ticket_ids": [str(ticket_ids[0])], "assignee_id": str(non_admin_user.id)}, follow_redirects=True)
+    assert b"Please select a valid assignee." in response.data
+
+    response = logged_in_admin.post("/bulk_update_tickets", data={"status": "Closed"}, follow_redirects=True)
+    assert b"You have not selected any tickets to update." in response.data
+
+# Tests that non-admin users cannot bulk update tickets
+def test_non_admin_cannot_bulk_update(logged_in_non_admin, non_admin_ticket):
+    response = logged_in_non_admin.post("/bulk_update_tickets", data={
+        "ticket_ids": [str(non_admin_ticket.id)],
+        "status": "Closed"
+    }, follow_redirects=True)
+
+    assert b"You do not have permission to update tickets." in response.data
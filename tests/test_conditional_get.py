@@ -0,0 +1,75 @@
+from HelpDesk import db
+from HelpDesk.models import Ticket
+
+# Tests that the home page returns 304 Not Modified until a visible ticket changes
+def test_home_not_modified(logged_in_admin, admin_ticket, app):
+    response = logged_in_admin.get("/")
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+    assert "no-cache" in response.headers["Cache-Control"]
+
+    response = logged_in_admin.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+    logged_in_admin.post("/create_ticket", data={
+        "ticket_type": "Bug Report",
+        "subject": "Another Ticket",
+        "description": "Another Description",
+        "status": "Open",
+        "priority": "Low",
+        "estimated_time": 2.00
+    })
+
+    # The redirect after creating the ticket displays a flash message, which must not be answered with a 304
+    response = logged_in_admin.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert b"Another Ticket" in response.data
+
+# Tests that the validator differs between filters
+def test_home_validator_varies_by_filter(logged_in_admin, admin_ticket):
+    response = logged_in_admin.get("/")
+    etag = response.headers["ETag"]
+
+    response = logged_in_admin.get("/?status=Open", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+# Tests that the ticket details page returns 304 until a comment is added or the ticket is edited
+def test_ticket_details_not_modified(logged_in_admin, admin_ticket, app):
+    url = f"/ticket_details/{admin_ticket.id}"
+    etag = logged_in_admin.get(url).headers["ETag"]
+    assert logged_in_admin.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    logged_in_admin.post(url, data={"comment_text": "New comment"}, follow_redirects=True)
+    response = logged_in_admin.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    with app.app_context():
+        db.session.query(Ticket).filter_by(id=admin_ticket.id).update({"assignee_id": admin_ticket.user_id})
+        db.session.commit()
+    assert logged_in_admin.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+# Tests that deleting and restoring a ticket, which changes its version but not its update time, changes the validator,
+# so the browser does not keep an edit form holding the old version
+def test_ticket_details_validator_includes_version(logged_in_admin, admin_ticket):
+    url = f"/ticket_details/{admin_ticket.id}"
+    etag = logged_in_admin.get(url).headers["ETag"]
+
+    logged_in_admin.post(f"/delete_ticket/{admin_ticket.id}")
+    logged_in_admin.post(f"/restore_ticket/{admin_ticket.id}")
+    logged_in_admin.get("/")
+
+    response = logged_in_admin.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert b'name="version" value="3"' in response.data
+
+# Tests that the users page returns 304 until a user's role changes
+def test_users_not_modified(logged_in_admin, non_admin_user):
+    etag = logged_in_admin.get("/users").headers["ETag"]
+    assert logged_in_admin.get("/users", headers={"If-None-Match": etag}).status_code == 304
+
+    logged_in_admin.post("/update_admin",
+        data={"user_ids": [str(non_admin_user.id)], f"is_admin_{non_admin_user.id}": "on"},
+        follow_redirects=True)
+    assert logged_in_admin.get("/users", headers={"If-None-Match": etag}).status_code == 200
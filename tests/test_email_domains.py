@@ -0,0 +1,62 @@
+import dns.resolver
+import pytest
+from email_validator import EmailUndeliverableError
+from HelpDesk.models import User
+from HelpDesk.utils import email_domain_helper
+
+def register(client, email):
+    return client.post("/register", data={
+        "email": email,
+        "forename": "New",
+        "surname": "User",
+        "password": "Password123!",
+        "password_confirm": "Password123!"
+    }, follow_redirects=True)
+
+@pytest.fixture
+def lookups(monkeypatch):
+    lookups = []
+
+    def validate_email_deliverability(domain, domain_i18n, timeout=None):
+        lookups.append(domain)
+        if domain == "nowhere.example":
+            raise EmailUndeliverableError(f"The domain name {domain} does not exist.") from dns.resolver.NXDOMAIN()
+        if domain == "unreachable.example":
+            # email_validator reports a DNS timeout (or a failure of every nameserver) in its result rather than raising
+            return {"unknown-deliverability": "timeout"}
+        return {"mx": [(10, f"mail.{domain}")], "mx_fallback_type": None}
+
+    monkeypatch.setattr(email_domain_helper, "validate_email_deliverability", validate_email_deliverability)
+    return lookups
+
+# Tests that registering with a trusted domain does not look the domain up
+def test_trusted_domain_is_not_looked_up(app, client, lookups):
+    register(client, "newuser@recruitment-software.co.uk")
+    assert User.query.filter_by(email="newuser@recruitment-software.co.uk").count() == 1
+    assert lookups == []
+
+# Tests that an undeliverable domain is rejected, and that each domain's result is cached
+def test_domain_results_are_cached(app, client, lookups):
+    for _ in range(2):
+        response = register(client, "newuser@nowhere.example")
+        assert b"The domain name nowhere.example does not exist." in response.data
+    register(client, "first@example.com")
+    register(client, "second@Example.com")
+
+    assert lookups == ["nowhere.example", "example.com"]
+    assert User.query.filter(User.email.in_(["first@example.com", "second@Example.com"])).count() == 2
+
+# Tests that a failed lookup allows the registration and is not cached
+def test_failed_lookup_is_allowed(app, client, lookups):
+    register(client, "first@unreachable.example")
+    register(client, "second@unreachable.example")
+    assert lookups == ["unreachable.example", "unreachable.example"]
+    assert User.query.filter(User.email.like("%@unreachable.example")).count() == 2
+
+# Tests that the domain is checked after the account is created when the check is made in the background
+def test_background_check(app, client, lookups, caplog):
+    app.config["EMAIL_DELIVERABILITY_CHECK"] = "background"
+    response = register(client, "newuser@nowhere.example")
+    assert b"Account created successfully." in response.data
+    assert lookups == ["nowhere.example"]
+    assert "registered with an email address that cannot receive email" in caplog.text
@@ -0,0 +1,170 @@
+import json
+from sqlalchemy import event
+from HelpDesk import db
+from HelpDesk.models import TicketEvent, User
+from HelpDesk.utils.event_stream_helper import RELOAD, get_broadcaster
+
+def edit_ticket(client, ticket, **changes):
+    data = {
+        "ticket_type": ticket.ticket_type,
+        "subject": ticket.subject,
+        "description": ticket.description,
+        "status": ticket.status,
+        "priority": ticket.priority,
+        "estimated_time": ticket.estimated_time,
+        "assignee_id": ""
+    }
+    data.update(changes)
+    return client.post(f"/ticket_details/{ticket.id}", data=data)
+
+def read_event(response_iterator):
+    for chunk in response_iterator:
+        chunk = chunk.decode()
+        if chunk.startswith("id:"):
+            lines = dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+            return int(lines["id"]), json.loads(lines["data"])
+        if chunk.startswith("event: reload"):
+            return None, "reload"
+
+# Tests that ticket changes are recorded as compact events with only the fields shown on the home page
+def test_ticket_changes_are_recorded(app, logged_in_admin, non_admin_ticket):
+    edit_ticket(logged_in_admin, non_admin_ticket, status="Resolved", priority="Low")
+    logged_in_admin.post(f"/ticket_details/{non_admin_ticket.id}", data={"comment_text": "Done"})
+    logged_in_admin.post(f"/delete_ticket/{non_admin_ticket.id}")
+
+    with app.app_context():
+        events = [(row.event_type, row.user_id, json.loads(row.data)) for row in TicketEvent.query.order_by(TicketEvent.id)]
+    assert events == [
+        ("updated", non_admin_ticket.user_id, {"status": "Resolved", "priority": "Low", "old_status": "Open"}),
+        ("commented", non_admin_ticket.user_id, {}),
+        ("deleted", non_admin_ticket.user_id, {"status": "Resolved"})
+    ]
+
+# Tests that new events are fanned out to every connected browser with a fixed number of database queries (one for the events
+# and one for the subscribers' roles), and that users only see their own tickets
+def test_poll_fans_out_to_subscribers(app, logged_in_admin, admin_user, non_admin_user, admin_ticket, non_admin_ticket):
+    broadcaster = get_broadcaster()
+    broadcaster.poll()
+    administrators = [broadcaster.subscribe(admin_user.id, True) for _ in range(3)]
+    reporter = broadcaster.subscribe(non_admin_user.id, False)
+
+    edit_ticket(logged_in_admin, admin_ticket, status="Closed")
+    edit_ticket(logged_in_admin, non_admin_ticket, status="Closed")
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        assert broadcaster.poll() == 2
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert len(statements) == 2
+    for subscription in administrators:
+        assert [subscription.queue.get_nowait()["ticket_id"] for _ in range(2)] == [admin_ticket.id, non_admin_ticket.id]
+    assert reporter.queue.get_nowait()["ticket_id"] == non_admin_ticket.id
+    assert reporter.queue.empty()
+
+# Tests that the event stream sends the user's events as Server-Sent Events
+def test_event_stream(app, logged_in_admin, admin_ticket):
+    get_broadcaster().poll()
+    response = logged_in_admin.get("/events", buffered=False)
+    assert response.mimetype == "text/event-stream"
+    stream = iter(response.response)
+    assert next(stream).decode().startswith("retry:")
+
+    edit_ticket(logged_in_admin, admin_ticket, subject="Live Subject")
+    get_broadcaster().poll()
+
+    event_id, data = read_event(stream)
+    assert data == {"id": event_id, "type": "updated", "ticket_id": admin_ticket.id, "subject": "Live Subject"}
+    response.close()
+    assert not get_broadcaster().subscribers
+
+# Tests that a reconnecting browser is sent the events it missed, or told to reload if they are no longer buffered
+def test_reconnect_replays_missed_events(app, logged_in_admin, admin_user, admin_ticket):
+    broadcaster = get_broadcaster()
+    broadcaster.poll()
+    edit_ticket(logged_in_admin, admin_ticket, priority="High")
+    edit_ticket(logged_in_admin, admin_ticket, priority="Normal")
+    broadcaster.poll()
+    first_id = broadcaster.recent[0]["id"]
+
+    subscription = broadcaster.subscribe(admin_user.id, True, last_event_id=first_id)
+    assert subscription.queue.get_nowait()["priority"] == "Normal"
+    assert subscription.queue.empty()
+
+    subscription = broadcaster.subscribe(admin_user.id, True, last_event_id=first_id - 5)
+    assert subscription.queue.get_nowait() is RELOAD
+
+# Tests that the stream closes after TICKET_EVENT_STREAM_TIMEOUT so that a browser does not hold a worker indefinitely
+def test_event_stream_closes_after_timeout(app, logged_in_admin):
+    app.config["TICKET_EVENT_STREAM_TIMEOUT"] = 0.2
+    response = logged_in_admin.get("/events", buffered=False)
+    chunks = [chunk.decode() for chunk in response.response]
+
+    assert chunks == ["retry: 5000\n\n"]
+    assert not get_broadcaster().subscribers
+
+# Tests that the live event stream can be turned off, e.g. when the server uses synchronous workers
+def test_live_updates_can_be_disabled(app, logged_in_admin):
+    app.config["LIVE_UPDATES"] = False
+    assert logged_in_admin.get("/events").status_code == 404
+    assert b"new EventSource" not in logged_in_admin.get("/").data
+
+# Tests that a browser whose user is demoted or marked for deletion after connecting is told to reload instead of being sent events
+def test_role_changes_close_streams(app, logged_in_admin, admin_user, non_admin_user, admin_ticket, non_admin_ticket):
+    broadcaster = get_broadcaster()
+    broadcaster.poll()
+    demoted = broadcaster.subscribe(non_admin_user.id, True)
+    deleted = broadcaster.subscribe(non_admin_user.id, False)
+    administrator = broadcaster.subscribe(admin_user.id, True)
+
+    with app.app_context():
+        user = db.session.get(User, non_admin_user.id)
+        user.pending_deletion = True
+        db.session.commit()
+    edit_ticket(logged_in_admin, non_admin_ticket, status="Closed")
+    broadcaster.poll()
+
+    assert demoted.queue.get_nowait() is RELOAD and demoted.queue.empty()
+    assert deleted.queue.get_nowait() is RELOAD and deleted.queue.empty()
+    assert administrator.queue.get_nowait()["ticket_id"] == non_admin_ticket.id
+    assert broadcaster.subscribers == {administrator}
+
+# Tests that an event whose id was skipped because its transaction committed late is still sent, and replayed in the order it was read
+def test_events_committed_out_of_order(app, admin_user, admin_ticket, monkeypatch):
+    broadcaster = get_broadcaster()
+    broadcaster.poll()
+    subscription = broadcaster.subscribe(admin_user.id, True)
+    first_id = broadcaster.last_id + 1
+
+    def add_event(event_id, subject):
+        db.session.add(TicketEvent(id=event_id, event_type="updated", ticket_id=admin_ticket.id, user_id=admin_user.id, data=json.dumps({"subject": subject})))
+        db.session.commit()
+
+    add_event(first_id + 1, "Committed First")
+    assert broadcaster.poll() == 1
+    assert list(broadcaster.missing) == [first_id]
+
+    add_event(first_id, "Committed Late")
+    assert broadcaster.poll() == 1
+    assert not broadcaster.missing
+    assert [subscription.queue.get_nowait()["subject"] for _ in range(2)] == ["Committed First", "Committed Late"]
+
+    reconnected = broadcaster.subscribe(admin_user.id, True, last_event_id=first_id + 1)
+    assert reconnected.queue.get_nowait()["subject"] == "Committed Late"
+    assert reconnected.queue.empty()
+
+    # Ids that never appear (e.g. from rolled back transactions) are forgotten after MISSING_EVENT_TIMEOUT
+    monkeypatch.setattr("HelpDesk.utils.event_stream_helper.MISSING_EVENT_TIMEOUT", 0)
+    add_event(first_id + 3, "Gap")
+    broadcaster.poll()
+    assert list(broadcaster.missing) == [first_id + 2]
+    broadcaster.poll()
+    assert not broadcaster.missing
@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+
+# Tests that the CSV export applies the home page filters
+def test_export_csv_with_filters(logged_in_non_admin, tickets_for_filtering):
+    response = logged_in_non_admin.get("/export_tickets?format=csv&status=Closed")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert "attachment" in response.headers["Content-Disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row["subject"] for row in rows] == ["Bug Ticket"]
+    assert rows[0]["assignee"] == ""
+
+# Tests that the NDJSON export is restricted to the user's own tickets
+def test_export_ndjson_scoped_to_user(logged_in_non_admin, non_admin_ticket, admin_ticket):
+    response = logged_in_non_admin.get("/export_tickets?format=ndjson")
+
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+    assert [line["subject"] for line in lines] == [non_admin_ticket.subject]
+    assert lines[0]["estimated_time"] == 8.0
+
+# Tests that the export is streamed rather than built in memory
+def test_export_is_streamed(logged_in_admin, admin_ticket):
+    response = logged_in_admin.get("/export_tickets?format=csv", buffered=False)
+
+    assert response.is_streamed
+    chunks = list(response.response)
+    assert chunks[0].startswith(b"id,ticket_type,subject")
+    response.close()
+
+# Tests that values that spreadsheets would treat as formulas are escaped
+def test_export_csv_escapes_formulas(logged_in_admin):
+    logged_in_admin.post("/create_ticket", data={
+        "ticket_type": "Bug Report",
+        "subject": "=HYPERLINK(\"http://example.com\")",
+        "description": "Formula",
+        "status": "Open",
+        "priority": "Low",
+        "estimated_time": 2.00
+    })
+
+    response = logged_in_admin.get("/export_tickets?format=csv")
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0]["subject"].startswith("'=")
+
+# Tests that unsupported export formats are rejected
+def test_export_invalid_format(logged_in_admin):
+    response = logged_in_admin.get("/export_tickets?format=xlsx", follow_redirects=True)
+
+    assert b"Tickets can only be exported as CSV or NDJSON." in response.data
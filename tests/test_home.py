@@ -1,6 +1,8 @@
 import pytest
+from datetime import datetime, timedelta
 from HelpDesk import db
 from HelpDesk.models import Ticket
+from HelpDesk.utils.ticket_filter_helper import date_created_range
 
 # Test for homepage greeting when logged in as non-admin user
 def test_homepage_greeting_non_admin(logged_in_non_admin, non_admin_user):
@@ -132,4 +134,25 @@ def test_no_tickets_message(logged_in_non_admin, app):
         db.session.commit()
     response = logged_in_non_admin.get("/", follow_redirects=True)
 
-    assert b"You have not raised any tickets yet" in response.data
\ No newline at end of file
+    assert b"You have not raised any tickets yet" in response.data
+
+# Tests that the date created filters are applied as half-open ranges
+def test_date_created_ranges():
+    now = datetime(2025, 12, 31, 15, 30)
+
+    assert date_created_range('Today', now) == (datetime(2025, 12, 31), datetime(2026, 1, 1))
+    assert date_created_range('Last 7 Days', now) == (datetime(2025, 12, 24, 15, 30), datetime(2026, 1, 1))
+    assert date_created_range('This Month', now) == (datetime(2025, 12, 1), datetime(2026, 1, 1))
+    assert date_created_range('Unknown', now) is None
+
+# Tests that the Today filter excludes tickets created yesterday
+def test_today_filter_excludes_yesterday(logged_in_non_admin, tickets_for_filtering, app, parse_ticket_table_body):
+    with app.app_context():
+        ticket = Ticket.query.filter_by(subject="Bug Ticket").first()
+        ticket.date_created = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(seconds=1)
+        db.session.commit()
+
+    response = logged_in_non_admin.get("/?date_created=Today", follow_redirects=True)
+    table_text = parse_ticket_table_body(response)
+    assert "Support Ticket" in table_text
+    assert "Bug Ticket" not in table_text
@@ -0,0 +1,99 @@
+import pytest
+from bs4 import BeautifulSoup
+from HelpDesk import create_app, db
+from HelpDesk.models import Ticket
+from HelpDesk.utils.pagination_helper import encode_cursor
+from conftest import TestConfig
+
+class KeysetTestConfig(TestConfig):
+    HOME_PAGINATION = 'keyset'
+    HOME_TOTAL_CAP = 20
+
+# The app fixture is overridden in this module so that the home page uses keyset pagination.
+@pytest.fixture
+def app():
+    app = create_app(config_class=KeysetTestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def many_tickets(app, non_admin_user):
+    with app.app_context():
+        tickets = [
+            Ticket(
+                ticket_type="Support Request",
+                subject=f"Paged Ticket {i}",
+                description="Paged Description",
+                status="Open" if i % 2 == 0 else "Closed",
+                priority="High",
+                estimated_time=1.00,
+                created_by=non_admin_user.id,
+                user_id=non_admin_user.id
+            )
+            for i in range(25)
+        ]
+        db.session.add_all(tickets)
+        db.session.commit()
+
+def parse_page(response):
+    soup = BeautifulSoup(response.data, "html.parser")
+    subjects = [row.find_all("td")[1].get_text(strip=True) for row in soup.select("tbody tr")]
+    links = {a.get_text(strip=True): a["href"] for a in soup.select("a.page-link")}
+    total = soup.select("li.page-item.disabled span.page-link")
+    return subjects, links, [t.get_text(strip=True) for t in total]
+
+# Tests that the cursors walk forwards and backwards through the ticket list
+def test_keyset_pagination_next_and_previous(logged_in_non_admin, many_tickets):
+    response = logged_in_non_admin.get("/")
+    first_page, links, _ = parse_page(response)
+    assert first_page == [f"Paged Ticket {i}" for i in range(24, 14, -1)]
+    assert "Previous" not in links
+
+    response = logged_in_non_admin.get(links["Next"])
+    second_page, links, _ = parse_page(response)
+    assert second_page == [f"Paged Ticket {i}" for i in range(14, 4, -1)]
+
+    response = logged_in_non_admin.get(links["Next"])
+    third_page, links, _ = parse_page(response)
+    assert third_page == [f"Paged Ticket {i}" for i in range(4, -1, -1)]
+    assert "Next" not in links
+
+    response = logged_in_non_admin.get(links["Previous"])
+    previous_page, links, _ = parse_page(response)
+    assert previous_page == second_page
+
+# Tests that filters are kept in the cursor links and the total is capped
+def test_keyset_pagination_with_filters(logged_in_non_admin, many_tickets):
+    response = logged_in_non_admin.get("/?status=Open&priority=High")
+    first_page, links, labels = parse_page(response)
+    assert len(first_page) == 10
+    assert "13 tickets" in labels
+    assert "status=Open" in links["Next"]
+
+    response = logged_in_non_admin.get(links["Next"])
+    second_page, links, _ = parse_page(response)
+    assert second_page == ["Paged Ticket 4", "Paged Ticket 2", "Paged Ticket 0"]
+
+    response = logged_in_non_admin.get("/")
+    _, _, labels = parse_page(response)
+    assert "20+ tickets" in labels
+
+# Tests that an invalid cursor falls back to the first page
+def test_keyset_pagination_invalid_cursor(logged_in_non_admin, many_tickets):
+    response = logged_in_non_admin.get("/?cursor=not-a-cursor")
+    first_page, _, _ = parse_page(response)
+
+    assert response.status_code == 200
+    assert first_page[0] == "Paged Ticket 24"
+
+# Tests that a forged cursor with keys that are not ticket ids falls back to the first page
+def test_keyset_pagination_forged_cursor(logged_in_non_admin, many_tickets):
+    for position in [{"after": [1]}, {"before": {"x": 1}}, {"after": "10"}, {"before": True}]:
+        response = logged_in_non_admin.get("/", query_string={"cursor": encode_cursor(position)})
+        first_page, _, _ = parse_page(response)
+
+        assert response.status_code == 200
+        assert first_page[0] == "Paged Ticket 24"
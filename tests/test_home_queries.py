@@ -0,0 +1,73 @@
+import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
+from HelpDesk import db
+from HelpDesk.models import Ticket, User
+
+@pytest.fixture
+def assigned_tickets(app, admin_user, non_admin_user):
+    with app.app_context():
+        assignees = [
+            User(
+                email=f"assignee{i}@recruitment-software.co.uk",
+                forename=f"Assignee{i}",
+                surname="User",
+                is_admin=True
+            )
+            for i in range(20)
+        ]
+        db.session.add_all(assignees)
+        db.session.flush()
+
+        db.session.add_all([
+            Ticket(
+                ticket_type="Support Request",
+                subject=f"Assigned Ticket {i}",
+                description="A" * 400,
+                status="Open",
+                priority="High",
+                estimated_time=1.00,
+                created_by=non_admin_user.id,
+                user_id=non_admin_user.id,
+                assignee_id=assignees[i % len(assignees)].id
+            )
+            for i in range(120)
+        ])
+        db.session.commit()
+
+@contextmanager
+def count_queries(app):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+# Tests that the number of queries on the home page does not grow with the page size
+@pytest.mark.parametrize("per_page", [10, 50, 100])
+def test_home_query_count_independent_of_page_size(logged_in_admin, assigned_tickets, app, parse_ticket_table_rows, per_page):
+    with count_queries(app) as statements:
+        response = logged_in_admin.get(f"/?per_page={per_page}")
+
+    rows = parse_ticket_table_rows(response)
+    assert len(rows) == per_page
+    assert all(row[3].startswith("Assignee") for row in rows)
+    assert len(statements) <= 6, statements
+
+# Tests that the listing does not load the full description text
+def test_home_listing_loads_description_preview(logged_in_admin, assigned_tickets, app, parse_ticket_table_rows):
+    with count_queries(app) as statements:
+        response = logged_in_admin.get("/")
+
+    rows = parse_ticket_table_rows(response)
+    assert len(rows[0][2]) == 100
+    assert rows[0][2].endswith("...")
+    listing = [s for s in statements if "FROM ticket" in s and "LIMIT" in s]
+    assert listing and all("ticket.description AS" not in s for s in listing)
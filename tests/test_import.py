@@ -0,0 +1,104 @@
+import io
+import json
+from HelpDesk.models import Ticket
+from HelpDesk.utils.import_helper import INSERT_COLUMNS, import_tickets
+from HelpDesk.utils.status_count_helper import rebuild_status_counts
+
+CSV_HEADER = "ticket_type,subject,description,status,priority,estimated_time,creator_email,assignee_email,date_created\n"
+
+def csv_file(*rows):
+    return io.StringIO(CSV_HEADER + "".join(row + "\n" for row in rows))
+
+# Tests that valid rows are imported with their creator and assignee resolved from email addresses, and invalid rows are reported
+def test_import_csv_reports_row_errors(app, admin_user, non_admin_user):
+    stream = csv_file(
+        "Bug Report,Imported bug,Old system bug,Open,High,2,NONADMIN@recruitment-software.co.uk,adminuser@recruitment-software.co.uk,2021-03-04 09:30:00",
+        "Support Request,,Missing subject,Open,Low,1,nonadmin@recruitment-software.co.uk,,",
+        "Support Request,Unknown creator,Creator missing,Open,Low,1,nobody@example.com,,",
+        "Support Request,Non-admin assignee,Assignee is not staff,Open,Low,1,nonadmin@recruitment-software.co.uk,nonadmin@recruitment-software.co.uk,",
+        "Feature Request,Imported request,Old system request,Closed,Normal,40,nonadmin@recruitment-software.co.uk,,"
+    )
+
+    result = import_tickets(stream, "csv", batch_size=1)
+
+    assert result.imported == 2
+    assert [row_number for row_number, error in result.errors] == [2, 3, 4]
+    assert result.errors[0][1] == "Subject cannot be blank."
+
+    ticket = Ticket.query.filter_by(subject="Imported bug").one()
+    assert ticket.user_id == non_admin_user.id
+    assert ticket.assignee_id == admin_user.id
+    assert ticket.created_by == "NonAdmin User"
+    assert ticket.date_created.year == 2021
+    assert ticket.version == 1
+
+# Tests that imported tickets are searchable and counted on the dashboard
+def test_import_updates_search_and_counts(app, logged_in_admin, non_admin_user):
+    app.config["USE_STATUS_COUNTERS"] = True
+    rows = [
+        {
+            "ticket_type": "Support Request",
+            "subject": f"Migrated printer ticket {i}",
+            "description": "Printer offline",
+            "status": "Resolved",
+            "priority": "Low",
+            "estimated_time": 1.5,
+            "creator_email": non_admin_user.email
+        }
+        for i in range(5)
+    ]
+    result = import_tickets(io.StringIO(json.dumps(rows)), "json", batch_size=2)
+    assert result == (5, [])
+
+    response = logged_in_admin.get("/?q=printer&per_page=10")
+    assert response.data.count(b"Migrated printer ticket") == 5
+    assert b'<h3 class="fw-bold text-info">5</h3>' in response.data
+    assert rebuild_status_counts() == 0
+
+# Tests that administrators can import an NDJSON file from the home page
+def test_import_endpoint(app, logged_in_admin, non_admin_user):
+    lines = [
+        json.dumps({
+            "ticket_type": "Bug Report", "subject": "Uploaded ticket", "description": "Uploaded",
+            "status": "Open", "priority": "High", "estimated_time": "3", "creator_email": non_admin_user.email
+        }),
+        "not json",
+        json.dumps({"ticket_type": "<b>Unknown</b>", "subject": "Bad type", "description": "Bad", "status": "Open",
+                    "priority": "High", "estimated_time": "3", "creator_email": non_admin_user.email})
+    ]
+    data = {"file": (io.BytesIO("\n".join(lines).encode()), "tickets.ndjson")}
+
+    response = logged_in_admin.post("/import_tickets", data=data, content_type="multipart/form-data", follow_redirects=True)
+
+    assert b"Imported 1 ticket(s)." in response.data
+    assert b"2 row(s) could not be imported." in response.data
+    assert b"Row 2: Row is not valid JSON." in response.data
+    assert b"&lt;b&gt;Unknown&lt;/b&gt;" in response.data
+    with app.app_context():
+        assert Ticket.query.filter_by(subject="Uploaded ticket").count() == 1
+
+# Tests that non-admin users cannot import tickets
+def test_non_admin_cannot_import(logged_in_non_admin):
+    data = {"file": (io.BytesIO(CSV_HEADER.encode()), "tickets.csv")}
+    response = logged_in_non_admin.post("/import_tickets", data=data, content_type="multipart/form-data", follow_redirects=True)
+
+    assert b"You do not have permission to import tickets." in response.data
+
+# Tests that tickets can be imported with the 'flask import-tickets' command
+def test_import_tickets_command(app, non_admin_user, tmp_path):
+    path = tmp_path / "tickets.csv"
+    path.write_text(csv_file("Bug Report,CLI ticket,From the CLI,Open,Low,1,nonadmin@recruitment-software.co.uk,,").getvalue())
+
+    result = app.test_cli_runner().invoke(args=["import-tickets", str(path)])
+
+    assert "Imported 1 ticket(s). 0 row(s) could not be imported." in result.output
+    assert Ticket.query.filter_by(subject="CLI ticket").count() == 1
+
+# Tests that the COPY column list used on Postgres covers every NOT NULL column without a server default,
+# as COPY does not apply the model's Python side defaults
+def test_copy_columns_cover_required_columns():
+    required = {
+        column.name for column in Ticket.__table__.columns
+        if not column.nullable and column.server_default is None and not column.primary_key
+    }
+    assert required <= set(INSERT_COLUMNS)
@@ -0,0 +1,200 @@
+import hashlib
+import hmac
+import json
+import socketserver
+import threading
+from datetime import datetime
+from email import message_from_bytes, policy
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from sqlalchemy import event
+from HelpDesk import db
+from HelpDesk.models import Job
+from HelpDesk.utils import job_queue_helper
+from HelpDesk.utils.job_queue_helper import claim_jobs, retry_delay, run_worker
+
+# The SMTP and HTTP stand-ins below run on local ports in a background thread and record what they receive,
+# so that the worker can be tested end to end without a real mail server or webhook receiver.
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.wfile.write(b"220 localhost\r\n")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.wfile.write(b"250 localhost\r\n")
+            elif command.startswith("RCPT TO"):
+                recipients.append(line.decode().strip()[8:].strip("<>"))
+                self.wfile.write(b"250 OK\r\n")
+            elif command == "DATA":
+                self.wfile.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                data = b""
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line == b".\r\n":
+                        break
+                    data += data_line
+                self.server.messages.append((recipients, message_from_bytes(data, policy=policy.default)))
+                recipients = []
+                self.wfile.write(b"250 OK\r\n")
+            elif command == "QUIT":
+                self.wfile.write(b"221 Bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 OK\r\n")
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append((self.headers, body))
+        self.send_response(self.server.status)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def smtp_server(app):
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SMTPHandler)
+    server.messages = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    app.config.update(MAIL_SERVER="127.0.0.1", MAIL_PORT=server.server_address[1])
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def webhook_server(app):
+    server = HTTPServer(("127.0.0.1", 0), WebhookHandler)
+    server.requests = []
+    server.status = 200
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    app.config.update(WEBHOOK_URLS=[f"http://127.0.0.1:{server.server_address[1]}/hook"], WEBHOOK_SECRET="secret")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+# Tests that ticket changes only queue jobs during the request, and that the worker sends one email per recipient for all of their events
+def test_notifications_are_queued_and_batched(app, logged_in_admin, non_admin_ticket, admin_user, non_admin_user, smtp_server):
+    logged_in_admin.post(f"/ticket_details/{non_admin_ticket.id}", data={
+        "ticket_type": non_admin_ticket.ticket_type,
+        "subject": non_admin_ticket.subject,
+        "description": non_admin_ticket.description,
+        "status": "Resolved",
+        "priority": non_admin_ticket.priority,
+        "estimated_time": non_admin_ticket.estimated_time,
+        "assignee_id": ""
+    })
+    logged_in_admin.post(f"/ticket_details/{non_admin_ticket.id}", data={"comment_text": "Fixed in the latest release."})
+
+    assert smtp_server.messages == []
+    with app.app_context():
+        assert [job.recipient for job in Job.query.filter_by(kind="email")] == [non_admin_user.email] * 2
+
+    result = app.test_cli_runner().invoke(args=["run-worker", "--once"])
+
+    assert "Processed 2 job(s)." in result.output
+    assert len(smtp_server.messages) == 1
+    recipients, message = smtp_server.messages[0]
+    assert recipients == [non_admin_user.email]
+    assert message["Subject"] == "Help Desk: 2 updates"
+    body = message.get_content()
+    assert "has been resolved by Admin User" in body
+    assert "Admin User commented on ticket" in body and "Fixed in the latest release." in body
+    with app.app_context():
+        assert Job.query.count() == 0
+
+# Tests that the webhook receives every event in a single signed request
+def test_webhook_delivery(app, logged_in_admin, admin_user, webhook_server):
+    logged_in_admin.post("/create_ticket", data={
+        "ticket_type": "Bug Report",
+        "subject": "Webhook Ticket",
+        "description": "Webhook Description",
+        "status": "Open",
+        "priority": "High",
+        "estimated_time": "1"
+    })
+
+    app.test_cli_runner().invoke(args=["run-worker", "--once"])
+
+    assert len(webhook_server.requests) == 1
+    headers, body = webhook_server.requests[0]
+    expected_signature = hmac.new(b"secret", body, hashlib.sha256).hexdigest()
+    assert headers["X-HelpDesk-Signature"] == f"sha256={expected_signature}"
+    events = json.loads(body)["events"]
+    assert [event["event"] for event in events] == ["ticket_created"]
+    assert events[0]["subject"] == "Webhook Ticket" and events[0]["actor"] == "Admin User"
+
+# Tests that failed deliveries are retried with an increasing delay and are kept as failed after the last attempt
+def test_failed_delivery_is_retried_with_backoff(app, logged_in_admin, admin_ticket, webhook_server):
+    app.config.update(JOB_RETRY_DELAY=0, JOB_MAX_ATTEMPTS=3)
+    webhook_server.status = 500
+    logged_in_admin.post(f"/delete_ticket/{admin_ticket.id}")
+
+    app.test_cli_runner().invoke(args=["run-worker", "--once"])
+
+    assert len(webhook_server.requests) == 3
+    with app.app_context():
+        job = Job.query.one()
+        assert job.status == "failed" and job.attempts == 3
+        assert "HTTPError" in job.last_error
+
+    with app.test_request_context():
+        app.config["JOB_RETRY_DELAY"] = 30
+        assert [retry_delay(attempts).total_seconds() for attempts in (1, 2, 3)] == [30, 60, 120]
+
+# Tests that a job left running by a worker that stopped is delivered once its lock has expired
+def test_stale_jobs_are_reclaimed(app, webhook_server):
+    with app.app_context():
+        db.session.add(Job(
+            kind="webhook", recipient=app.config["WEBHOOK_URLS"][0], payload=json.dumps({"event": "ticket_created"}),
+            status="running", run_after=datetime(2000, 1, 1), locked_at=datetime(2000, 1, 1)
+        ))
+        db.session.commit()
+
+    app.test_cli_runner().invoke(args=["run-worker", "--once"])
+
+    assert len(webhook_server.requests) == 1
+    with app.app_context():
+        assert Job.query.count() == 0
+
+def add_job(kind="webhook", recipient="http://127.0.0.1/hook"):
+    job = Job(kind=kind, recipient=recipient, payload=json.dumps({"event": "ticket_created"}), run_after=datetime(2000, 1, 1))
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+# Tests that a job whose handler fails with a database error is recorded as failed, and the worker carries on
+def test_database_error_in_handler_is_recorded(app, monkeypatch):
+    def failing_handler(recipient, payloads):
+        db.session.add(Job(kind=None, recipient=recipient, payload="{}", run_after=datetime.now()))
+        db.session.flush()
+
+    monkeypatch.setitem(job_queue_helper.JOB_HANDLERS, "webhook", failing_handler)
+    job_id = add_job()
+
+    assert run_worker(once=True) == 1
+    job = db.session.get(Job, job_id)
+    assert job.status == "pending" and job.attempts == 1
+    assert "IntegrityError" in job.last_error
+
+# Tests that jobs claimed by another worker between selecting and marking the batch are not returned
+def test_claim_only_returns_jobs_marked_by_this_worker(app):
+    first_id, second_id = add_job(), add_job()
+
+    def other_worker_claims(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE job SET status") and "job.id IN" in statement and not conn.info.get("claimed"):
+            conn.info["claimed"] = True
+            cursor.execute("UPDATE job SET status = 'running', locked_at = '2000-01-01 00:00:00.000000' WHERE id = ?", (second_id,))
+
+    event.listen(db.engine, "before_cursor_execute", other_worker_claims)
+    try:
+        jobs = claim_jobs(10)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", other_worker_claims)
+
+    assert [job.id for job in jobs] == [first_id]
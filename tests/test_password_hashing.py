@@ -0,0 +1,43 @@
+from werkzeug.security import check_password_hash, generate_password_hash
+from HelpDesk import db
+from HelpDesk.models import User
+from HelpDesk.utils.password_helper import needs_rehash
+
+def login(client, password):
+    return client.post("/login", data={"email": "nonadmin@recruitment-software.co.uk", "password": password})
+
+# Tests that a password hashed with an outdated method is upgraded to the configured method when the user logs in
+def test_outdated_hash_is_upgraded_on_login(app, client, non_admin_user):
+    user = db.session.get(User, non_admin_user.id)
+    user.password = generate_password_hash("Password123!", method="pbkdf2:sha256:1000")
+    db.session.commit()
+
+    login(client, "WrongPassword1!")
+    db.session.expire_all()
+    assert db.session.get(User, non_admin_user.id).password.startswith("pbkdf2:sha256:1000$")
+
+    login(client, "Password123!")
+    db.session.expire_all()
+    password_hash = db.session.get(User, non_admin_user.id).password
+    assert password_hash.startswith("scrypt:32768:8:1$")
+    assert check_password_hash(password_hash, "Password123!")
+
+# Tests that hashes are compared against the configured method with Werkzeug's default costs filled in
+def test_needs_rehash(app):
+    assert not needs_rehash(generate_password_hash("Password123!"))
+    assert needs_rehash(generate_password_hash("Password123!", method="scrypt:16384:8:1"))
+
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2"
+    assert not needs_rehash(generate_password_hash("Password123!", method="pbkdf2:sha256:1000000"))
+    assert needs_rehash(generate_password_hash("Password123!", method="pbkdf2:sha256:600000"))
+
+# Tests that the benchmark command reports the logins per second for each method
+def test_benchmark_command(app):
+    result = app.test_cli_runner().invoke(args=["benchmark-password-hashing", "pbkdf2:sha256:1000", "scrypt:1024:8:1", "--duration", "0.01"])
+    assert result.exit_code == 0
+    assert "pbkdf2:sha256:1000 " in result.output
+    assert "scrypt:1024:8:1 " in result.output
+
+    result = app.test_cli_runner().invoke(args=["benchmark-password-hashing", "md5", "--duration", "0"])
+    assert result.exit_code != 0
+    assert "Invalid password hash method" in result.output
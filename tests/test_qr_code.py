@@ -0,0 +1,39 @@
+from HelpDesk.utils import qr_code_helper
+
+def start_2fa_setup(client, user):
+    with client.session_transaction() as session:
+        session['pending_2fa_user_id'] = user.id
+    return client.get("/setup_2fa")
+
+# Tests that the 2FA setup page links to the QR code image rather than rendering it inline
+def test_setup_page_links_to_qr_code(client, non_admin_user):
+    response = start_2fa_setup(client, non_admin_user)
+    assert response.status_code == 200
+    assert b'src="/setup_2fa/qr_code.svg"' in response.data
+    assert b"data:image/png" not in response.data
+
+# Tests that the QR code is rendered once, then served from the cache and revalidated by the browser using its ETag
+def test_qr_code_is_cached(client, non_admin_user, monkeypatch):
+    rendered = []
+    render_qr_code = qr_code_helper.render_qr_code
+    monkeypatch.setattr(qr_code_helper, "render_qr_code", lambda uri: rendered.append(uri) or render_qr_code(uri))
+    start_2fa_setup(client, non_admin_user)
+
+    response = client.get("/setup_2fa/qr_code.svg")
+    assert response.status_code == 200
+    assert response.mimetype == "image/svg+xml"
+    assert response.data.startswith(b"<svg")
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    assert client.get("/setup_2fa/qr_code.svg").data == response.data
+    assert client.get("/setup_2fa/qr_code.svg", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+    assert len(rendered) == 1
+    assert "nonadmin%40recruitment-software.co.uk" in rendered[0]
+
+# Tests that the QR code is only available to a user who is part way through setting up 2FA
+def test_qr_code_requires_pending_setup(client, non_admin_user):
+    assert client.get("/setup_2fa/qr_code.svg").status_code == 404
+
+    with client.session_transaction() as session:
+        session['pending_login_2fa_user_id'] = non_admin_user.id
+    assert client.get("/setup_2fa/qr_code.svg").status_code == 404
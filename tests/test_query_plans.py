@@ -0,0 +1,118 @@
+import itertools
+import json
+import os
+import pytest
+from datetime import datetime
+from sqlalchemy import select, text, true, tuple_
+from HelpDesk import create_app, db
+from HelpDesk.models import Comment, Ticket, TicketHistory
+from HelpDesk.utils.ticket_filter_helper import scope_tickets, filter_tickets
+from conftest import TestConfig
+
+# These tests check that the home page, users page and ticket details queries are served by the indexes on Ticket and Comment.
+# They run against SQLite by default. Setting TEST_DATABASE_URL to a Postgres database runs the same checks against Postgres.
+
+class PlanTestConfig(TestConfig):
+    SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URL', 'sqlite:///:memory:')
+
+@pytest.fixture
+def app():
+    app = create_app(config_class=PlanTestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+class PlanUser:
+    def __init__(self, is_admin):
+        self.id = 1
+        self.is_admin = is_admin
+
+FILTER_VALUES = {
+    'ticket_type': 'Bug Report',
+    'status': 'Open',
+    'priority': 'High',
+    'assignee': '1',
+    'date_created': 'Today'
+}
+
+FILTER_COMBINATIONS = [
+    combination
+    for size in range(len(FILTER_VALUES) + 1)
+    for combination in itertools.combinations(FILTER_VALUES, size)
+]
+
+# This function returns the query plan as a list of lines.
+# Postgres would choose sequential scans for the empty test tables, so they are disabled to expose which indexes are usable.
+def explain(query):
+    compiled = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    connection = db.session.connection()
+    if db.engine.dialect.name == 'postgresql':
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}").scalar()
+        plan = rows if isinstance(rows, list) else json.loads(rows)
+        return [json.dumps(plan)]
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").fetchall()
+    return [row[-1] for row in rows]
+
+def uses_index(plan):
+    return any('INDEX' in line.upper() for line in plan)
+
+def full_scan_and_sort(plan):
+    joined = ' '.join(plan)
+    if db.engine.dialect.name == 'postgresql':
+        return 'Seq Scan' in joined and '"Sort"' in joined
+    return 'SCAN ticket' in joined and 'TEMP B-TREE' in joined
+
+# Tests that each combination of home page filters, for both administrators and non-administrators, avoids a full scan and sort
+@pytest.mark.parametrize('is_admin', [True, False])
+@pytest.mark.parametrize('combination', FILTER_COMBINATIONS, ids=lambda c: '+'.join(c) or 'none')
+def test_home_filter_query_plans(app, is_admin, combination):
+    filters = {field: FILTER_VALUES[field] for field in combination}
+    query = filter_tickets(scope_tickets(Ticket.query, PlanUser(is_admin)), filters)
+    plan = explain(query.order_by(Ticket.id.desc()).limit(10))
+
+    assert not full_scan_and_sort(plan), plan
+    if not is_admin or {'status', 'assignee', 'date_created'} & set(combination):
+        assert uses_index(plan), plan
+
+# Tests that the users page ticket counts are served by an index
+@pytest.mark.parametrize('column', [Ticket.user_id, Ticket.assignee_id])
+def test_user_ticket_count_query_plans(app, column):
+    plan = explain(db.session.query(Ticket.id).filter(column == 1))
+
+    assert uses_index(plan), plan
+
+# Tests that the ticket details comment pages are served by an index without sorting
+@pytest.mark.parametrize('before', [None, 1])
+def test_ticket_comments_query_plan(app, before):
+    query = db.session.query(Comment).filter(Comment.ticket_id == 1)
+    if before is not None:
+        before_date = select(Comment.date_created).where(Comment.id == before).scalar_subquery()
+        query = query.filter(tuple_(Comment.date_created, Comment.id) < tuple_(before_date, before))
+    plan = explain(query.order_by(Comment.date_created.desc(), Comment.id.desc()).limit(21))
+
+    assert uses_index(plan), plan
+    assert not any('TEMP B-TREE' in line or '"Sort"' in line for line in plan), plan
+
+# Tests that the ticket history is read from its index without sorting
+def test_ticket_history_query_plan(app):
+    query = db.session.query(TicketHistory).filter(TicketHistory.ticket_id == 1).order_by(TicketHistory.id.desc()).limit(50)
+    plan = explain(query)
+
+    assert uses_index(plan), plan
+    assert not any('TEMP B-TREE' in line or '"Sort"' in line for line in plan), plan
+
+# Tests that the purge finds deleted tickets from the partial deleted_at index
+def test_purge_query_plan(app):
+    query = (
+        db.session.query(Ticket.id)
+        .filter(Ticket.is_deleted == true(), Ticket.deleted_at < datetime(2024, 1, 1))
+        .order_by(Ticket.deleted_at, Ticket.id)
+        .limit(500)
+    )
+    plan = explain(query)
+
+    assert uses_index(plan), plan
+    assert not any('TEMP B-TREE' in line or '"Sort"' in line for line in plan), plan
@@ -0,0 +1,68 @@
+import pytest
+from HelpDesk.models import LoginAttempt
+from HelpDesk.utils import rate_limit_helper
+
+def login(client, email, password="WrongPassword1!", ip="127.0.0.1"):
+    return client.post("/login", data={"email": email, "password": password}, environ_base={"REMOTE_ADDR": ip})
+
+@pytest.fixture
+def count_hash_checks(monkeypatch):
+    checks = []
+    import HelpDesk.views.auth as auth
+    verify_password = auth.verify_password
+    monkeypatch.setattr(auth, "verify_password", lambda user, password: checks.append(user.id) or verify_password(user, password))
+    return checks
+
+# Tests that attempts over the account limit are rejected before the password hash is checked, from any IP address
+@pytest.mark.parametrize("backend", ["memory", "database"])
+def test_account_limit(app, client, non_admin_user, count_hash_checks, backend):
+    app.config.update(RATE_LIMIT_BACKEND=backend, LOGIN_ATTEMPTS_PER_ACCOUNT=3)
+    for attempt in range(3):
+        assert login(client, non_admin_user.email, ip=f"10.0.0.{attempt}").status_code == 200
+
+    response = login(client, non_admin_user.email, password="Password123!", ip="10.0.0.9")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    assert b"Too many attempts. Please try again in 5 minutes." in response.data
+    assert len(count_hash_checks) == 3
+
+    if backend == "database":
+        assert LoginAttempt.query.count() == 6
+
+# Tests that failed attempts from one IP address are limited across accounts, that successful logins are not counted against
+# the IP address, and that a successful login clears the account's attempts
+@pytest.mark.parametrize("backend", ["memory", "database"])
+def test_ip_limit_counts_failed_attempts(app, client, non_admin_user, admin_user, backend):
+    app.config.update(RATE_LIMIT_BACKEND=backend, LOGIN_ATTEMPTS_PER_IP=3, LOGIN_ATTEMPTS_PER_ACCOUNT=2)
+    for _ in range(5):
+        assert login(client, non_admin_user.email, password="Password123!").status_code == 302
+        client.post("/logout")
+
+    login(client, non_admin_user.email)
+    login(client, non_admin_user.email, password="Password123!")
+    client.post("/logout")
+    assert login(client, non_admin_user.email).status_code == 200
+
+    login(client, "unknown@recruitment-software.co.uk")
+    assert login(client, admin_user.email, password="Password123!").status_code == 429
+    assert login(client, admin_user.email, password="Password123!", ip="10.0.0.1").status_code == 302
+
+# Tests that the window slides, so attempts are admitted again once the oldest attempts have expired
+def test_sliding_window():
+    limiter = rate_limit_helper.MemoryRateLimitBackend()
+    limits = [("ip:10.0.0.1", 2)]
+    assert limiter.admit(limits, 60, now=0) == 0
+    assert limiter.admit(limits, 60, now=30) == 0
+    assert limiter.admit(limits, 60, now=45) == 15
+    assert limiter.admit(limits, 60, now=61) == 0
+    assert limiter.admit(limits, 60, now=62) == 28
+
+# Tests that 2FA codes are rate limited for each pending user
+def test_2fa_codes_are_limited(app, client, non_admin_user):
+    app.config.update(LOGIN_ATTEMPTS_PER_ACCOUNT=2)
+    with client.session_transaction() as session:
+        session["pending_2fa_user_id"] = non_admin_user.id
+    client.get("/setup_2fa")
+    for _ in range(2):
+        assert client.post("/setup_2fa", data={"token": "000000"}).status_code == 200
+    assert client.post("/setup_2fa", data={"token": "000000"}).status_code == 429
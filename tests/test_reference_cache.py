@@ -0,0 +1,61 @@
+from bs4 import BeautifulSoup
+from sqlalchemy import event
+from HelpDesk import db
+from HelpDesk.models import User
+from HelpDesk.utils.reference_cache_helper import bump_reference_version
+
+def assignee_options(response):
+    soup = BeautifulSoup(response.data, "html.parser")
+    select = soup.find("select", {"name": "assignee_id"})
+    return [option.get_text(strip=True) for option in select.find_all("option")]
+
+# Tests that the administrator list is only queried once while the reference data version is unchanged
+def test_administrators_cached_between_requests(logged_in_admin, admin_ticket, app):
+    # The home page shown after logging in also uses the administrator list, so the cache is cleared first
+    app.extensions.pop("reference_cache", None)
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        logged_in_admin.get(f"/ticket_details/{admin_ticket.id}")
+        logged_in_admin.get(f"/ticket_details/{admin_ticket.id}")
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    administrator_queries = [s for s in statements if "user.is_admin IS 1" in s]
+    assert len(administrator_queries) == 1
+
+# Tests that promoting a user updates the cached administrator list
+def test_promotion_invalidates_administrators(logged_in_admin, admin_ticket, non_admin_user):
+    response = logged_in_admin.get(f"/ticket_details/{admin_ticket.id}")
+    assert "NonAdmin User" not in assignee_options(response)
+
+    logged_in_admin.post("/update_admin",
+        data={"user_ids": [str(non_admin_user.id)], f"is_admin_{non_admin_user.id}": "on"},
+        follow_redirects=True)
+
+    response = logged_in_admin.get(f"/ticket_details/{admin_ticket.id}")
+    assert "NonAdmin User" in assignee_options(response)
+
+# Tests that a version change made by another worker is picked up on the next request
+def test_version_change_from_another_worker(logged_in_admin, admin_ticket, non_admin_user, app):
+    logged_in_admin.get(f"/ticket_details/{admin_ticket.id}")
+
+    with app.app_context():
+        db.session.query(User).filter_by(id=non_admin_user.id).update({"is_admin": True})
+        db.session.commit()
+
+    response = logged_in_admin.get(f"/ticket_details/{admin_ticket.id}")
+    assert "NonAdmin User" not in assignee_options(response)
+
+    with app.test_request_context():
+        bump_reference_version()
+        db.session.commit()
+
+    response = logged_in_admin.get(f"/ticket_details/{admin_ticket.id}")
+    assert "NonAdmin User" in assignee_options(response)
@@ -0,0 +1,89 @@
+import sqlite3
+import pytest
+from sqlalchemy import inspect, text
+from HelpDesk import create_app, db
+from HelpDesk.models import Comment, Ticket, User
+from HelpDesk.utils.search_helper import search_results
+from HelpDesk.utils.status_count_helper import get_status_counts
+from conftest import TestConfig
+
+# The schema created by the first release of the application, before any columns, indexes or tables were added.
+ORIGINAL_SCHEMA = """
+CREATE TABLE user (
+    id INTEGER NOT NULL, forename VARCHAR(50), surname VARCHAR(50), email VARCHAR(255), password VARCHAR(255),
+    is_admin BOOLEAN, totp_secret VARCHAR(64), is_2fa_enabled BOOLEAN, date_created DATETIME,
+    PRIMARY KEY (id), UNIQUE (email)
+);
+CREATE TABLE ticket (
+    id INTEGER NOT NULL, ticket_type VARCHAR(20) NOT NULL, subject VARCHAR(255) NOT NULL, description TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL, priority VARCHAR(20) NOT NULL, estimated_time FLOAT NOT NULL, created_by VARCHAR(100) NOT NULL,
+    updated_by VARCHAR(100), date_created DATETIME, date_updated DATETIME, user_id INTEGER, assignee_id INTEGER,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES user (id) ON DELETE SET NULL,
+    FOREIGN KEY(assignee_id) REFERENCES user (id) ON DELETE SET NULL
+);
+CREATE TABLE comment (
+    id INTEGER NOT NULL, comment_text TEXT NOT NULL, created_by VARCHAR(100) NOT NULL, date_created DATETIME,
+    user_id INTEGER, ticket_id INTEGER,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES user (id) ON DELETE SET NULL,
+    FOREIGN KEY(ticket_id) REFERENCES ticket (id) ON DELETE SET NULL
+);
+INSERT INTO user (id, forename, surname, email, password, is_admin) VALUES (1, 'Admin', 'User', 'admin@recruitment-software.co.uk', 'x', 1);
+INSERT INTO ticket (id, ticket_type, subject, description, status, priority, estimated_time, created_by, user_id)
+    VALUES (1, 'Bug Report', 'Printer offline', 'The printer is offline', 'Open', 'High', 1.0, 'Admin User', 1);
+INSERT INTO comment (id, comment_text, created_by, user_id, ticket_id) VALUES (1, 'Restarted it', 'Admin User', 1, 1);
+"""
+
+# The app fixture is overridden in this module so that the application is started against a database with the original schema.
+@pytest.fixture
+def app(tmp_path):
+    path = tmp_path / "helpdesk.db"
+    connection = sqlite3.connect(path)
+    connection.executescript(ORIGINAL_SCHEMA)
+    connection.close()
+
+    class UpgradeTestConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+
+    app = create_app(config_class=UpgradeTestConfig)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+# Tests that the upgrade adds the new columns, indexes and foreign key actions to the existing tables and keeps their rows
+def test_upgrade_database(app):
+    result = app.test_cli_runner().invoke(args=["upgrade-database"])
+    assert result.exit_code == 0, result.output
+    assert "Added column ticket.version" in result.output
+    assert "Added column user.pending_deletion" in result.output
+    assert "Rebuilt table comment" in result.output
+    assert "Created index ix_ticket_user_status_id" in result.output
+
+    inspector = inspect(db.engine)
+    assert {"version", "is_deleted", "deleted_at"} <= {column["name"] for column in inspector.get_columns("ticket")}
+    assert {index.name for index in Ticket.__table__.indexes} <= {index["name"] for index in inspector.get_indexes("ticket")}
+    ticket_foreign_key = next(fk for fk in inspector.get_foreign_keys("comment") if fk["constrained_columns"] == ["ticket_id"])
+    assert ticket_foreign_key["options"]["ondelete"] == "CASCADE"
+
+    ticket = db.session.get(Ticket, 1)
+    assert (ticket.version, ticket.is_deleted) == (1, False)
+    user = db.session.get(User, 1)
+    assert (user.pending_deletion, user.deletion_progress) == (False, 0)
+    assert get_status_counts(user)["Open"] == 1
+    assert db.session.query(search_results("printer")).count() == 1
+
+    # Deleting the ticket now deletes its comments, rather than leaving them without a ticket
+    db.session.execute(text("DELETE FROM ticket WHERE id = 1"))
+    db.session.commit()
+    assert db.session.query(Comment).count() == 0
+
+# Tests that running the upgrade on an up to date database makes no changes
+def test_upgrade_database_twice(app):
+    app.test_cli_runner().invoke(args=["upgrade-database"])
+
+    result = app.test_cli_runner().invoke(args=["upgrade-database"])
+
+    assert result.exit_code == 0, result.output
+    assert "Database upgraded with 0 change(s)" in result.output
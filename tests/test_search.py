@@ -0,0 +1,72 @@
+from HelpDesk import db
+from HelpDesk.models import Comment, Ticket
+from HelpDesk.utils.search_helper import rebuild_search_index
+
+def create_ticket(client, subject, description, status="Open"):
+    return client.post("/create_ticket", data={
+        "ticket_type": "Bug Report",
+        "subject": subject,
+        "description": description,
+        "status": status,
+        "priority": "High",
+        "estimated_time": 2.00
+    }, follow_redirects=True)
+
+def subjects(response, parse_ticket_table_rows):
+    return [row[1] for row in parse_ticket_table_rows(response)]
+
+# Tests that searching matches ticket subjects and descriptions, with subject matches ranked first
+def test_search_subject_and_description(logged_in_admin, parse_ticket_table_rows):
+    create_ticket(logged_in_admin, "Timesheet rejection error", "Adjusted timesheets fail.")
+    create_ticket(logged_in_admin, "Placement booking", "Deleting a booking on PLC-34087 shows an error.")
+    create_ticket(logged_in_admin, "Mailbox naming", "Please rename the form.")
+
+    response = logged_in_admin.get("/?q=error")
+    assert subjects(response, parse_ticket_table_rows) == ["Timesheet rejection error", "Placement booking"]
+
+    response = logged_in_admin.get("/?q=PLC-34087")
+    assert subjects(response, parse_ticket_table_rows) == ["Placement booking"]
+
+# Tests that searching matches comments added to a ticket
+def test_search_comments(logged_in_admin, admin_ticket, parse_ticket_table_rows):
+    logged_in_admin.post(f"/ticket_details/{admin_ticket.id}", data={
+        "comment_text": "Users cannot login this morning"
+    }, follow_redirects=True)
+
+    response = logged_in_admin.get("/?q=login")
+    assert subjects(response, parse_ticket_table_rows) == [admin_ticket.subject]
+
+# Tests that search combines with the filters and is restricted to the user's own tickets
+def test_search_with_filters_and_scoping(logged_in_non_admin, admin_user, app, parse_ticket_table_rows):
+    create_ticket(logged_in_non_admin, "Export template overlap", "Fields overlap.", status="Open")
+    create_ticket(logged_in_non_admin, "Export attachments missing", "Attachments gone.", status="Closed")
+    with app.app_context():
+        db.session.add(Ticket(
+            ticket_type="Bug Report", subject="Export admin ticket", description="Admin only.",
+            status="Open", priority="High", estimated_time=1.00,
+            created_by=admin_user.id, user_id=admin_user.id
+        ))
+        db.session.commit()
+        rebuild_search_index()
+
+    response = logged_in_non_admin.get("/?q=export")
+    assert sorted(subjects(response, parse_ticket_table_rows)) == ["Export attachments missing", "Export template overlap"]
+
+    response = logged_in_non_admin.get("/?q=export&status=Closed")
+    assert subjects(response, parse_ticket_table_rows) == ["Export attachments missing"]
+
+# Tests that deleted tickets are removed from the index and that the rebuild command indexes existing data
+def test_search_delete_and_rebuild(logged_in_admin, admin_ticket, app, parse_ticket_table_rows):
+    with app.app_context():
+        db.session.add(Comment(comment_text="Escalated to development", created_by="Admin User", ticket_id=admin_ticket.id))
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["rebuild-search-index"])
+    assert "2 document(s)" in result.output
+
+    response = logged_in_admin.get("/?q=escalated")
+    assert subjects(response, parse_ticket_table_rows) == [admin_ticket.subject]
+
+    logged_in_admin.post(f"/delete_ticket/{admin_ticket.id}", follow_redirects=True)
+    response = logged_in_admin.get("/?q=escalated")
+    assert subjects(response, parse_ticket_table_rows) == []
@@ -0,0 +1,101 @@
+import pytest
+from bs4 import BeautifulSoup
+from HelpDesk import create_app, db
+from HelpDesk.models import Ticket, TicketStatusCount
+from HelpDesk.utils.status_count_helper import GLOBAL_SCOPE, rebuild_status_counts
+from conftest import TestConfig
+
+class CounterTestConfig(TestConfig):
+    USE_STATUS_COUNTERS = True
+
+# The app fixture is overridden in this module so that the maintained status counters are enabled.
+@pytest.fixture
+def app():
+    app = create_app(config_class=CounterTestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def parse_dashboard_counts(response):
+    soup = BeautifulSoup(response.data, "html.parser")
+    cards = soup.select("div.card.text-center.p-3")
+    return {card.find("h6").text: int(card.find("h3").text) for card in cards}
+
+def get_counter(scope_id, status):
+    row = db.session.get(TicketStatusCount, (scope_id, status))
+    return row.ticket_count if row else 0
+
+# Tests that the dashboard counts are read from the maintained counters
+def test_dashboard_counts_from_counters(logged_in_non_admin, tickets_for_filtering, app):
+    with app.app_context():
+        rebuild_status_counts()
+
+    response = logged_in_non_admin.get("/", follow_redirects=True)
+    counts = parse_dashboard_counts(response)
+
+    assert counts["Open"] == 1
+    assert counts["Closed"] == 1
+    assert counts["In Progress"] == 0
+
+# Tests that creating, editing and deleting tickets keeps the counters consistent
+def test_counters_maintained_by_ticket_writes(logged_in_admin, admin_user, app):
+    logged_in_admin.post("/create_ticket", data={
+        "ticket_type": "Bug Report",
+        "subject": "Counter Ticket",
+        "description": "Counter Description",
+        "status": "Open",
+        "priority": "Low",
+        "estimated_time": 2.00
+    }, follow_redirects=True)
+
+    with app.app_context():
+        ticket = Ticket.query.filter_by(subject="Counter Ticket").first()
+        ticket_id = ticket.id
+        assert get_counter(GLOBAL_SCOPE, "Open") == 1
+        assert get_counter(admin_user.id, "Open") == 1
+
+    logged_in_admin.post(f"/ticket_details/{ticket_id}", data={
+        "ticket_type": "Bug Report",
+        "subject": "Counter Ticket",
+        "description": "Counter Description",
+        "status": "Resolved",
+        "priority": "Low",
+        "estimated_time": 2.00
+    }, follow_redirects=True)
+
+    with app.app_context():
+        assert get_counter(GLOBAL_SCOPE, "Open") == 0
+        assert get_counter(GLOBAL_SCOPE, "Resolved") == 1
+
+    logged_in_admin.post(f"/delete_ticket/{ticket_id}", follow_redirects=True)
+
+    with app.app_context():
+        assert get_counter(GLOBAL_SCOPE, "Resolved") == 0
+        assert rebuild_status_counts() == 0
+
+# Tests that deleting a user removes their counters but keeps the global counts
+def test_counters_maintained_by_user_delete(logged_in_admin, non_admin_user, non_admin_ticket, app):
+    with app.app_context():
+        rebuild_status_counts()
+
+    logged_in_admin.post(f"/delete_user/{non_admin_user.id}", follow_redirects=True)
+
+    with app.app_context():
+        assert get_counter(non_admin_user.id, "Open") == 0
+        assert get_counter(GLOBAL_SCOPE, "Open") == 1
+        assert rebuild_status_counts() == 0
+
+# Tests that the rebuild command corrects counters that have drifted from the ticket table
+def test_rebuild_status_counts_command(app, non_admin_ticket):
+    with app.app_context():
+        db.session.add(TicketStatusCount(scope_id=GLOBAL_SCOPE, status="Closed", ticket_count=99))
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["rebuild-status-counts"])
+
+    assert "3 counter(s) were inconsistent" in result.output
+    with app.app_context():
+        assert get_counter(GLOBAL_SCOPE, "Closed") == 0
+        assert get_counter(GLOBAL_SCOPE, "Open") == 1
@@ -0,0 +1,60 @@
+import re
+import pytest
+from datetime import datetime, timedelta
+from HelpDesk import db
+from HelpDesk.models import Comment
+from HelpDesk.utils.comment_helper import COMMENTS_PER_PAGE
+
+# Some comments share the same date created so that the id is needed to order them
+@pytest.fixture
+def long_comment_thread(app, non_admin_ticket):
+    with app.app_context():
+        start = datetime(2025, 1, 1, 9, 0, 0)
+        db.session.add_all([
+            Comment(
+                comment_text=f"Update number {i:03d}",
+                created_by="Admin User",
+                ticket_id=non_admin_ticket.id,
+                date_created=start + timedelta(minutes=i // 3)
+            )
+            for i in range(50)
+        ])
+        db.session.commit()
+    return non_admin_ticket.id
+
+def shown_comments(response):
+    return [int(number) for number in re.findall(rb"Update number (\d{3})", response.data)]
+
+def older_comments_url(response):
+    match = re.search(rb'data-url="([^"]+)"', response.data)
+    return match.group(1).decode().replace("&amp;", "&") if match else None
+
+# Tests that the ticket details page only renders the newest comments, oldest first
+def test_ticket_details_renders_newest_comments(logged_in_non_admin, long_comment_thread):
+    response = logged_in_non_admin.get(f"/ticket_details/{long_comment_thread}")
+
+    assert shown_comments(response) == list(range(50 - COMMENTS_PER_PAGE, 50))
+    assert b"Show older comments" in response.data
+
+# Tests that older comments can be fetched page by page until every comment has been shown exactly once
+def test_older_comments_fragment(logged_in_non_admin, long_comment_thread):
+    response = logged_in_non_admin.get(f"/ticket_details/{long_comment_thread}")
+    seen = shown_comments(response)
+    url = older_comments_url(response)
+
+    while url:
+        fragment = logged_in_non_admin.get(url)
+        assert fragment.status_code == 200
+        assert b"<html" not in fragment.data
+        seen = shown_comments(fragment) + seen
+        url = older_comments_url(fragment)
+
+    assert seen == list(range(50))
+
+# Tests that the comments fragment enforces the same access control as the ticket details page
+def test_older_comments_fragment_access_control(logged_in_non_admin, admin_ticket):
+    response = logged_in_non_admin.get(f"/ticket_details/{admin_ticket.id}/comments")
+    missing = logged_in_non_admin.get("/ticket_details/9999/comments")
+
+    assert response.status_code == 403
+    assert missing.status_code == 404
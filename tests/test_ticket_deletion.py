@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event, text
+from HelpDesk import db
+from HelpDesk.models import Comment, Ticket
+from HelpDesk.utils.search_helper import rebuild_search_index
+from HelpDesk.utils.status_count_helper import rebuild_status_counts
+
+# Tests that deleting a ticket is a single update that hides the ticket, and that it can be restored
+def test_soft_delete_and_restore(app, logged_in_admin, admin_ticket, parse_ticket_table_rows):
+    app.config["USE_STATUS_COUNTERS"] = True
+    rebuild_status_counts()
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        logged_in_admin.post(f"/delete_ticket/{admin_ticket.id}")
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    ticket_writes = [s for s in statements if s.lstrip().upper().startswith(("UPDATE TICKET ", "DELETE FROM TICKET"))]
+    assert len(ticket_writes) == 1 and ticket_writes[0].lstrip().upper().startswith("UPDATE")
+    assert not any(s.lstrip().upper().startswith("DELETE FROM COMMENT") for s in statements)
+
+    response = logged_in_admin.get("/")
+    assert b"Ticket deleted successfully." in response.data
+    assert b"Undo" in response.data
+    assert parse_ticket_table_rows(response) == []
+    assert b'<h3 class="fw-bold text-warning">0</h3>' in response.data
+    assert rebuild_status_counts() == 0
+
+    response = logged_in_admin.get(f"/ticket_details/{admin_ticket.id}", follow_redirects=True)
+    assert b"Ticket not found." in response.data
+    response = logged_in_admin.get("/export_tickets?format=ndjson")
+    assert response.get_data(as_text=True).strip() == ""
+
+    response = logged_in_admin.post(f"/restore_ticket/{admin_ticket.id}", follow_redirects=True)
+    assert b"Ticket restored successfully." in response.data
+    assert admin_ticket.subject.encode() in response.data
+    assert rebuild_status_counts() == 0
+
+# Tests that non-admin users cannot restore deleted tickets
+def test_non_admin_cannot_restore(app, logged_in_non_admin, non_admin_ticket):
+    with app.app_context():
+        db.session.get(Ticket, non_admin_ticket.id).is_deleted = True
+        db.session.commit()
+
+    response = logged_in_non_admin.post(f"/restore_ticket/{non_admin_ticket.id}", follow_redirects=True)
+
+    assert b"You do not have permission to restore tickets." in response.data
+
+# Tests that the purge command permanently deletes old deleted tickets in batches, with their comments and search documents
+def test_purge_deleted_tickets_command(app, admin_user):
+    with app.app_context():
+        tickets = [
+            Ticket(
+                ticket_type="Bug Report",
+                subject=f"Purge Ticket {i}",
+                description="Purge",
+                status="Closed",
+                priority="Low",
+                estimated_time=1.00,
+                created_by="Admin User",
+                user_id=admin_user.id,
+                is_deleted=i < 5,
+                deleted_at=datetime.now() - timedelta(days=40 if i < 4 else 1) if i < 5 else None
+            )
+            for i in range(7)
+        ]
+        db.session.add_all(tickets)
+        db.session.flush()
+        db.session.add_all([Comment(comment_text="Note", created_by="Admin User", ticket_id=ticket.id) for ticket in tickets])
+        db.session.commit()
+        rebuild_search_index()
+
+    result = app.test_cli_runner().invoke(args=["purge-deleted-tickets", "--batch-size", "3"])
+
+    assert "Permanently deleted 4 ticket(s)." in result.output
+    with app.app_context():
+        assert Ticket.query.count() == 3
+        assert Comment.query.count() == 3
+        assert db.session.execute(text("SELECT COUNT(*) FROM ticket_search")).scalar() == 6
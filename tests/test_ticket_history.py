@@ -0,0 +1,104 @@
+from datetime import timedelta
+from sqlalchemy import event
+from HelpDesk import db
+from HelpDesk.models import Ticket, TicketHistory
+from HelpDesk.utils.ticket_deletion_helper import purge_deleted_tickets
+
+def ticket_form(ticket, **changes):
+    data = {
+        "ticket_type": ticket.ticket_type,
+        "subject": ticket.subject,
+        "description": ticket.description,
+        "status": ticket.status,
+        "priority": ticket.priority,
+        "estimated_time": f"{ticket.estimated_time:.2f}",
+        "assignee_id": str(ticket.assignee_id or "")
+    }
+    data.update(changes)
+    return data
+
+# Tests that saving an unchanged ticket makes no writes and does not change the date updated
+def test_unchanged_save_is_skipped(app, logged_in_admin, admin_ticket):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = logged_in_admin.post(f"/ticket_details/{admin_ticket.id}", data=ticket_form(admin_ticket))
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert response.status_code == 302
+    assert not any(statement.lstrip().upper().startswith(("UPDATE", "INSERT", "DELETE")) for statement in statements)
+    with app.app_context():
+        assert db.session.get(Ticket, admin_ticket.id).date_updated is None
+        assert TicketHistory.query.count() == 0
+
+    response = logged_in_admin.get(f"/ticket_details/{admin_ticket.id}")
+    assert b"No changes have been made." in response.data
+
+# Tests that only the changed fields are recorded in the ticket history and shown on the ticket page
+def test_changes_are_recorded(app, logged_in_admin, admin_ticket, admin_user):
+    response = logged_in_admin.post(
+        f"/ticket_details/{admin_ticket.id}",
+        data=ticket_form(admin_ticket, status="Closed", assignee_id=str(admin_user.id), description="A new description"),
+        follow_redirects=True
+    )
+
+    assert b"Ticket updated successfully." in response.data
+    assert b"Status changed from <strong>In Progress</strong> to <strong>Closed</strong>" in response.data
+    assert b"Assignee changed from <strong>Unassigned</strong> to <strong>Admin User</strong>" in response.data
+    assert b"Description updated" in response.data
+
+    with app.app_context():
+        history = {row.field: row for row in TicketHistory.query.filter_by(ticket_id=admin_ticket.id)}
+        assert set(history) == {"status", "assignee_id", "description"}
+        assert history["description"].old_value is None and history["description"].new_value is None
+        assert history["status"].changed_by == "Admin User"
+
+        ticket = db.session.get(Ticket, admin_ticket.id)
+        assert ticket.status == "Closed"
+        assert ticket.assignee_id == admin_user.id
+        assert ticket.date_updated is not None
+
+# Tests that a ticket's history is kept while the ticket can be restored and deleted when the ticket is purged
+def test_history_deleted_when_ticket_purged(app, logged_in_admin, admin_ticket):
+    logged_in_admin.post(f"/ticket_details/{admin_ticket.id}", data=ticket_form(admin_ticket, priority="High"))
+    logged_in_admin.post(f"/delete_ticket/{admin_ticket.id}")
+
+    with app.app_context():
+        assert TicketHistory.query.count() == 1
+        purge_deleted_tickets(older_than=timedelta(0))
+        assert TicketHistory.query.count() == 0
+
+# Tests that a save made from an out of date copy of the ticket is reported as a conflict rather than overwriting the other edit
+def test_concurrent_edit_conflict(app, logged_in_admin, admin_ticket):
+    first_editor = ticket_form(admin_ticket, version="1", status="Resolved")
+    second_editor = ticket_form(admin_ticket, version="1", priority="High")
+
+    response = logged_in_admin.post(f"/ticket_details/{admin_ticket.id}", data=first_editor, follow_redirects=True)
+    assert b"Ticket updated successfully." in response.data
+
+    response = logged_in_admin.post(f"/ticket_details/{admin_ticket.id}", data=second_editor)
+    assert response.status_code == 409
+    assert b"your changes have not been saved" in response.data
+    assert b'name="version" value="2"' in response.data
+
+    with app.app_context():
+        ticket = db.session.get(Ticket, admin_ticket.id)
+        assert (ticket.status, ticket.priority, ticket.version) == ("Resolved", "Low", 2)
+
+    # Saving again from the latest version applies the second editor's change
+    response = logged_in_admin.post(
+        f"/ticket_details/{admin_ticket.id}",
+        data=dict(second_editor, version="2", status="Resolved"),
+        follow_redirects=True
+    )
+    assert b"Ticket updated successfully." in response.data
+    with app.app_context():
+        ticket = db.session.get(Ticket, admin_ticket.id)
+        assert (ticket.status, ticket.priority, ticket.version) == ("Resolved", "High", 3)
@@ -0,0 +1,81 @@
+from flask import g
+from HelpDesk import db
+from HelpDesk.models import User
+from HelpDesk.utils import user_cache_helper
+from HelpDesk.utils.reference_cache_helper import bump_cache_version
+from werkzeug.security import generate_password_hash
+
+def count_loads(monkeypatch):
+    loads = []
+    load_identity = user_cache_helper._load_identity
+    monkeypatch.setattr(user_cache_helper, "_load_identity", lambda user_id: loads.append(user_id) or load_identity(user_id))
+    return loads
+
+# The test requests share the app fixture's app context, so the user Flask-Login loaded for the previous request
+# and the cache versions it read are discarded to load the user as a new request would
+def new_request():
+    g.pop("_login_user", None)
+    g.pop("cache_versions", None)
+
+def get(client, *args, **kwargs):
+    new_request()
+    return client.get(*args, **kwargs)
+
+def post(client, *args, **kwargs):
+    new_request()
+    return client.post(*args, **kwargs)
+
+def login(app, email):
+    client = app.test_client()
+    post(client, "/login", data={"email": email, "password": "Password123!"})
+    return client
+
+# Tests that the logged in user is loaded from the database once, and then read from the cache on later requests
+def test_user_is_loaded_once(app, logged_in_non_admin, non_admin_user, monkeypatch):
+    user_cache_helper.invalidate_users([non_admin_user.id])
+    loads = count_loads(monkeypatch)
+    for _ in range(3):
+        assert get(logged_in_non_admin, "/").status_code == 200
+    assert loads == [non_admin_user.id]
+
+# Tests that fields which are not cached are read from the full user, which is only loaded when they are used
+def test_full_user_is_loaded_lazily(app, non_admin_user):
+    user = user_cache_helper.load_cached_user(non_admin_user.id)
+    assert (user.id, user.forename, user.is_admin) == (non_admin_user.id, "NonAdmin", False)
+    assert user._user is None
+    assert user.is_2fa_enabled is False
+    assert user._user is db.session.get(User, non_admin_user.id)
+
+# Tests that a demoted administrator loses access straight away, rather than when their cached identity expires
+def test_demotion_invalidates_cached_user(app, logged_in_admin, admin_user):
+    other_admin = User(email="otheradmin@recruitment-software.co.uk", forename="Other", surname="Admin", password=generate_password_hash("Password123!"), is_admin=True)
+    db.session.add(other_admin)
+    db.session.commit()
+    other_client = login(app, other_admin.email)
+    assert get(other_client, "/users").status_code == 200
+
+    post(logged_in_admin, "/update_admin", data={"user_ids": [other_admin.id]})
+    response = post(other_client, "/update_admin", data={"user_ids": [admin_user.id]}, follow_redirects=True)
+    assert b"You do not have permission to update user roles." in response.data
+    assert db.session.get(User, admin_user.id).is_admin
+
+# Tests that a user who is marked for deletion is logged out on their next request
+def test_deletion_invalidates_cached_user(app, logged_in_admin, non_admin_user):
+    other_client = login(app, non_admin_user.email)
+    assert get(other_client, "/").status_code == 200
+
+    post(logged_in_admin, f"/delete_user/{non_admin_user.id}")
+    assert get(other_client, "/").status_code == 302
+
+# Tests that a change committed by another worker, which cannot clear this worker's cache, is seen on the next request
+def test_cached_user_is_reloaded_when_another_worker_changes_it(app, logged_in_admin, admin_user, monkeypatch):
+    assert get(logged_in_admin, "/users").status_code == 200
+
+    # Another worker demotes the administrator, leaving this worker's entry in place
+    db.session.get(User, admin_user.id).is_admin = False
+    bump_cache_version(user_cache_helper.USER_DATA)
+    db.session.commit()
+    assert user_cache_helper._user_cache().get(admin_user.id)[1][4] is True
+
+    response = get(logged_in_admin, "/users", follow_redirects=True)
+    assert b"You do not have permission" in response.data
@@ -1,3 +1,9 @@
+import re
+import pytest
+from sqlalchemy import event
+from HelpDesk import db
+from HelpDesk.models import Comment, Job, Ticket, User
+
 # Tests that admin users can view the users page
 def test_admin_can_view_users_page(logged_in_admin):
     response = logged_in_admin.get("/users", follow_redirects=True)
@@ -19,7 +25,7 @@ def test_admin_can_delete_user(logged_in_admin, non_admin_user):
     response = logged_in_admin.post(f"/delete_user/{non_admin_user.id}", follow_redirects=True)
 
     assert response.status_code == 200
-    assert b"has been deleted" in response.data 
+    assert b"has been marked for deletion" in response.data 
 
 # Tests that non-admin users cannot view the users page
 def test_non_admin_cannot_view_users_page(logged_in_non_admin):
@@ -40,4 +46,236 @@ def test_non_admin_cannot_delete_user(logged_in_non_admin, admin_user):
     response = logged_in_non_admin.post(f"/delete_user/{admin_user.id}",
         follow_redirects=True)
     
-    assert b'You do not have permission to delete users.' in response.data    
\ No newline at end of file
+    assert b'You do not have permission to delete users.' in response.data    
+
+@pytest.fixture
+def many_users(app, non_admin_user):
+    with app.app_context():
+        users = [
+            User(
+                email=f"external{i}@example.com",
+                forename=f"External{i}",
+                surname="Customer",
+                is_admin=False
+            )
+            for i in range(60)
+        ]
+        db.session.add_all(users)
+        db.session.flush()
+
+        db.session.add_all([
+            Ticket(
+                ticket_type="Support Request",
+                subject=f"Reported Ticket {i}",
+                description="Reported ticket",
+                status="Open",
+                priority="Low",
+                estimated_time=1.00,
+                created_by=users[0].id,
+                user_id=users[0].id
+            )
+            for i in range(3)
+        ])
+        db.session.commit()
+
+# Tests that the users page is paginated rather than listing every user
+def test_users_page_is_paginated(logged_in_admin, many_users):
+    first_page = logged_in_admin.get("/users")
+    third_page = logged_in_admin.get("/users?page=3")
+
+    assert first_page.status_code == 200
+    assert b"Page 1 of 3" in first_page.data
+    assert b"external10@example.com" in first_page.data
+    assert b"external59@example.com" not in first_page.data
+    assert b"external59@example.com" in third_page.data
+
+# Tests that the users page can be searched by name or email address
+def test_users_page_search(logged_in_admin, many_users):
+    by_name = logged_in_admin.get("/users?q=External42")
+    by_email = logged_in_admin.get("/users?q=external7@")
+
+    assert b"external42@example.com" in by_name.data
+    assert b"external41@example.com" not in by_name.data
+    assert b"external7@example.com" in by_email.data
+    assert b"external17@example.com" not in by_email.data
+
+# Tests that the reported and assigned ticket counts are shown for each user
+def test_users_page_ticket_counts(app, logged_in_admin, many_users, admin_user):
+    with app.app_context():
+        ticket = Ticket.query.first()
+        ticket.assignee_id = admin_user.id
+        db.session.commit()
+
+    response = logged_in_admin.get("/users?q=External0")
+
+    assert re.search(rb"external0@example.com</td>\s*<td[^>]*>\s*<span[^>]*>3</span>", response.data)
+    response = logged_in_admin.get(f"/users?q={admin_user.email}")
+    assert re.search(rb"adminuser@recruitment-software.co.uk</td>\s*<td[^>]*>\s*<span[^>]*>1</span>", response.data)
+
+# Tests that the number of queries run by the users page does not depend on the number of users
+def test_users_page_query_count(app, logged_in_admin, many_users):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = logged_in_admin.get("/users")
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert response.status_code == 200
+    assert len(statements) <= 12
+
+# Tests that promoting and demoting many users runs a fixed number of statements and unassigns the demoted users' tickets
+def test_bulk_role_changes(app, logged_in_admin, many_users, admin_user):
+    with app.app_context():
+        external_ids = [u.id for u in User.query.filter(User.email.like("external%")).order_by(User.id)]
+        demoted = User(email="demoted@recruitment-software.co.uk", forename="Demoted", surname="Admin", is_admin=True)
+        db.session.add(demoted)
+        db.session.flush()
+        ticket = Ticket.query.first()
+        ticket.assignee_id = demoted.id
+        ticket_id = ticket.id
+        demoted_id = demoted.id
+        db.session.commit()
+
+    data = {"user_ids": [str(i) for i in external_ids] + [str(demoted_id), str(admin_user.id)]}
+    data.update({f"is_admin_{i}": "on" for i in external_ids})
+    data[f"is_admin_{admin_user.id}"] = "on"
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = logged_in_admin.post("/update_admin", data=data)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert response.status_code == 302
+    assert len([s for s in statements if s.lstrip().upper().startswith("UPDATE")]) <= 4
+    assert len(statements) <= 12
+
+    with app.app_context():
+        assert User.query.filter(User.id.in_(external_ids), User.is_admin.is_(True)).count() == len(external_ids)
+        assert db.session.get(User, demoted_id).is_admin is False
+        assert db.session.get(Ticket, ticket_id).assignee_id is None
+
+@pytest.fixture
+def user_with_history(app, admin_user, non_admin_user):
+    with app.app_context():
+        leaver = User(email="leaver@recruitment-software.co.uk", forename="Leaver", surname="Admin", is_admin=True)
+        db.session.add(leaver)
+        db.session.flush()
+        tickets = [
+            Ticket(
+                ticket_type="Support Request",
+                subject=f"History Ticket {i}",
+                description="History",
+                status="Open",
+                priority="Low",
+                estimated_time=1.00,
+                created_by=leaver.id,
+                user_id=leaver.id if i % 2 else non_admin_user.id,
+                assignee_id=leaver.id
+            )
+            for i in range(7)
+        ]
+        db.session.add_all(tickets)
+        db.session.flush()
+        db.session.add_all([Comment(comment_text="Note", created_by="Leaver Admin", ticket_id=tickets[0].id, user_id=leaver.id) for i in range(3)])
+        db.session.commit()
+        return leaver.id
+
+# Tests that deleting a user detaches their tickets and comments in batches before deleting the user
+def test_user_deletion_detaches_rows_in_batches(app, logged_in_admin, user_with_history):
+    app.config['USER_DELETION_BATCH_SIZE'] = 2
+    commits = []
+
+    def commit(conn):
+        commits.append(conn)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "commit", commit)
+    try:
+        response = logged_in_admin.post(f"/delete_user/{user_with_history}", follow_redirects=True)
+    finally:
+        event.remove(engine, "commit", commit)
+
+    assert b"has been marked for deletion" in response.data
+    with app.app_context():
+        assert db.session.get(User, user_with_history) is None
+        assert Ticket.query.filter((Ticket.user_id == user_with_history) | (Ticket.assignee_id == user_with_history)).count() == 0
+        assert Comment.query.filter_by(user_id=user_with_history).count() == 0
+        assert Ticket.query.count() == 7
+    # 3 ticket user batches, 4 assignee batches and 2 comment batches, each committed separately
+    assert len(commits) >= 9
+
+# Tests that the progress of a deletion is shown on the users page and the user cannot be deleted twice
+def test_pending_deletion_progress(app, logged_in_admin, non_admin_user):
+    with app.app_context():
+        user = db.session.get(User, non_admin_user.id)
+        user.pending_deletion = True
+        user.deletion_total = 4
+        user.deletion_progress = 1
+        db.session.commit()
+
+    response = logged_in_admin.get(f"/users?q={non_admin_user.email}")
+    assert b"Deleting (25%)" in response.data
+
+    response = logged_in_admin.post(f"/delete_user/{non_admin_user.id}", follow_redirects=True)
+    assert b"is already being deleted" in response.data
+
+# Tests that a user pending deletion cannot log in
+def test_pending_deletion_user_cannot_log_in(app, client, non_admin_user):
+    with app.app_context():
+        db.session.get(User, non_admin_user.id).pending_deletion = True
+        db.session.commit()
+
+    response = client.post("/login", data={"email": non_admin_user.email, "password": "Password123!"}, follow_redirects=True)
+
+    assert b"Incorrect email or password." in response.data
+
+# Tests that interrupted deletions are resumed by the 'flask resume-user-deletions' command
+def test_resume_user_deletions_command(app, user_with_history):
+    with app.app_context():
+        user = db.session.get(User, user_with_history)
+        user.pending_deletion = True
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["resume-user-deletions"])
+
+    assert "Resumed the deletion of 1 user(s)." in result.output
+    with app.app_context():
+        assert db.session.get(User, user_with_history) is None
+
+# Tests that a deletion is queued as a durable job that the worker runs, and is requeued if its job was lost
+def test_user_deletion_is_queued_for_the_worker(app, logged_in_admin, user_with_history):
+    app.config["BACKGROUND_JOBS_SYNC"] = False
+    logged_in_admin.post(f"/delete_user/{user_with_history}")
+
+    with app.app_context():
+        assert db.session.get(User, user_with_history).pending_deletion
+        assert [(job.kind, job.recipient) for job in Job.query] == [("user_deletion", str(user_with_history))]
+
+        # A deletion that already has a job is not queued twice
+        assert app.test_cli_runner().invoke(args=["resume-user-deletions"]).output.startswith("Resumed the deletion of 0 user(s).")
+        Job.query.delete()
+        db.session.commit()
+        assert app.test_cli_runner().invoke(args=["resume-user-deletions"]).output.startswith("Resumed the deletion of 1 user(s).")
+
+    result = app.test_cli_runner().invoke(args=["run-worker", "--once"])
+
+    assert "Processed 1 job(s)." in result.output
+    with app.app_context():
+        assert db.session.get(User, user_with_history) is None
+        assert Job.query.count() == 0